@@ -0,0 +1,19 @@
+import os
+
+APP_DIR_NAME = "LiangYuPaper"
+
+
+def get_app_data_dir(*parts):
+    """
+    获取应用数据目录，不存在时自动创建
+
+    Args:
+        *parts (str): 数据目录下的子目录
+
+    Returns:
+        str: 目录的绝对路径
+    """
+    base_dir = os.getenv("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    path = os.path.join(base_dir, APP_DIR_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
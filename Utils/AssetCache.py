@@ -0,0 +1,332 @@
+import os
+import hashlib
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt, QObject, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QPixmap, QFont, QFontDatabase
+
+from Utils.LogService import get_logger
+from Utils import Metrics
+
+logger = get_logger("assets")
+
+DEFAULT_PIXMAP_BUDGET_MB = 64
+DEFAULT_RETAIN_MB = 64
+
+
+def _stat_key(path):
+    """(大小, 修改时间)，文件不存在时为 None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class AssetCache(QObject):
+    """
+    按内容寻址的图片缓存（在GUI线程使用）
+
+    图片在后台线程读取、计算 SHA-1 并解码，同一内容（即使路径不同）只解码一次，由所有引用者共享。
+    已知路径按 (大小, 修改时间) 记住对应的摘要，再次请求时不必重新读取文件。
+    request() 得到的引用须在不再使用时 release()。引用数归零的图片先保留在最近释放的队列中
+    （总量不超过 retain_bytes），重启壁纸或切换场景时再次请求不必重新解码；超出时丢弃最早释放的。
+    """
+    _loaded = pyqtSignal(str, object, object, object)  # 路径, 文件状态, 摘要, QImage（已有该内容或读取失败时为 None）
+
+    def __init__(self, max_workers=2, retain_bytes=DEFAULT_RETAIN_MB * 1024 ** 2, parent=None):
+        super().__init__(parent)
+        self.retain_bytes = retain_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="assets")
+        self._entries = {}  # 摘要 -> [QImage, 引用数]
+        self._released = OrderedDict()  # 引用数为 0 的摘要，最早释放的在前
+        self._paths = {}  # 路径 -> ((大小, 修改时间), 摘要)
+        self._pending = defaultdict(list)  # 路径 -> 等待的回调
+        self._closed = False
+
+        self.hits = Metrics.counter("assets.hits", "已解码（含其他路径的相同内容）而无需再次解码的请求数")
+        self.misses = Metrics.counter("assets.misses", "需要读取并解码文件的请求数")
+        self.bytes_gauge = Metrics.gauge("assets.bytes", "已解码图片占用的内存")
+        self._loaded.connect(self._on_loaded, Qt.QueuedConnection)
+
+    @property
+    def total_bytes(self):
+        return sum(image.sizeInBytes() for image, _ in self._entries.values())
+
+    def stats(self):
+        return {
+            'entries': len(self._entries),
+            'released': len(self._released),
+            'bytes': self.total_bytes,
+            'hits': self.hits.value,
+            'misses': self.misses.value,
+        }
+
+    def request(self, path, callback):
+        """
+        请求一张图片，callback(摘要, QImage) 在GUI线程调用；读取或解码失败时为 callback(None, None)。
+        已解码的图片立即（同步）回调，否则在后台加载；同一路径同时只加载一次。
+        """
+        path = os.path.abspath(path)
+        known = self._paths.get(path)
+        if known is not None and known[1] in self._entries and known[0] == _stat_key(path):
+            self.hits.inc()
+            self._deliver(known[1], callback)
+            return
+        waiting = self._pending[path]
+        waiting.append(callback)
+        if len(waiting) == 1:
+            self._executor.submit(self._load, path)
+
+    def _load(self, path):
+        """后台线程：读取文件并按内容去重，新内容才解码"""
+        key, digest, image = _stat_key(path), None, None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            digest = hashlib.sha1(data).hexdigest()
+            if digest not in self._entries:
+                image = QImage.fromData(data)
+                if image.isNull():
+                    digest = None
+        except OSError as e:
+            logger.warning(f"读取图片失败: {e}")
+        if not self._closed:
+            self._loaded.emit(path, key, digest, image)
+
+    def _on_loaded(self, path, key, digest, image):
+        callbacks = self._pending.pop(path, [])
+        if digest is None:
+            logger.warning(f"无法加载图片: {path}", extra={'event': 'asset_failed'})
+            for callback in callbacks:
+                callback(None, None)
+            return
+        self._paths[path] = (key, digest)
+        if digest in self._entries:
+            self.hits.inc(len(callbacks))
+        elif image is not None:
+            self.misses.inc()
+            self.hits.inc(len(callbacks) - 1)
+            self._entries[digest] = [image, 0]
+            self.bytes_gauge.set(self.total_bytes)
+        else:
+            # 解码前已有相同内容，随后在等待期间被释放：重新加载
+            self._pending[path] = callbacks
+            self._executor.submit(self._load, path)
+            return
+        for callback in callbacks:
+            self._deliver(digest, callback)
+
+    def _deliver(self, digest, callback):
+        entry = self._entries[digest]
+        entry[1] += 1
+        self._released.pop(digest, None)
+        callback(digest, entry[0])
+
+    def release(self, digest):
+        """释放 request() 得到的一个引用"""
+        entry = self._entries.get(digest)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        self._released[digest] = entry[0].sizeInBytes()
+        retained = sum(self._released.values())
+        while retained > self.retain_bytes:
+            evicted, size = self._released.popitem(last=False)
+            del self._entries[evicted]
+            retained -= size
+        self.bytes_gauge.set(self.total_bytes)
+
+    def shutdown(self):
+        """停止后台加载（退出时调用）"""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _decode_scaled(path, target):
+    """后台线程：解码图片，target 不为 None 时保持宽高比缩放到 target 之内（JPEG 等格式在解码时直接缩小）"""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    if target is not None and reader.size().isValid():
+        reader.setScaledSize(reader.size().scaled(target, Qt.KeepAspectRatio))
+        target = None
+    image = reader.read()
+    if image.isNull():
+        logger.warning(f"无法加载图片: {path}（{reader.errorString()}）", extra={'event': 'asset_failed'})
+        return None
+    if target is not None:
+        image = image.scaled(target, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if image.format() not in (QImage.Format_ARGB32_Premultiplied, QImage.Format_RGB32):
+        # 预乘格式绘制时不需要再转换
+        image = image.convertToFormat(QImage.Format_ARGB32_Premultiplied if image.hasAlphaChannel()
+                                      else QImage.Format_RGB32)
+    return image
+
+
+def _pixmap_bytes(pixmap):
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
+class PixmapCache(QObject):
+    """
+    覆盖层图片和字体的共享缓存（在GUI线程使用，通过 PluginBase.load_pixmap / load_font 提供给插件）
+
+    图片按 (路径, 大小, 设备像素比) 缓存为已缩放的 QPixmap，在后台线程解码和缩放，所有插件共用；
+    总占用超过 max_bytes 时淘汰最久未使用的图片，内存上限与插件数量无关。
+    插件应在每次绘制时取用而不是长期持有 QPixmap，否则被淘汰的图片仍占用内存。
+    字体文件按路径只注册一次（字体由 Qt 管理，不计入内存上限）。
+    """
+    _decoded = pyqtSignal(object, object)  # 键, QImage（失败时为 None）
+
+    def __init__(self, max_bytes=DEFAULT_PIXMAP_BUDGET_MB * 1024 ** 2, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="overlay-assets")
+        self._pixmaps = OrderedDict()  # 键 -> QPixmap，最近使用的在后
+        self._bytes = 0
+        self._pending = {}  # 键 -> [(回调, 所属插件)]
+        self._failed = set()
+        self._font_families = {}  # 字体路径 -> 字体族名（注册失败时为 None）
+        self._closed = False
+
+        self.hits = Metrics.counter("overlay_assets.hits", "覆盖层图片和字体直接从缓存取得的次数")
+        self.misses = Metrics.counter("overlay_assets.misses", "覆盖层图片和字体需要解码或注册的次数")
+        self.evictions = Metrics.counter("overlay_assets.evictions", "因超过内存上限被淘汰的覆盖层图片数")
+        self.bytes_gauge = Metrics.gauge("overlay_assets.bytes", "缓存的覆盖层图片占用的内存")
+        self._decoded.connect(self._on_decoded, Qt.QueuedConnection)
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+    def stats(self):
+        return {
+            'entries': len(self._pixmaps),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits.value,
+            'misses': self.misses.value,
+            'evictions': self.evictions.value,
+            'fonts': len(self._font_families),
+        }
+
+    @staticmethod
+    def _key(path, size, dpr):
+        if size is not None and not isinstance(size, QSize):
+            size = QSize(*size)
+        return (os.path.abspath(path), (size.width(), size.height()) if size is not None else None,
+                round(float(dpr), 2))
+
+    def pixmap(self, path, size=None, dpr=1.0, callback=None, owner=None):
+        """
+        取得缩放到 size（逻辑像素，保持宽高比；None 为原始大小）的图片
+
+        Returns:
+            QPixmap: 已缓存时直接返回（设备像素比为 dpr），否则返回 None 并在后台解码，
+                     完成后在GUI线程调用 callback(pixmap)；解码失败时为 callback(None)，之后不再重试
+        """
+        key = self._key(path, size, dpr)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            self.hits.inc()
+            return pixmap
+        if key in self._failed:
+            return None
+        waiting = self._pending.get(key)
+        if waiting is None:
+            # 同一张图片同时只解码一次，绘制期间反复请求只登记回调
+            self.misses.inc()
+            waiting = self._pending[key] = []
+            self._executor.submit(self._decode, key)
+        if callback is not None:
+            waiting.append((callback, owner))
+        return None
+
+    def _decode(self, key):
+        """后台线程"""
+        path, size, dpr = key
+        target = QSize(round(size[0] * dpr), round(size[1] * dpr)) if size is not None else None
+        image = _decode_scaled(path, target)
+        if not self._closed:
+            self._decoded.emit(key, image)
+
+    def _on_decoded(self, key, image):
+        callbacks = self._pending.pop(key, [])
+        pixmap = None
+        if image is None:
+            self._failed.add(key)
+        else:
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(key[2])
+            self._store(key, pixmap)
+        for callback, owner in callbacks:
+            try:
+                callback(pixmap)
+            except Exception as e:
+                logger.exception(f"图片加载回调出错: {e}", extra={'plugin': getattr(owner, 'name', None)})
+
+    def _store(self, key, pixmap):
+        size = _pixmap_bytes(pixmap)
+        if size > self.max_bytes:
+            # 单张就超过上限：交给调用方，但不缓存
+            logger.debug(f"图片超过缓存上限，不缓存: {key[0]}")
+            return
+        self._pixmaps[key] = pixmap
+        self._bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._pixmaps and self._bytes > self.max_bytes:
+            _, evicted = self._pixmaps.popitem(last=False)
+            self._bytes -= _pixmap_bytes(evicted)
+            self.evictions.inc()
+        self.bytes_gauge.set(self._bytes)
+
+    def set_max_bytes(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def invalidate(self, path):
+        """丢弃某个文件的所有缓存（文件内容变化后调用）"""
+        path = os.path.abspath(path)
+        for key in [key for key in self._pixmaps if key[0] == path]:
+            self._bytes -= _pixmap_bytes(self._pixmaps.pop(key))
+        self._failed = {key for key in self._failed if key[0] != path}
+        self.bytes_gauge.set(self._bytes)
+
+    def font(self, path, pixel_size=None):
+        """
+        从字体文件创建 QFont，同一文件只注册一次
+
+        Returns:
+            QFont: 注册失败时为默认字体
+        """
+        path = os.path.abspath(path)
+        if path in self._font_families:
+            self.hits.inc()
+        else:
+            self.misses.inc()
+            font_id = QFontDatabase.addApplicationFont(path)
+            families = QFontDatabase.applicationFontFamilies(font_id) if font_id >= 0 else []
+            self._font_families[path] = families[0] if families else None
+            if not families:
+                logger.warning(f"无法加载字体: {path}", extra={'event': 'asset_failed'})
+        family = self._font_families[path]
+        font = QFont(family) if family else QFont()
+        if pixel_size is not None:
+            font.setPixelSize(pixel_size)
+        return font
+
+    def cancel_owner(self, owner):
+        """丢弃插件等待中的回调（插件卸载时调用），解码结果仍会缓存"""
+        for waiting in self._pending.values():
+            waiting[:] = [(callback, item_owner) for callback, item_owner in waiting if item_owner is not owner]
+
+    def shutdown(self):
+        """停止后台解码（退出时调用）"""
+        self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
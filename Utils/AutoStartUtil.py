@@ -1,9 +1,12 @@
 import os
 import time
 import subprocess
+import logging
 import threading
 from pathlib import Path
 
+logger = logging.getLogger("liangyu.autostart")
+
 
 class AutoStartUtil:
     """
@@ -117,9 +120,9 @@ timeout /t 2 /nobreak >nul
             try:
                 if os.path.exists(file_path):
                     os.remove(file_path)
-                    print(f"已清理文件: {file_path}")
+                    logger.info(f"已清理文件: {file_path}")
             except Exception as e:
-                print(f"清理文件失败 {file_path}: {e}")
+                logger.warning(f"清理文件失败 {file_path}: {e}")
 
     def set_autostart(self, show_window=True):
         """
@@ -150,11 +153,11 @@ timeout /t 2 /nobreak >nul
             )
             cleanup_thread.start()
 
-            print(f"正在设置 {self.app_name} 自启动...")
+            logger.info(f"正在设置 {self.app_name} 自启动...", extra={'event': 'autostart_set'})
             return True
 
         except Exception as e:
-            print(f"设置自启动失败: {e}")
+            logger.error(f"设置自启动失败: {e}")
             return False
 
     def unset_autostart(self, show_window=True):
@@ -186,11 +189,11 @@ timeout /t 2 /nobreak >nul
             )
             cleanup_thread.start()
 
-            print(f"正在取消 {self.app_name} 自启动...")
+            logger.info(f"正在取消 {self.app_name} 自启动...", extra={'event': 'autostart_unset'})
             return True
 
         except Exception as e:
-            print(f"取消自启动失败: {e}")
+            logger.error(f"取消自启动失败: {e}")
             return False
 
     def check_autostart_status(self):
@@ -221,7 +224,7 @@ timeout /t 2 /nobreak >nul
                 return False
 
         except Exception as e:
-            print(f"检查自启动状态失败: {e}")
+            logger.error(f"检查自启动状态失败: {e}")
             return False
 
     def get_autostart_path(self):
@@ -250,7 +253,7 @@ timeout /t 2 /nobreak >nul
                 return None
 
         except Exception as e:
-            print(f"获取自启动路径失败: {e}")
+            logger.error(f"获取自启动路径失败: {e}")
             return None
 
 
@@ -0,0 +1,100 @@
+import getpass
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+
+from Utils.LogService import get_logger
+
+logger = get_logger("control")
+
+
+def _server_name():
+    # Unix 上本地套接字位于公共临时目录，按用户区分
+    return f"LiangYuPaper-control-{getpass.getuser()}"
+
+
+class ControlServer(QObject):
+    """
+    本机控制通道：其他进程（例如 `python main.py --profile start`）发送一行命令，收到一行回复
+
+    命令的第一个词选择处理函数，其余的词作为参数：handler(args) 在GUI线程调用，返回回复文本。
+    """
+
+    def __init__(self, name=None, parent=None):
+        super().__init__(parent)
+        self.name = name or _server_name()
+        self._handlers = {}
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+
+    def register(self, command, handler):
+        self._handlers[command] = handler
+
+    def start(self):
+        """
+        开始监听，已有其他实例在监听时返回 False
+        """
+        if self.server.listen(self.name):
+            return True
+        if send_command("ping", self.name, timeout_ms=500) is not None:
+            logger.warning("已有其他实例在运行，本实例不接受控制命令", extra={'event': 'control_in_use'})
+            return False
+        # 上次异常退出遗留的套接字文件
+        QLocalServer.removeServer(self.name)
+        if not self.server.listen(self.name):
+            logger.warning(f"无法启动控制通道: {self.server.errorString()}")
+            return False
+        return True
+
+    def close(self):
+        self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            socket.disconnected.connect(socket.deleteLater)
+
+    def _on_ready_read(self, socket):
+        while socket.canReadLine():
+            line = bytes(socket.readLine()).decode("utf-8", "replace").strip()
+            socket.write((self._dispatch(line) + "\n").encode("utf-8"))
+        socket.flush()
+
+    def _dispatch(self, line):
+        parts = line.split()
+        if not parts:
+            return "error: 空命令"
+        if parts[0] == "ping":
+            return "pong"
+        handler = self._handlers.get(parts[0])
+        if handler is None:
+            return f"error: 未知命令 {parts[0]}，可用: {', '.join(sorted(self._handlers))}"
+        try:
+            return handler(parts[1:])
+        except Exception as e:
+            logger.exception(f"处理控制命令出错: {line}")
+            return f"error: {e}"
+
+
+def send_command(command, name=None, timeout_ms=3000):
+    """
+    向运行中的实例发送一行命令
+
+    Returns:
+        str: 回复文本，没有运行中的实例或超时时为 None
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(name or _server_name())
+    if not socket.waitForConnected(timeout_ms):
+        return None
+    socket.write((command + "\n").encode("utf-8"))
+    socket.waitForBytesWritten(timeout_ms)
+    while not socket.canReadLine():
+        if not socket.waitForReadyRead(timeout_ms):
+            socket.abort()
+            return None
+    reply = bytes(socket.readLine()).decode("utf-8", "replace").strip()
+    socket.disconnectFromServer()
+    return reply
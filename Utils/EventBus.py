@@ -0,0 +1,337 @@
+import time
+import heapq
+import asyncio
+import inspect
+import itertools
+from collections import defaultdict
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from Utils.LogService import get_logger
+from Utils import Tracing
+from Utils.ThreadPool import DaemonThreadPoolExecutor
+
+EVENT_WALLPAPER_START = "wallpaper_start"      # payload: {'video_path': str, 'loop': bool}
+EVENT_WALLPAPER_STOP = "wallpaper_stop"        # payload: None
+EVENT_SETTINGS_CHANGED = "settings_changed"    # payload: 仅包含变化键的字典
+EVENT_OPERATE_ON_WINDOW = "operate_on_window"  # payload: 覆盖层画布
+EVENT_QUALITY_CHANGED = "quality_changed"      # payload: QualityLevel
+
+logger = get_logger("event_bus")
+
+THREAD_GUI = "gui"
+THREAD_WORKER = "worker"
+
+
+class Subscription:
+    """一条事件订阅"""
+    __slots__ = ("event_type", "handler", "keys", "priority", "thread", "owner", "is_async", "active")
+
+    def __init__(self, event_type, handler, keys, priority, thread, owner):
+        self.event_type = event_type
+        self.handler = handler
+        self.keys = frozenset(keys) if keys else None
+        self.priority = priority
+        self.thread = thread
+        self.owner = owner
+        self.is_async = inspect.iscoroutinefunction(handler)
+        self.active = True
+
+
+# 只剩等待IO的任务时轮询选择器的间隔（毫秒）；回调和定时器通过唤醒通知精确调度
+ASYNC_IO_POLL_MS = 20
+
+
+class _WakeupEventLoop(asyncio.SelectorEventLoop):
+    """
+    通过重写公开的调度方法得知新的回调和定时器，由 wakeup(delay) 通知Qt侧安排下一次推进，
+    不读取事件循环的内部状态
+    """
+
+    def __init__(self, wakeup):
+        super().__init__()
+        self._wakeup = wakeup
+
+    def call_soon(self, callback, *args, context=None):
+        handle = super().call_soon(callback, *args, context=context)
+        self._wakeup(0.0)
+        return handle
+
+    def call_soon_threadsafe(self, callback, *args, context=None):
+        handle = super().call_soon_threadsafe(callback, *args, context=context)
+        self._wakeup(0.0)
+        return handle
+
+    def call_at(self, when, callback, *args, context=None):
+        # call_later 也经由 call_at
+        handle = super().call_at(when, callback, *args, context=context)
+        self._wakeup(max(0.0, when - self.time()))
+        return handle
+
+
+class EventBus(QObject):
+    """
+    插件事件总线
+
+    - 插件按事件类型（以及设置键）订阅，分发开销只与订阅者数量有关
+    - 事件默认进入优先级队列，在下一次事件循环中分发；同类型事件可合并
+      （一连串设置修改只会产生一次增量通知）
+    - 处理函数可在GUI线程或后台工作线程执行；async def 处理函数运行在
+      与Qt事件循环集成的 asyncio 事件循环上（仍在GUI线程）
+    """
+
+    # 事件循环有新的回调或定时器（延迟秒数），可能来自其他线程
+    _async_wakeup = pyqtSignal(float)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._subscriptions = defaultdict(tuple)
+        self._queue = []
+        self._queued_by_type = {}
+        self._sequence = itertools.count()
+        self._flush_scheduled = False
+        self._known_settings = {}
+        self._executor = None
+        self._async_loop = None
+        self._async_timer = None
+        self._async_stepping = False
+        self._async_next = None  # 推进过程中请求的最早唤醒（秒）
+        self.handler_time = defaultdict(float)  # owner -> 处理函数累计耗时（秒）
+        self._async_tasks = defaultdict(set)  # owner -> 未完成的 asyncio 任务
+
+    # ---- 订阅 ----
+
+    def subscribe(self, event_type, handler, keys=None, priority=0, thread=THREAD_GUI, owner=None):
+        """
+        订阅事件
+
+        Args:
+            event_type (str): 事件类型
+            handler (callable): 处理函数 handler(payload)，可以是 async def
+            keys (iterable): 仅关心的键（payload为字典时生效），None表示全部
+            priority (int): 优先级，数值越大越先执行
+            thread (str): THREAD_GUI 或 THREAD_WORKER
+            owner: 订阅所属的插件，用于启用状态判断和统一取消
+
+        Returns:
+            Subscription: 订阅对象，可用于 unsubscribe
+        """
+        subscription = Subscription(event_type, handler, keys, priority, thread, owner)
+        # 订阅列表以元组保存（写时复制），分发时无需复制
+        subscribers = self._subscriptions[event_type] + (subscription,)
+        self._subscriptions[event_type] = tuple(sorted(subscribers, key=lambda s: -s.priority))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.active = False
+        subscribers = self._subscriptions.get(subscription.event_type, ())
+        self._subscriptions[subscription.event_type] = tuple(s for s in subscribers if s is not subscription)
+
+    def unsubscribe_owner(self, owner):
+        """取消某个插件的全部订阅和未完成的 async 处理函数，并丢弃其耗时统计（不再持有插件的引用）"""
+        for event_type, subscribers in self._subscriptions.items():
+            for subscription in subscribers:
+                if subscription.owner is owner:
+                    subscription.active = False
+            self._subscriptions[event_type] = tuple(s for s in subscribers if s.owner is not owner)
+        for task in self._async_tasks.pop(owner, ()):
+            task.cancel()
+        self.handler_time.pop(owner, None)
+
+    def subscriber_count(self, event_type):
+        return len(self._subscriptions.get(event_type, ()))
+
+    # ---- 发布 ----
+
+    def publish(self, event_type, payload=None, priority=0, sync=False, coalesce=False):
+        """
+        发布事件
+
+        Args:
+            event_type (str): 事件类型
+            payload: 事件数据
+            priority (int): 队列优先级，数值越大越先分发
+            sync (bool): 为True时立即在当前线程分发，不进入队列
+            coalesce (bool): 为True时与队列中尚未分发的同类型事件合并（字典合并，其他类型取最新值）
+        """
+        if not self._subscriptions.get(event_type):
+            return
+        if sync:
+            self._dispatch(event_type, payload)
+            return
+
+        if coalesce and event_type in self._queued_by_type:
+            entry = self._queued_by_type[event_type]
+            if isinstance(entry[3], dict) and isinstance(payload, dict):
+                entry[3].update(payload)
+            else:
+                entry[3] = payload
+            return
+
+        if isinstance(payload, dict) and coalesce:
+            payload = dict(payload)
+        entry = [-priority, next(self._sequence), event_type, payload]
+        heapq.heappush(self._queue, entry)
+        if coalesce:
+            self._queued_by_type[event_type] = entry
+        self._schedule_flush()
+
+    def publish_settings(self, settings, priority=0):
+        """发布设置变更：只发送与上次相比发生变化的键，并与未分发的变更合并"""
+        delta = {key: value for key, value in settings.items()
+                 if key not in self._known_settings or self._known_settings[key] != value}
+        self._known_settings.update(settings)
+        if delta:
+            self.publish(EVENT_SETTINGS_CHANGED, delta, priority=priority, coalesce=True)
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            QTimer.singleShot(0, self.flush)
+
+    def flush(self):
+        """按优先级分发队列中的全部事件"""
+        self._flush_scheduled = False
+        while self._queue:
+            _, _, event_type, payload = heapq.heappop(self._queue)
+            self._queued_by_type.pop(event_type, None)
+            self._dispatch(event_type, payload)
+
+    # ---- 分发 ----
+
+    def _dispatch(self, event_type, payload):
+        # 订阅元组不会被修改，处理函数中可以安全地增删订阅
+        handler_time = self.handler_time
+        perf_counter = time.perf_counter
+        recorder = Tracing.recorder()
+        for subscription in self._subscriptions.get(event_type, ()):
+            owner = subscription.owner
+            if not subscription.active or (owner is not None and not owner.enabled):
+                continue
+
+            event_payload = payload
+            if subscription.keys is not None and isinstance(payload, dict):
+                event_payload = {key: payload[key] for key in subscription.keys if key in payload}
+                if not event_payload:
+                    continue
+
+            if subscription.is_async:
+                self._run_async(subscription, event_payload)
+            elif subscription.thread == THREAD_WORKER:
+                self._run_in_worker(subscription, event_payload)
+            else:
+                start = perf_counter()
+                try:
+                    subscription.handler(event_payload)
+                except Exception as e:
+                    self._report_error(subscription, e)
+                end = perf_counter()
+                handler_time[owner] += end - start
+                if recorder is not None:
+                    recorder.complete(event_type, "plugin", start, end,
+                                      {'plugin': getattr(owner, "name", None)})
+
+    def _invoke(self, subscription, payload):
+        start = time.perf_counter()
+        try:
+            subscription.handler(payload)
+        except Exception as e:
+            self._report_error(subscription, e)
+        finally:
+            if subscription.active:
+                self.handler_time[subscription.owner] += time.perf_counter() - start
+
+    def _report_error(self, subscription, error):
+        owner_name = getattr(subscription.owner, "name", "未知")
+        logger.error(f"插件 {owner_name} 处理事件 {subscription.event_type} 时出错: {error}",
+                     extra={'plugin': owner_name, 'event': subscription.event_type})
+
+    def _run_in_worker(self, subscription, payload):
+        if self._executor is None:
+            self._executor = DaemonThreadPoolExecutor(max_workers=1, thread_name_prefix="plugin-events")
+        # 同一工作线程顺序执行，保证事件顺序
+        self._executor.submit(self._invoke, subscription, payload)
+
+    # ---- asyncio 集成 ----
+
+    def _run_async(self, subscription, payload):
+        loop = self._ensure_async_loop()
+
+        async def runner():
+            start = time.perf_counter()
+            try:
+                await subscription.handler(payload)
+            except Exception as e:
+                self._report_error(subscription, e)
+            finally:
+                if subscription.active:
+                    self.handler_time[subscription.owner] += time.perf_counter() - start
+
+        task = loop.create_task(runner())
+        self._async_tasks[subscription.owner].add(task)
+        task.add_done_callback(lambda done, owner=subscription.owner: self._forget_task(owner, done))
+
+    def _forget_task(self, owner, task):
+        tasks = self._async_tasks.get(owner)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._async_tasks[owner]
+
+    def _ensure_async_loop(self):
+        if self._async_loop is None:
+            self._async_timer = QTimer(self)
+            self._async_timer.setSingleShot(True)
+            self._async_timer.timeout.connect(self._step_async_loop)
+            # 其他线程中的 call_soon_threadsafe 经排队连接回到GUI线程
+            self._async_wakeup.connect(self._schedule_async_step)
+            self._async_loop = _WakeupEventLoop(self._async_wakeup.emit)
+        return self._async_loop
+
+    def _schedule_async_step(self, delay):
+        if self._async_stepping:
+            # 推进结束后统一安排
+            self._async_next = delay if self._async_next is None else min(self._async_next, delay)
+            return
+        if self._async_timer is None:
+            return
+        interval = int(min(delay, 1.0) * 1000)
+        if not self._async_timer.isActive() or self._async_timer.remainingTime() > interval:
+            self._async_timer.start(interval)
+
+    def _step_async_loop(self):
+        """在Qt事件循环中推进一次asyncio循环，按推进期间请求的唤醒安排下一次"""
+        loop = self._async_loop
+        if loop is None or loop.is_closed():
+            return
+        self._async_stepping = True
+        self._async_next = None
+        try:
+            # run_forever 之前调用 stop：以零超时轮询一次选择器，执行已就绪的回调后返回
+            loop.stop()
+            loop.run_forever()
+        finally:
+            self._async_stepping = False
+
+        if self._async_next is not None:
+            self._schedule_async_step(self._async_next)
+        elif asyncio.all_tasks(loop):
+            # 任务都在等待IO，轮询选择器
+            self._async_timer.start(ASYNC_IO_POLL_MS)
+
+    def shutdown(self):
+        """停止工作线程和 asyncio 循环"""
+        self._queue.clear()
+        self._queued_by_type.clear()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._async_loop:
+            self._async_timer.stop()
+            for task in asyncio.all_tasks(self._async_loop):
+                task.cancel()
+            self._async_loop.stop()
+            self._async_loop.run_forever()
+            self._async_loop.close()
+            self._async_loop = None
+            self._async_timer.stop()
@@ -0,0 +1,158 @@
+import time
+
+import numpy as np
+from PyQt5.QtCore import Qt, QSize, QRect
+from PyQt5.QtGui import QImage, QPainter, QColor
+
+from Utils.LogService import get_logger
+
+logger = get_logger("frame_tap")
+
+# Rec.709 亮度系数
+LUMA_WEIGHTS = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+class TapSubscription:
+    """一条帧订阅"""
+    __slots__ = ("callback", "interval", "next_due", "owner", "active")
+
+    def __init__(self, callback, interval, owner):
+        self.callback = callback
+        self.interval = interval
+        self.next_due = 0.0
+        self.owner = owner
+        self.active = True
+
+
+class FrameTap:
+    """
+    视频帧分发
+
+    宿主每显示一帧调用 offer()；到期的订阅者收到缩小后的RGB帧，
+    类型为只读 numpy 数组 (高, 宽, 3)，直接指向共享缓冲区，不为每个插件复制。
+    数组内容在下一次分发时会被覆盖，需要保留时请自行 copy()。
+    没有订阅者时 offer() 立即返回，不做任何缩放。
+    """
+
+    def __init__(self, size=QSize(160, 90)):
+        self.size = QSize(size)
+        self._image = QImage(self.size, QImage.Format_RGB888)
+        self._image.fill(QColor(0, 0, 0))
+        self._array = self._wrap(self._image)
+        self._subscriptions = ()
+        self.frames_tapped = 0
+
+    @staticmethod
+    def _wrap(image):
+        """把 QImage 的像素内存包装为只读 numpy 视图（考虑行对齐）"""
+        pointer = image.bits()
+        pointer.setsize(image.byteCount())
+        array = np.ndarray(shape=(image.height(), image.width(), 3), dtype=np.uint8,
+                           buffer=pointer, strides=(image.bytesPerLine(), 3, 1))
+        array.flags.writeable = False
+        return array
+
+    @property
+    def active(self):
+        return bool(self._subscriptions)
+
+    def subscribe(self, callback, fps=2.0, owner=None):
+        """
+        订阅视频帧
+
+        Args:
+            callback (callable): callback(frame)，frame 为只读的 (高, 宽, 3) uint8 数组，在GUI线程调用
+            fps (float): 期望的最高接收频率
+            owner: 所属插件，插件禁用时暂停分发
+
+        Returns:
+            TapSubscription: 可用于 unsubscribe
+        """
+        subscription = TapSubscription(callback, 1.0 / max(0.01, fps), owner)
+        self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.active = False
+        self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def unsubscribe_owner(self, owner):
+        for subscription in self._subscriptions:
+            if subscription.owner is owner:
+                subscription.active = False
+        self._subscriptions = tuple(s for s in self._subscriptions if s.owner is not owner)
+
+    def offer(self, image):
+        """宿主提供一帧（QImage），只有存在到期订阅时才缩放并分发"""
+        if not self._subscriptions:
+            return
+        now = time.monotonic()
+        due = [s for s in self._subscriptions
+               if s.active and now >= s.next_due and (s.owner is None or s.owner.enabled)]
+        if not due:
+            return
+
+        # 直接绘制到共享缓冲区，numpy 视图随之更新
+        painter = QPainter(self._image)
+        painter.drawImage(QRect(0, 0, self.size.width(), self.size.height()), image)
+        painter.end()
+        self.frames_tapped += 1
+
+        for subscription in due:
+            subscription.next_due = now + subscription.interval
+            try:
+                subscription.callback(self._array)
+            except Exception as e:
+                owner_name = getattr(subscription.owner, "name", "未知")
+                logger.error(f"插件 {owner_name} 处理视频帧时出错: {e}", extra={'plugin': owner_name})
+
+
+# ---- 向量化分析工具 ----
+
+def mean_color(frame):
+    """平均颜色 (r, g, b)"""
+    r, g, b = frame.mean(axis=(0, 1))
+    return float(r), float(g), float(b)
+
+
+def luminance(frame):
+    """逐像素亮度（0-255，float32，形状为 (高, 宽)）"""
+    return frame.astype(np.float32) @ LUMA_WEIGHTS
+
+
+def mean_luminance(frame):
+    """平均亮度（0-255）"""
+    return float(np.dot(frame.mean(axis=(0, 1)), LUMA_WEIGHTS))
+
+
+def histogram(frame, bins=16):
+    """
+    各通道直方图
+
+    Returns:
+        numpy.ndarray: 形状为 (3, bins) 的像素计数
+    """
+    quantized = (frame.astype(np.uint16) * bins) >> 8
+    return np.stack([np.bincount(quantized[..., channel].ravel(), minlength=bins)
+                     for channel in range(3)])
+
+
+def dominant_color(frame, levels=8):
+    """
+    主色调：把颜色量化为 levels^3 个区间，取像素最多的区间的平均颜色
+
+    Returns:
+        tuple: (r, g, b)
+    """
+    pixels = frame.reshape(-1, 3)
+    quantized = (pixels.astype(np.uint16) * levels) >> 8
+    keys = (quantized[:, 0] * levels + quantized[:, 1]) * levels + quantized[:, 2]
+    counts = np.bincount(keys, minlength=levels ** 3)
+    selected = pixels[keys == counts.argmax()]
+    r, g, b = selected.mean(axis=0)
+    return float(r), float(g), float(b)
+
+
+def contrast_color(frame, threshold=140):
+    """根据平均亮度返回适合叠加在画面上的文字颜色"""
+    return QColor(Qt.black) if mean_luminance(frame) > threshold else QColor(Qt.white)
@@ -0,0 +1,327 @@
+import time
+import random
+import itertools
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from Utils.LogService import get_logger
+from Utils.ThreadPool import DaemonThreadPoolExecutor
+
+logger = get_logger("http")
+
+
+class HttpBackoffError(Exception):
+    """目标主机近期连续失败，处于退避期内"""
+    pass
+
+
+class HttpResponse:
+    """HTTP响应（已完整读取）"""
+    __slots__ = ("status_code", "headers", "content", "url", "from_cache", "stale")
+
+    def __init__(self, status_code, headers, content, url, from_cache=False, stale=False):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.from_cache = from_cache
+        self.stale = stale
+
+    @property
+    def ok(self):
+        return 200 <= self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        import json
+        return json.loads(self.content)
+
+
+class _CacheEntry:
+    __slots__ = ("status_code", "headers", "content", "url", "etag", "last_modified", "expires")
+
+    def __init__(self, status_code, headers, content, url, expires):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.expires = expires
+
+    def to_response(self, stale=False):
+        return HttpResponse(self.status_code, self.headers, self.content, self.url, from_cache=True, stale=stale)
+
+
+def _parse_cache_control(headers):
+    """
+    解析 Cache-Control
+
+    Returns:
+        tuple: (是否允许存储, max-age秒数或None)
+    """
+    value = headers.get("Cache-Control", "")
+    store, max_age = True, None
+    for directive in value.lower().split(","):
+        directive = directive.strip()
+        if directive == "no-store":
+            store = False
+        elif directive == "no-cache":
+            max_age = 0
+        elif directive.startswith("max-age="):
+            try:
+                max_age = int(directive[8:])
+            except ValueError:
+                pass
+    return store, max_age
+
+
+class HttpService(QObject):
+    """
+    插件共享的HTTP客户端
+
+    - 连接池复用的 requests.Session，请求在后台线程执行，结果在GUI线程回调
+    - 响应按TTL/ETag缓存，过期后带 If-None-Match / If-Modified-Since 重新验证，缓存有内存上限
+    - 相同的并发请求只发送一次
+    - 主机连续失败时指数退避，退避期间优先返回过期缓存
+    - 请求可指定所属插件（owner）：插件被禁用时不回调，卸载时 cancel_owner() 丢弃其全部回调
+    """
+    _completed = pyqtSignal(object, object, object)  # key, result, error
+
+    def __init__(self, max_workers=4, max_cache_bytes=16 * 1024 * 1024, default_ttl=60,
+                 backoff_base=2.0, backoff_max=300.0, parent=None):
+        super().__init__(parent)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "LiangYuPaper"
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = DaemonThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="http")
+
+        self.max_cache_bytes = max_cache_bytes
+        self.default_ttl = default_ttl
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight = {}
+        self._backoff = {}  # host -> [连续失败次数, 下次允许请求的时间]
+        self._deferred = {}  # 序号 -> (owner, 回调, 参数)，缓存命中等在下一次事件循环中执行的回调
+        self._deferred_ids = itertools.count()
+        self.counters = {
+            'requests': 0,
+            'network_requests': 0,
+            'cache_hits': 0,
+            'revalidated': 0,
+            'merged': 0,
+            'failures': 0,
+            'backoff_rejected': 0,
+        }
+        self._completed.connect(self._on_completed)
+
+    def get(self, url, callback=None, errback=None, params=None, headers=None, ttl=None, timeout=10, owner=None):
+        """
+        发起非阻塞GET请求
+
+        Args:
+            url (str): 请求地址
+            callback (callable): 成功回调 callback(HttpResponse)，在GUI线程执行
+            errback (callable): 失败回调 errback(Exception)，在GUI线程执行
+            params (dict): 查询参数
+            headers (dict): 额外请求头
+            ttl (float): 缓存有效期（秒），None时依次使用响应的 max-age 和默认值
+            timeout (float): 超时时间（秒）
+            owner: 所属插件，禁用时不回调，卸载时由 cancel_owner() 取消
+        """
+        self.counters['requests'] += 1
+        key = self._make_key(url, params, headers)
+        entry = self._cache.get(key)
+        now = time.monotonic()
+
+        if entry is not None and entry.expires > now:
+            self._cache.move_to_end(key)
+            self.counters['cache_hits'] += 1
+            self._deliver_later(owner, callback, entry.to_response())
+            return
+
+        if key in self._inflight:
+            self.counters['merged'] += 1
+            self._inflight[key]['callbacks'].append((callback, errback, owner))
+            return
+
+        host = urlsplit(url).netloc
+        backoff = self._backoff.get(host)
+        if backoff and backoff[1] > now:
+            self.counters['backoff_rejected'] += 1
+            if entry is not None:
+                self._deliver_later(owner, callback, entry.to_response(stale=True))
+            else:
+                self._deliver_later(owner, errback,
+                                    HttpBackoffError(f"{host} 暂时不可用，{backoff[1] - now:.0f} 秒后重试"))
+            return
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+
+        self._inflight[key] = {'host': host, 'ttl': ttl, 'callbacks': [(callback, errback, owner)],
+                               'url': url, 'params': params, 'headers': request_headers, 'timeout': timeout,
+                               'retried': False}
+        self.counters['network_requests'] += 1
+        self.executor.submit(self._fetch, key, url, params, request_headers, timeout)
+
+    @staticmethod
+    def _make_key(url, params, headers):
+        return (url,
+                tuple(sorted((params or {}).items())),
+                tuple(sorted((headers or {}).items())))
+
+    def _fetch(self, key, url, params, headers, timeout):
+        """后台线程：执行请求，把结果交回GUI线程"""
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+            # 保留大小写不敏感的响应头，服务器返回小写的 etag、cache-control 时同样能识别
+            result = (response.status_code, CaseInsensitiveDict(response.headers), response.content, response.url)
+            self._completed.emit(key, result, None)
+        except Exception as e:
+            self._completed.emit(key, None, e)
+
+    def _on_completed(self, key, result, error):
+        request = self._inflight.pop(key, None)
+        if request is None:
+            return
+        host = request['host']
+        entry = self._cache.get(key)
+
+        if error is None and result[0] >= 500:
+            error = requests.HTTPError(f"服务器错误 {result[0]}")
+
+        if error is not None:
+            self.counters['failures'] += 1
+            failures = self._backoff.get(host, [0, 0.0])[0] + 1
+            delay = min(self.backoff_base * (2 ** (failures - 1)), self.backoff_max)
+            delay *= 1 + random.uniform(0, 0.1)
+            self._backoff[host] = [failures, time.monotonic() + delay]
+            logger.warning(f"HTTP请求失败 {host}（连续 {failures} 次，{delay:.0f} 秒内退避）: {error}",
+                           extra={'event': 'http_failure'})
+            for callback, errback, owner in request['callbacks']:
+                if entry is not None:
+                    self._call(owner, callback, entry.to_response(stale=True))
+                else:
+                    self._call(owner, errback, error)
+            return
+
+        self._backoff.pop(host, None)
+        status_code, headers, content, url = result
+        if status_code == 304 and entry is None:
+            if not request['retried']:
+                # 请求期间缓存条目已被淘汰：去掉条件请求头重新获取完整内容
+                request['retried'] = True
+                request['headers'] = {name: value for name, value in request['headers'].items()
+                                      if name.lower() not in ("if-none-match", "if-modified-since")}
+                self._inflight[key] = request
+                self.counters['network_requests'] += 1
+                self.executor.submit(self._fetch, key, request['url'], request['params'], request['headers'],
+                                     request['timeout'])
+                return
+            error = requests.HTTPError("服务器返回 304，但没有可用的缓存内容")
+            for _, errback, owner in request['callbacks']:
+                self._call(owner, errback, error)
+            return
+        if status_code == 304:
+            self.counters['revalidated'] += 1
+            entry.expires = time.monotonic() + self._resolve_ttl(request['ttl'], headers)
+            self._cache.move_to_end(key)
+            response = entry.to_response()
+        else:
+            response = HttpResponse(status_code, headers, content, url)
+            if status_code == 200:
+                self._store(key, status_code, headers, content, url, request['ttl'])
+
+        for callback, _, owner in request['callbacks']:
+            self._call(owner, callback, response)
+
+    def _resolve_ttl(self, ttl, headers):
+        if ttl is not None:
+            return ttl
+        _, max_age = _parse_cache_control(headers)
+        return self.default_ttl if max_age is None else max_age
+
+    def _store(self, key, status_code, headers, content, url, ttl):
+        store, _ = _parse_cache_control(headers)
+        size = len(content)
+        # 单个响应超过上限的1/4时不缓存，避免挤掉所有其他条目
+        if not store or size > self.max_cache_bytes // 4:
+            return
+        old = self._cache.pop(key, None)
+        if old is not None:
+            self._cache_bytes -= len(old.content)
+        expires = time.monotonic() + self._resolve_ttl(ttl, headers)
+        self._cache[key] = _CacheEntry(status_code, headers, content, url, expires)
+        self._cache_bytes += size
+        while self._cache_bytes > self.max_cache_bytes and self._cache:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted.content)
+
+    def _deliver_later(self, owner, func, value):
+        """缓存命中等情况也通过事件循环异步回调，保证回调时机一致"""
+        if func is not None:
+            deferred_id = next(self._deferred_ids)
+            self._deferred[deferred_id] = (owner, func, value)
+            QTimer.singleShot(0, lambda: self._run_deferred(deferred_id))
+
+    def _run_deferred(self, deferred_id):
+        item = self._deferred.pop(deferred_id, None)
+        if item is not None:  # 已被 cancel_owner() 取消时为 None
+            self._call(*item)
+
+    @staticmethod
+    def _call(owner, func, value):
+        if func is None or (owner is not None and not owner.enabled):
+            return
+        try:
+            func(value)
+        except Exception as e:
+            logger.error(f"HTTP回调执行出错: {e}")
+
+    def cancel_owner(self, owner):
+        """丢弃某个插件的全部回调（插件卸载时调用），请求本身照常完成并写入缓存"""
+        for request in self._inflight.values():
+            request['callbacks'] = [item for item in request['callbacks'] if item[2] is not owner]
+        for deferred_id in [deferred_id for deferred_id, item in self._deferred.items() if item[0] is owner]:
+            del self._deferred[deferred_id]
+
+    def stats(self):
+        result = dict(self.counters)
+        result['cache_entries'] = len(self._cache)
+        result['cache_bytes'] = self._cache_bytes
+        result['inflight'] = len(self._inflight)
+        return result
+
+    def expire(self, url=None):
+        """使缓存立即过期（保留ETag，下一次请求会重新验证），url为None时作用于全部条目"""
+        for key, entry in self._cache.items():
+            if url is None or key[0] == url:
+                entry.expires = 0.0
+
+    def clear_cache(self):
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._inflight.clear()
+        self._deferred.clear()
+        self.session.close()
@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import logging.handlers
+from collections import deque
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPlainTextEdit, QComboBox, QLineEdit,
+                             QPushButton, QCheckBox)
+from PyQt5.QtCore import QTimer, QUrl
+from PyQt5.QtGui import QDesktopServices, QFont
+
+from Utils.AppPaths import get_app_data_dir
+
+LOGGER_ROOT = "liangyu"
+PLUGIN_LOGGER_ROOT = f"{LOGGER_ROOT}.plugins"
+
+# 通过 extra 传入、会写入JSON的结构化字段
+STRUCTURED_FIELDS = ("plugin", "event", "duration_ms")
+
+_listener = None
+_queue_handler = None
+_ring_buffer = None
+
+
+def get_logger(name):
+    """获取子系统日志记录器，例如 get_logger("wallpaper")"""
+    return logging.getLogger(f"{LOGGER_ROOT}.{name}")
+
+
+def get_plugin_logger(plugin_name):
+    """获取插件日志记录器，记录自动带上 plugin 字段"""
+    logger = logging.getLogger(f"{PLUGIN_LOGGER_ROOT}.{plugin_name}")
+    return logging.LoggerAdapter(logger, {'plugin': plugin_name})
+
+
+def record_to_dict(record):
+    """把日志记录转换为可JSON序列化的字典"""
+    data = {
+        'ts': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+        'level': record.levelname,
+        'logger': record.name,
+        'thread': record.threadName,
+        'msg': record.getMessage(),
+    }
+    for field in STRUCTURED_FIELDS:
+        value = getattr(record, field, None)
+        if value is not None:
+            data[field] = value
+    fields = getattr(record, "fields", None)
+    if fields:
+        data.update(fields)
+    if record.exc_info:
+        data['exc'] = logging.Formatter().formatException(record.exc_info)
+    return data
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出为一行JSON"""
+
+    def format(self, record):
+        return json.dumps(record_to_dict(record), ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """控制台输出：时间、级别、来源和结构化字段"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname).1s [%(name)s] %(message)s", "%H:%M:%S")
+
+    def format(self, record):
+        text = super().format(record)
+        extras = [f"{field}={getattr(record, field)}" for field in STRUCTURED_FIELDS
+                  if getattr(record, field, None) is not None]
+        return f"{text} ({', '.join(extras)})" if extras else text
+
+
+class RingBufferHandler(logging.Handler):
+    """在内存中保留最近的日志记录，供托盘中的日志窗口查看"""
+
+    def __init__(self, capacity=2000):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.total = 0
+
+    def emit(self, record):
+        self.records.append(record_to_dict(record))
+        self.total += 1
+
+    def snapshot(self):
+        return list(self.records)
+
+
+class _AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    调用线程只做一次入队，格式化和写入都在后台线程完成
+    （不在调用线程预先格式化消息，日志参数在入队后不应再被修改）
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=logging.INFO, log_dir=None, console=True, max_bytes=2 * 1024 * 1024,
+                  backup_count=5, ring_capacity=2000):
+    """
+    初始化日志管道（重复调用无效）
+
+    所有子系统和插件的日志先进入队列，由后台线程写入按大小轮转的JSON行文件
+    logs/app.jsonl、内存环形缓冲，以及控制台（pythonw 下没有控制台时自动跳过）。
+
+    Returns:
+        RingBufferHandler: 内存环形缓冲
+    """
+    global _listener, _queue_handler, _ring_buffer
+    if _listener is not None:
+        return _ring_buffer
+
+    log_dir = log_dir or get_app_data_dir("logs")
+    handlers = []
+
+    try:
+        file_handler = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, "app.jsonl"), maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    except OSError as e:
+        if sys.stderr is not None:
+            sys.stderr.write(f"无法创建日志文件: {e}\n")
+
+    _ring_buffer = RingBufferHandler(ring_capacity)
+    handlers.append(_ring_buffer)
+
+    if console and sys.stderr is not None:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(ConsoleFormatter())
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger(LOGGER_ROOT)
+    root.setLevel(level)
+    _queue_handler = _AsyncQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _ring_buffer
+
+
+def shutdown_logging():
+    """写完队列中剩余的记录并停止后台线程"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        root = logging.getLogger(LOGGER_ROOT)
+        root.removeHandler(_queue_handler)
+        root.propagate = True
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _queue_handler = None
+
+
+def ring_buffer():
+    return _ring_buffer
+
+
+class LogViewerDialog(QDialog):
+    """查看内存中最近的日志"""
+
+    LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("运行日志")
+        self.resize(900, 500)
+        self._shown_total = -1
+
+        layout = QVBoxLayout(self)
+        filter_layout = QHBoxLayout()
+        self.level_combo = QComboBox()
+        self.level_combo.addItems(self.LEVELS)
+        self.level_combo.setCurrentText("INFO")
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("按内容、来源或插件过滤...")
+        self.follow_check = QCheckBox("自动刷新")
+        self.follow_check.setChecked(True)
+        filter_layout.addWidget(self.level_combo)
+        filter_layout.addWidget(self.search_input)
+        filter_layout.addWidget(self.follow_check)
+        layout.addLayout(filter_layout)
+
+        self.text_view = QPlainTextEdit()
+        self.text_view.setReadOnly(True)
+        self.text_view.setMaximumBlockCount(5000)
+        self.text_view.setFont(QFont("Consolas", 9))
+        layout.addWidget(self.text_view)
+
+        btn_layout = QHBoxLayout()
+        open_dir_btn = QPushButton("打开日志目录")
+        open_dir_btn.clicked.connect(lambda: QDesktopServices.openUrl(QUrl.fromLocalFile(get_app_data_dir("logs"))))
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(open_dir_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.level_combo.currentIndexChanged.connect(lambda: self.refresh(force=True))
+        self.search_input.textChanged.connect(lambda: self.refresh(force=True))
+
+        # 只在窗口可见时轮询
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh(force=True)
+        self.refresh_timer.start(1000)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self, force=False):
+        buffer = ring_buffer()
+        if buffer is None or (not force and (not self.follow_check.isChecked() or buffer.total == self._shown_total)):
+            return
+        self._shown_total = buffer.total
+        min_level = self.LEVELS.index(self.level_combo.currentText())
+        needle = self.search_input.text().strip().lower()
+
+        lines = []
+        for record in buffer.snapshot():
+            if record['level'] in self.LEVELS and self.LEVELS.index(record['level']) < min_level:
+                continue
+            extras = " ".join(f"{key}={value}" for key, value in record.items()
+                              if key not in ('ts', 'level', 'logger', 'thread', 'msg', 'exc'))
+            line = f"{record['ts']} {record['level']:<7} [{record['logger']}] {record['msg']}"
+            if extras:
+                line += f"  {extras}"
+            if record.get('exc'):
+                line += "\n" + record['exc']
+            if needle and needle not in line.lower():
+                continue
+            lines.append(line)
+
+        scrollbar = self.text_view.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.text_view.setPlainText("\n".join(lines))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import bisect
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+from Utils.LogService import get_logger
+from Utils import Tracing
+
+logger = get_logger("loop_monitor")
+
+# 延迟直方图的桶上界（毫秒），最后一个桶收集超过最大上界的样本
+LAG_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, 2500)
+
+
+class LoopMonitor(QObject):
+    """
+    GUI事件循环延迟监视器
+
+    GUI线程上的精确定时器按固定间隔“心跳”，实际触发时间与预期时间之差即事件循环延迟，
+    计入直方图。后台看门狗线程检查心跳：超过 stall_threshold 没有心跳时，
+    通过 sys._current_frames() 抓取GUI线程当前的Python调用栈写入日志，
+    调用栈经过插件目录中的文件时指出对应的插件。每次卡顿只转储一次，恢复后记录总时长。
+    """
+
+    def __init__(self, plugin_manager=None, interval_ms=250, stall_threshold_ms=500, parent=None):
+        super().__init__(parent)
+        self.plugin_manager = plugin_manager
+        self.interval = interval_ms / 1000.0
+        self.stall_threshold = stall_threshold_ms / 1000.0
+        self.gui_thread_id = threading.get_ident()
+
+        self.histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self.samples = 0
+        self.max_lag_ms = 0.0
+        self.stalls = 0
+        self.last_stall = None  # 最近一次卡顿：{'plugin', 'duration_ms', 'stack'}
+
+        self._last_beat = time.monotonic()
+        self._expected = self._last_beat + self.interval
+        self._stall_reported = False
+        self._stop_event = threading.Event()
+        self._watchdog = None
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._beat)
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._expected = self._last_beat + self.interval
+        self.timer.start(int(self.interval * 1000))
+        if self._watchdog is None:
+            self._stop_event.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        """停止监视，并把本次运行的延迟统计写入日志"""
+        self.timer.stop()
+        self._stop_event.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+            stats = self.stats()
+            logger.info(f"事件循环延迟 p50≤{stats['p50_ms']:.0f}ms p99≤{stats['p99_ms']:.0f}ms "
+                        f"最大 {stats['max_ms']:.0f}ms，卡顿 {stats['stalls']} 次",
+                        extra={'event': 'loop_latency', 'fields': stats})
+
+    # ---- GUI线程 ----
+
+    def _beat(self):
+        now = time.monotonic()
+        lag_ms = max(0.0, (now - self._expected) * 1000)
+        self._expected = now + self.interval
+        self.record_lag(lag_ms)
+
+        stalled_for = now - self._last_beat
+        self._last_beat = now
+        if self._stall_reported:
+            self._stall_reported = False
+            logger.warning(f"事件循环卡顿结束，共 {stalled_for * 1000:.0f}ms",
+                           extra={'event': 'loop_stall_end', 'duration_ms': round(stalled_for * 1000, 1)})
+
+    def record_lag(self, lag_ms):
+        """把一次延迟样本计入直方图"""
+        self.histogram[bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+        self.samples += 1
+        if lag_ms > self.max_lag_ms:
+            self.max_lag_ms = lag_ms
+
+    def percentile(self, fraction):
+        """按直方图估算延迟分位数（返回所在桶的上界，毫秒）"""
+        if not self.samples:
+            return 0.0
+        target = fraction * self.samples
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if seen >= target:
+                return float(LAG_BUCKETS_MS[index]) if index < len(LAG_BUCKETS_MS) else self.max_lag_ms
+        return self.max_lag_ms
+
+    def stats(self):
+        histogram = {f"<={bound}ms": count for bound, count in zip(LAG_BUCKETS_MS, self.histogram)}
+        histogram[f">{LAG_BUCKETS_MS[-1]}ms"] = self.histogram[-1]
+        return {
+            'samples': self.samples,
+            'p50_ms': self.percentile(0.5),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_lag_ms, 1),
+            'stalls': self.stalls,
+            'histogram': histogram,
+        }
+
+    # ---- 看门狗线程 ----
+
+    def _watch(self):
+        poll = min(self.interval, self.stall_threshold) / 2
+        while not self._stop_event.wait(poll):
+            stalled_for = time.monotonic() - self._last_beat
+            if stalled_for < self.stall_threshold + self.interval or self._stall_reported:
+                continue
+            self._stall_reported = True
+            self.stalls += 1
+            self.report_stall(stalled_for)
+
+    def report_stall(self, stalled_for):
+        """抓取GUI线程调用栈并写入日志"""
+        frame = sys._current_frames().get(self.gui_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        plugin_name = self.blame_plugin(stack)
+        text = "".join(traceback.format_list(stack))
+        self.last_stall = {'plugin': plugin_name, 'duration_ms': round(stalled_for * 1000, 1), 'stack': text}
+        culprit = f"（插件 {plugin_name}）" if plugin_name else ""
+        logger.warning(f"事件循环已卡顿 {stalled_for * 1000:.0f}ms{culprit}，GUI线程调用栈:\n{text}",
+                       extra={'event': 'loop_stall', 'plugin': plugin_name,
+                              'duration_ms': round(stalled_for * 1000, 1)})
+        Tracing.instant("loop_stall", plugin=plugin_name)
+
+    def blame_plugin(self, stack):
+        """从最内层开始查找位于插件目录中的栈帧，返回插件名"""
+        if self.plugin_manager is None:
+            return None
+        plugin_dir = os.path.normcase(os.path.abspath(self.plugin_manager.plugin_dir)) + os.sep
+        for entry in reversed(stack):
+            filename = os.path.normcase(os.path.abspath(entry.filename))
+            if not filename.startswith(plugin_dir):
+                continue
+            module_name = os.path.splitext(os.path.basename(filename))[0]
+            for plugin in list(self.plugin_manager.plugins):
+                if type(plugin).__module__ == module_name:
+                    return plugin.name
+            return module_name
+        return None
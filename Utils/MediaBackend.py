@@ -0,0 +1,1304 @@
+import os
+import sys
+import time
+import queue
+import ctypes
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QVBoxLayout
+from PyQt5.QtCore import Qt, QObject, QTimer, QSize, QUrl, QSettings, pyqtSignal
+from PyQt5.QtGui import QImage, QColor, QPainter, QGuiApplication
+
+from Utils import Tracing
+from Utils.LogService import get_logger
+
+logger = get_logger("media_backend")
+
+
+class FrameBufferPool:
+    """
+    宿主持有的帧缓冲池（RGB32）
+
+    解码方 acquire() 取得空闲缓冲并写入，通过 frame_sink 交给宿主；
+    宿主显示完一帧后 release() 归还。acquire/release 可在任意线程调用。
+    """
+
+    def __init__(self, size, count=3):
+        self.size = QSize(size)
+        self.images = [QImage(size, QImage.Format_RGB32) for _ in range(count)]
+        for image in self.images:
+            image.fill(QColor(0, 0, 0))
+        self._free = queue.Queue()
+        for image in self.images:
+            self._free.put(image)
+        self.dropped_frames = 0
+
+    def acquire(self, timeout=0.0):
+        """取得一个空闲缓冲，超时返回None（调用方应丢弃这一帧）"""
+        try:
+            if timeout:
+                return self._free.get(timeout=timeout)
+            return self._free.get_nowait()
+        except queue.Empty:
+            self.dropped_frames += 1
+            return None
+
+    def release(self, image):
+        if image is not None:
+            self._free.put(image)
+
+
+class MediaBackend(ABC):
+    """
+    媒体后端基类，所有播放实现必须继承此类
+
+    后端有两种输出方式：
+    - renders_to_window 为 True 时，后端直接渲染到 attach() 传入的窗口
+    - 否则通过 frame_sink(QImage) 回调输出帧，由宿主负责显示
+      （帧对象可能被后端复用，接收方需要长期保存时应自行 copy()）
+    """
+    name = "base"
+    display_name = "未知后端"
+    renders_to_window = False
+    supports_frame_buffers = False
+    supports_seamless_loop = False
+    init_off_gui_thread = False  # 构造时不创建Qt对象，可以在后台线程中创建实例
+    decodes_video = True  # 可以作为视频的解码后端（出现在“解码后端”选项中）；否则只按扩展名选用
+
+    def __init__(self):
+        self.frame_sink = None
+        self.end_callback = None
+        # report_callback(dict)：后端报告播放方式的取舍（目前只有内存循环后端），在GUI线程调用
+        self.report_callback = None
+        self.loop = False
+        self.seamless_loop = False
+
+    def attach(self, window):
+        """绑定显示窗口（仅 renders_to_window 为 True 的后端需要实现）"""
+        pass
+
+    def set_frame_sink(self, sink):
+        """设置帧输出回调 sink(QImage)"""
+        self.frame_sink = sink
+
+    def use_frame_buffers(self, pool):
+        """
+        改为解码到宿主提供的帧缓冲池（仅 supports_frame_buffers 为 True 的后端支持，须在 open 之前调用）
+
+        之后 renders_to_window 为 False，帧通过 frame_sink(image) 输出，image 属于 pool，
+        宿主用完后必须 pool.release(image)。frame_sink 可能在解码线程中调用。
+        """
+        raise NotImplementedError(f"{self.display_name} 不支持解码到帧缓冲")
+
+    @abstractmethod
+    def open(self, path):
+        """打开媒体文件"""
+        pass
+
+    @abstractmethod
+    def play(self):
+        pass
+
+    @abstractmethod
+    def pause(self):
+        pass
+
+    def stop(self):
+        """停止播放（默认等同于暂停）"""
+        self.pause()
+
+    @abstractmethod
+    def seek(self, seconds):
+        """跳转到指定位置（秒）"""
+        pass
+
+    def play_from(self, seconds):
+        """开始播放并跳转到指定位置（媒体打开之前不能跳转的后端需要重写）"""
+        self.play()
+        if seconds > 0:
+            self.seek(seconds)
+
+    def snapshot(self, path, width, height):
+        """
+        把当前显示的画面保存到文件（仅直接渲染到窗口的后端需要实现，帧输出后端的画面由宿主保存）
+
+        Returns:
+            bool: 是否成功
+        """
+        return False
+
+    @abstractmethod
+    def set_loop(self, loop):
+        pass
+
+    def set_seamless_loop(self, seamless):
+        """
+        无缝循环：循环点不关闭重开媒体，没有黑帧和解码器重启（须在 open 之前调用）
+        仅 supports_seamless_loop 为 True 的后端生效，其他后端按普通循环播放
+        """
+        self.seamless_loop = seamless and self.supports_seamless_loop
+
+    def set_rate(self, rate):
+        """设置播放速率（可选实现）"""
+        pass
+
+    def set_decode_scale(self, scale):
+        """设置解码分辨率缩放比例，1.0为原始分辨率（可选实现，不支持运行时调整的后端忽略）"""
+        pass
+
+    def needs_media(self):
+        """播放时是否仍在读取媒体文件（整段画面已保存在内存中的后端返回 False）"""
+        return True
+
+    def position(self):
+        """当前播放位置（秒）"""
+        return self.stats().get('position', 0.0)
+
+    def duration(self):
+        """媒体时长（秒），未知时返回0"""
+        return self.stats().get('duration', 0.0)
+
+    @abstractmethod
+    def stats(self):
+        """
+        返回播放统计
+
+        Returns:
+            dict: 至少包含 backend、position、duration 字段
+        """
+        pass
+
+    @abstractmethod
+    def release(self):
+        """释放所有资源，之后实例不可再使用"""
+        pass
+
+
+class VlcBackend(MediaBackend):
+    """基于 libvlc 的后端，解码后直接渲染到窗口句柄"""
+    name = "vlc"
+    display_name = "VLC"
+    renders_to_window = True
+    supports_frame_buffers = True
+    supports_seamless_loop = True
+    init_off_gui_thread = True
+
+    # 无缝循环时输入模块内部的重复次数；用完后由播放列表的循环模式重新打开
+    INPUT_REPEAT = 65535
+    # play_from 等待媒体开始播放的轮询间隔和上限（毫秒）
+    SEEK_POLL_MS = 20
+    SEEK_TIMEOUT_MS = 5000
+    # 解码缩放比例 -> libavcodec 跳过环路滤波的级别（1 非参考帧，4 所有帧）；
+    # 输出大小由窗口或帧缓冲决定，运行中无法改变，这里降低的是解码本身的计算量
+    SKIP_LOOP_FILTER = ((0.5, 4), (0.75, 1))
+
+    def __init__(self):
+        super().__init__()
+        import vlc
+        self.vlc = vlc
+        with Tracing.span("vlc.Instance"):
+            self.instance = vlc.Instance("--no-xlib")
+        self.media_player = self.instance.media_player_new()
+        self.mlist_player = self.instance.media_list_player_new()
+        self.mlist_player.set_media_player(self.media_player)
+        self.media_list = None
+        self.path = None
+        self.frame_pool = None
+        self.decode_scale = 1.0
+        self._locked = {}
+        self._callbacks = None
+
+        events = self.media_player.event_manager()
+        events.event_attach(vlc.EventType.MediaPlayerEndReached, self._on_end_reached)
+
+    def _on_end_reached(self, event):
+        # VLC事件在其内部线程触发，回调方需自行切换线程
+        if not self.loop and self.end_callback:
+            self.end_callback()
+
+    def attach(self, window):
+        window_id = int(window.winId())
+        if sys.platform == "win32":
+            self.media_player.set_hwnd(window_id)
+        elif sys.platform == "darwin":
+            self.media_player.set_nsobject(window_id)
+        else:
+            self.media_player.set_xwindow(window_id)
+
+    def use_frame_buffers(self, pool):
+        vlc = self.vlc
+        self.frame_pool = pool
+        self.renders_to_window = False
+        # 缓冲池暂时没有空闲缓冲时解码到这里，该帧不显示
+        scratch = ctypes.create_string_buffer(pool.size.width() * pool.size.height() * 4)
+
+        @vlc.CallbackDecorators.VideoLockCb
+        def lock(opaque, planes):
+            image = pool.acquire(timeout=0.1)
+            if image is None:
+                planes[0] = ctypes.addressof(scratch)
+                return None
+            planes[0] = int(image.bits())
+            self._locked[id(image)] = [image, False]
+            return id(image)
+
+        @vlc.CallbackDecorators.VideoUnlockCb
+        def unlock(opaque, picture, planes):
+            entry = self._locked.get(picture) if picture else None
+            if entry is not None:
+                entry[1] = True
+
+        @vlc.CallbackDecorators.VideoDisplayCb
+        def display(opaque, picture):
+            if not picture or picture not in self._locked:
+                return
+            # 字典按加锁顺序排列：比这一帧更早解码完成却没有显示的帧已被VLC丢弃，归还缓冲
+            for key in list(self._locked):
+                if key == picture:
+                    break
+                image, unlocked = self._locked[key]
+                if unlocked:
+                    del self._locked[key]
+                    pool.release(image)
+            entry = self._locked.pop(picture)
+            if self.frame_sink:
+                self.frame_sink(entry[0])
+            else:
+                pool.release(entry[0])
+
+        # 回调对象必须保持引用，否则会被回收
+        self._callbacks = (lock, unlock, display, scratch)
+        self.media_player.video_set_callbacks(lock, unlock, display, None)
+        self.media_player.video_set_format("RV32", pool.size.width(), pool.size.height(), pool.size.width() * 4)
+
+    def open(self, path):
+        self.path = path
+        self._build_media_list()
+
+    def _build_media_list(self):
+        """
+        普通循环由播放列表在循环点关闭并重新打开媒体（黑帧、解复用器和解码器重启）；
+        无缝循环给媒体加 input-repeat，在同一个输入线程内回到开头，解码器和视频输出保持不变
+        """
+        if self.media_list:
+            self.media_list.release()
+        self.media_list = self.instance.media_list_new()
+        media = self.instance.media_new(self.path)
+        if self.loop and self.seamless_loop:
+            media.add_option(f":input-repeat={self.INPUT_REPEAT}")
+        skip = self._skip_loop_filter()
+        if skip:
+            media.add_option(f":avcodec-skiploopfilter={skip}")
+        self.media_list.add_media(media)
+        media.release()
+        self.mlist_player.set_media_list(self.media_list)
+
+    def play(self):
+        self.mlist_player.play()
+
+    def pause(self):
+        self.media_player.set_pause(1)
+
+    def stop(self):
+        self.mlist_player.stop()
+        self.media_player.stop()
+
+    def seek(self, seconds):
+        self.media_player.set_time(int(seconds * 1000))
+
+    def play_from(self, seconds):
+        self.play()
+        if seconds > 0:
+            # 媒体进入播放状态之前 set_time 无效；不在VLC事件回调中调用libvlc，改为在GUI线程轮询
+            self._seek_when_playing(seconds, self.SEEK_TIMEOUT_MS)
+
+    def _seek_when_playing(self, seconds, remaining_ms):
+        if self.media_player is None:
+            return
+        if self.media_player.get_state() == self.vlc.State.Playing:
+            length = self.media_player.get_length() / 1000.0
+            if not length or seconds < length:
+                self.seek(seconds)
+            return
+        if remaining_ms > 0:
+            QTimer.singleShot(self.SEEK_POLL_MS,
+                              lambda: self._seek_when_playing(seconds, remaining_ms - self.SEEK_POLL_MS))
+
+    def snapshot(self, path, width, height):
+        if self.media_player is None or not self.media_player.has_vout():
+            return False
+        return self.media_player.video_take_snapshot(0, path, width, height) == 0
+
+    def set_loop(self, loop):
+        changed = loop != self.loop
+        self.loop = loop
+        mode = self.vlc.PlaybackMode.loop if loop else self.vlc.PlaybackMode.default
+        self.mlist_player.set_playback_mode(mode)
+        if changed and self.seamless_loop and self.path:
+            self._build_media_list()
+
+    def set_rate(self, rate):
+        self.media_player.set_rate(rate)
+
+    def _skip_loop_filter(self):
+        for threshold, level in self.SKIP_LOOP_FILTER:
+            if self.decode_scale <= threshold:
+                return level
+        return 0
+
+    def set_decode_scale(self, scale):
+        """降低画质时跳过 H.264/HEVC 的环路滤波；解码选项只在打开媒体时生效，播放中从当前位置重新打开"""
+        previous = self._skip_loop_filter()
+        self.decode_scale = scale
+        if self._skip_loop_filter() == previous or not self.path:
+            return
+        playing = self.media_player.is_playing()
+        position = max(0, self.media_player.get_time()) / 1000.0
+        self._build_media_list()
+        if playing:
+            self.play_from(position)
+
+    def stats(self):
+        result = {
+            'backend': self.name,
+            'position': max(0, self.media_player.get_time()) / 1000.0,
+            'duration': max(0, self.media_player.get_length()) / 1000.0,
+            'rate': self.media_player.get_rate(),
+            'fps': self.media_player.get_fps(),
+        }
+        media = self.media_player.get_media()
+        if media is not None:
+            media_stats = self.vlc.MediaStats()
+            if media.get_stats(media_stats):
+                result.update({
+                    'decoded_frames': media_stats.decoded_video,
+                    'displayed_frames': media_stats.displayed_pictures,
+                    'lost_frames': media_stats.lost_pictures,
+                    'read_bytes': media_stats.read_bytes,
+                    'demux_bitrate': media_stats.demux_bitrate,
+                })
+        if self.frame_pool:
+            result['pool_dropped_frames'] = self.frame_pool.dropped_frames
+        return result
+
+    def release(self):
+        if self.mlist_player:
+            self.mlist_player.release()
+            self.mlist_player = None
+        if self.media_list:
+            self.media_list.release()
+            self.media_list = None
+        if self.media_player:
+            self.media_player.release()
+            self.media_player = None
+        if self.instance:
+            self.instance.release()
+            self.instance = None
+
+
+class QtMultimediaBackend(MediaBackend):
+    """基于 Qt Multimedia 的后端（Windows 下使用系统解码器）"""
+    name = "qt"
+    display_name = "Qt Multimedia"
+    renders_to_window = True
+
+    def __init__(self):
+        super().__init__()
+        from PyQt5.QtMultimedia import QMediaPlayer, QMediaPlaylist
+        self.QMediaPlaylist = QMediaPlaylist
+        self.player = QMediaPlayer(None, QMediaPlayer.VideoSurface)
+        self.playlist = QMediaPlaylist()
+        self.player.setPlaylist(self.playlist)
+        self.player.mediaStatusChanged.connect(self._on_media_status_changed)
+        self.video_widget = None
+
+    def _on_media_status_changed(self, status):
+        from PyQt5.QtMultimedia import QMediaPlayer
+        if status == QMediaPlayer.EndOfMedia and not self.loop and self.end_callback:
+            self.end_callback()
+        elif status in (QMediaPlayer.BufferedMedia, QMediaPlayer.InvalidMedia) and self.video_widget:
+            self.video_widget.show()
+
+    def attach(self, window):
+        from PyQt5.QtMultimediaWidgets import QVideoWidget
+        self.video_widget = QVideoWidget(window)
+        # 开始出画之前不遮挡宿主窗口（宿主可能正显示上次保存的画面）
+        self.video_widget.hide()
+        self.video_widget.setAspectRatioMode(Qt.IgnoreAspectRatio)
+        layout = window.layout() or QVBoxLayout(window)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.video_widget)
+        self.player.setVideoOutput(self.video_widget)
+
+    def open(self, path):
+        from PyQt5.QtMultimedia import QMediaContent
+        self.playlist.clear()
+        self.playlist.addMedia(QMediaContent(QUrl.fromLocalFile(os.path.abspath(path))))
+        self.playlist.setCurrentIndex(0)
+
+    def play(self):
+        self.player.play()
+
+    def pause(self):
+        self.player.pause()
+
+    def stop(self):
+        self.player.stop()
+
+    def seek(self, seconds):
+        self.player.setPosition(int(seconds * 1000))
+
+    def set_loop(self, loop):
+        self.loop = loop
+        mode = self.QMediaPlaylist.CurrentItemInLoop if loop else self.QMediaPlaylist.CurrentItemOnce
+        self.playlist.setPlaybackMode(mode)
+
+    def set_rate(self, rate):
+        self.player.setPlaybackRate(rate)
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'position': self.player.position() / 1000.0,
+            'duration': self.player.duration() / 1000.0,
+            'rate': self.player.playbackRate(),
+            'state': int(self.player.state()),
+        }
+
+    def release(self):
+        if self.player:
+            self.player.stop()
+            self.player.setVideoOutput(None)
+            self.player.deleteLater()
+            self.player = None
+        if self.video_widget:
+            self.video_widget.deleteLater()
+            self.video_widget = None
+
+
+class NullBackend(MediaBackend):
+    """
+    合成帧后端：不读取也不解码文件，按帧率生成纯色渐变画面
+    用于无界面测试、性能分析，以及没有安装任何解码器的环境
+
+    普通循环模拟播放列表在循环点关闭并重新打开媒体：输出一帧黑帧并停顿 reopen_delay 秒；
+    无缝循环直接从开头继续出帧
+    """
+    name = "null"
+    display_name = "合成帧（无解码）"
+    renders_to_window = False
+    supports_frame_buffers = True
+    supports_seamless_loop = True
+
+    def __init__(self, fps=30, frame_size=QSize(640, 360), duration=10.0, reopen_delay=0.15):
+        super().__init__()
+        self.fps = fps
+        self.base_frame_size = frame_size
+        self.frame = QImage(frame_size, QImage.Format_RGB32)
+        self.frame.fill(QColor(0, 0, 0))
+        self._duration = duration
+        self.reopen_delay = reopen_delay
+        self._rate = 1.0
+        self._position = 0.0
+        self._clock_start = 0.0
+        self._playing = False
+        self._reopening = False
+        self.path = None
+        self.frames_produced = 0
+        self.loops_completed = 0
+        self.frame_pool = None
+
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._produce_frame)
+
+    def use_frame_buffers(self, pool):
+        self.frame_pool = pool
+
+    def open(self, path):
+        self.path = path
+        self._position = 0.0
+
+    def _now(self):
+        return (time.perf_counter() - self._clock_start) * self._rate
+
+    def play(self):
+        self._clock_start = time.perf_counter() - self._position / self._rate
+        self._playing = True
+        self.timer.start(max(1, int(1000 / self.fps)))
+
+    def pause(self):
+        if self._playing and not self._reopening:
+            self._position = self._now()
+        self._playing = False
+        self.timer.stop()
+
+    def stop(self):
+        self.pause()
+        self._position = 0.0
+
+    def seek(self, seconds):
+        self._position = max(0.0, min(seconds, self._duration))
+        if self._playing:
+            self._clock_start = time.perf_counter() - self._position / self._rate
+
+    def set_loop(self, loop):
+        self.loop = loop
+
+    def set_rate(self, rate):
+        position = self._now() if self._playing else self._position
+        self._rate = max(0.01, rate)
+        self.seek(position)
+
+    def set_decode_scale(self, scale):
+        size = self.base_frame_size * scale
+        if size != self.frame.size():
+            self.frame = QImage(size, QImage.Format_RGB32)
+
+    def _produce_frame(self):
+        position = self._now()
+        if position >= self._duration:
+            if not self.loop:
+                self._position = self._duration
+                self._playing = False
+                self.timer.stop()
+                if self.end_callback:
+                    self.end_callback()
+                return
+            self.loops_completed += 1
+            if not self.seamless_loop:
+                self._reopen()
+                return
+            position %= self._duration
+            self._clock_start = time.perf_counter() - position / self._rate
+        self._position = position
+
+        hue = int(position / self._duration * 359)
+        frame = self.frame
+        if self.frame_pool:
+            frame = self.frame_pool.acquire()
+            if frame is None:
+                return
+        frame.fill(QColor.fromHsv(hue, 160, 200))
+        self.frames_produced += 1
+        if self.frame_sink:
+            self.frame_sink(frame)
+        elif self.frame_pool:
+            self.frame_pool.release(frame)
+
+    def _reopen(self):
+        """模拟关闭并重新打开媒体：黑帧，停顿后从头播放"""
+        self.timer.stop()
+        self._position = 0.0
+        self._reopening = True
+        frame = self.frame_pool.acquire() if self.frame_pool else self.frame
+        if frame is not None:
+            frame.fill(QColor(0, 0, 0))
+            if self.frame_sink:
+                self.frame_sink(frame)
+            elif self.frame_pool:
+                self.frame_pool.release(frame)
+        QTimer.singleShot(int(self.reopen_delay * 1000), self._resume_after_reopen)
+
+    def _resume_after_reopen(self):
+        self._reopening = False
+        if self._playing:
+            self.play()
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'position': self._now() if self._playing and not self._reopening else self._position,
+            'duration': self._duration,
+            'rate': self._rate,
+            'fps': self.fps,
+            'frames_produced': self.frames_produced,
+            'loops_completed': self.loops_completed,
+        }
+
+    def release(self):
+        self.timer.stop()
+        self._playing = False
+        self.frame_sink = None
+        self.end_callback = None
+
+
+class ImageBackend(MediaBackend):
+    """
+    静态图片背景：打开时解码一次并缩放到屏幕大小，开始播放时输出一帧，之后不再占用CPU
+    （场景文件的背景为图片时使用，也可以直接选择图片作为壁纸）
+    """
+    name = "image"
+    display_name = "静态图片"
+    renders_to_window = False
+    decodes_video = False
+
+    def __init__(self, frame_size=None):
+        super().__init__()
+        self.frame_size = QSize(frame_size) if frame_size is not None else None
+        self.frame = None
+        self.path = None
+
+    def open(self, path):
+        image = QImage(path)
+        if image.isNull():
+            raise ValueError(f"无法读取图片: {path}")
+        size = self.frame_size or QGuiApplication.primaryScreen().size()
+        self.path = path
+        self.frame = image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation).convertToFormat(
+            QImage.Format_RGB32)
+
+    def play(self):
+        if self.frame is not None and self.frame_sink:
+            self.frame_sink(self.frame)
+
+    def pause(self):
+        pass
+
+    def seek(self, seconds):
+        pass
+
+    def set_loop(self, loop):
+        self.loop = loop
+
+    def needs_media(self):
+        return False
+
+    def stats(self):
+        return {'backend': self.name, 'position': 0.0, 'duration': 0.0}
+
+    def release(self):
+        self.frame = None
+        self.frame_sink = None
+        self.end_callback = None
+
+
+class _FrameRelay(QObject):
+    """把渲染线程产生的帧转交到GUI线程"""
+    frame_ready = pyqtSignal(object)
+
+
+class ProceduralBackend(MediaBackend):
+    """
+    程序化壁纸后端：打开的“媒体”是定义了 shade(t, grid) 的 .py 文件（见 Utils/Procedural.py）
+
+    着色函数在渲染线程中按内部分辨率向量化计算整帧，结果以零复制的 QImage 交给宿主，
+    由宿主放大绘制到屏幕；没有任何视频解码。渲染线程最多领先显示一帧，GUI线程忙时自动降帧。
+    """
+    name = "procedural"
+    display_name = "程序化（NumPy）"
+    renders_to_window = False
+    decodes_video = False
+
+    def __init__(self, fps=30, render_size=QSize(640, 360)):
+        super().__init__()
+        from Utils.Procedural import ProceduralRenderer, load_shader
+        self._renderer_cls = ProceduralRenderer
+        self._load_shader = load_shader
+        self.fps = fps
+        self.base_render_size = QSize(render_size)
+        self.render_size = QSize(render_size)
+        self.renderer = None
+        self.path = None
+        self._rate = 1.0
+        self._position = 0.0
+        self._clock_start = 0.0
+        self._playing = False
+        self._lock = threading.Lock()
+        self._in_flight = threading.Semaphore(1)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.frames_rendered = 0
+        self.render_seconds = 0.0
+
+        self._relay = _FrameRelay()
+        self._relay.frame_ready.connect(self._deliver)
+
+    def open(self, path):
+        self.pause()
+        shade = self._load_shader(path)
+        with self._lock:
+            self.path = path
+            self.renderer = self._renderer_cls(shade, self.render_size.width(), self.render_size.height())
+        self._position = 0.0
+
+    def _now(self):
+        return (time.perf_counter() - self._clock_start) * self._rate
+
+    def play(self):
+        if self._playing or self.renderer is None:
+            return
+        self._clock_start = time.perf_counter() - self._position / self._rate
+        self._playing = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._render_loop, name="procedural-render", daemon=True)
+        self._thread.start()
+
+    def pause(self):
+        if not self._playing:
+            return
+        self._position = self._now()
+        self._playing = False
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def seek(self, seconds):
+        self._position = max(0.0, seconds)
+        if self._playing:
+            self._clock_start = time.perf_counter() - self._position / self._rate
+
+    def set_loop(self, loop):
+        # 程序化画面没有终点，循环设置不影响播放
+        self.loop = loop
+
+    def set_rate(self, rate):
+        position = self._now() if self._playing else self._position
+        self._rate = max(0.01, rate)
+        self.seek(position)
+
+    def set_decode_scale(self, scale):
+        size = self.base_render_size * scale
+        if size == self.render_size:
+            return
+        self.render_size = size
+        with self._lock:
+            if self.renderer is not None:
+                self.renderer.resize(size.width(), size.height())
+
+    def _render_loop(self):
+        interval = 1.0 / self.fps
+        next_frame = time.perf_counter()
+        while not self._stop_event.is_set():
+            # 上一帧还没有被GUI线程取走时不渲染新帧
+            if not self._in_flight.acquire(timeout=0.1):
+                continue
+            start = time.perf_counter()
+            try:
+                with self._lock:
+                    image = self.renderer.render(self._now())
+            except Exception as e:
+                self._in_flight.release()
+                logger.exception(f"着色器 {self.path} 渲染出错，已停止: {e}", extra={'event': 'shader_error'})
+                self._playing = False
+                return
+            self.render_seconds += time.perf_counter() - start
+            self.frames_rendered += 1
+            self._relay.frame_ready.emit(image)
+
+            next_frame += interval
+            delay = next_frame - time.perf_counter()
+            if delay < 0:
+                next_frame = time.perf_counter()
+            elif self._stop_event.wait(delay):
+                break
+
+    def _deliver(self, image):
+        self._in_flight.release()
+        if self.frame_sink:
+            self.frame_sink(image)
+
+    def stats(self):
+        frames = self.frames_rendered
+        return {
+            'backend': self.name,
+            'position': self._now() if self._playing else self._position,
+            'duration': 0.0,
+            'rate': self._rate,
+            'fps': self.fps,
+            'render_size': f"{self.render_size.width()}x{self.render_size.height()}",
+            'frames_rendered': frames,
+            'render_ms_per_frame': self.render_seconds * 1000 / frames if frames else 0.0,
+        }
+
+    def release(self):
+        self.pause()
+        self.frame_sink = None
+        self.end_callback = None
+        try:
+            self._relay.frame_ready.disconnect(self._deliver)
+        except TypeError:
+            pass
+
+
+class _RamLoopRelay(QObject):
+    """把解码线程的帧和播放结束事件转交到GUI线程"""
+    frame_ready = pyqtSignal(object, object)  # 可显示的帧, 采集时的播放位置（未采集时为 None）
+    ended = pyqtSignal()
+
+
+class RamLoopBackend(MediaBackend):
+    """
+    内存循环后端：适合几秒的短循环视频
+
+    第一遍由解码后端（默认 VLC）解码到屏幕大小的帧缓冲，显示的同时把每一帧保存到内存
+    （Utils/RamLoop.py 的 FrameStore，可选 RGB16 或 zlib 压缩）；完整播完一遍后释放解码器，
+    之后由定时器从内存中取帧循环播放，没有解码开销，相邻帧相同时不重新输出。
+    从中间开始播放（续播）、暂停或跳转的那一遍不采集，下一遍从头开始时再采集。
+    时长或预计占用的内存超过上限（设置项 ram_loop/max_seconds、ram_loop/max_mb）时放弃采集，
+    按普通解码继续播放。内存占用和前后的CPU占用通过 report_callback 报告。
+    """
+    name = "ram"
+    display_name = "内存循环（短视频）"
+    renders_to_window = False
+    supports_frame_buffers = True
+    supports_seamless_loop = True
+
+    CAPTURING = "capturing"
+    RAM = "ram"
+    STREAMING = "streaming"
+    # 切换到内存播放后统计CPU占用的最短时长（秒），不足一遍循环时按一遍统计
+    REPORT_SECONDS = 5.0
+    # 按已采集的帧估算总内存占用所需的最少帧数
+    ESTIMATE_MIN_FRAMES = 10
+
+    def __init__(self, decoder=VlcBackend.name, settings=None, frame_size=None):
+        """
+        Args:
+            decoder (str | callable): 第一遍使用的解码后端名称（须支持帧缓冲），或返回解码后端实例的函数
+            settings (QSettings): 读取上限和保存格式的设置，默认为应用设置
+            frame_size (QSize): 保存的帧大小，默认为主屏幕大小（合成模式下为宿主帧缓冲的大小）
+        """
+        super().__init__()
+        from Utils.RamLoop import FrameStore, DEFAULT_STORE_FORMAT, DEFAULT_MAX_SECONDS, DEFAULT_MAX_MB
+        settings = settings or QSettings("VideoWallpaper", "Settings")
+        self.max_seconds = settings.value("ram_loop/max_seconds", DEFAULT_MAX_SECONDS, type=float)
+        self.max_bytes = settings.value("ram_loop/max_mb", DEFAULT_MAX_MB, type=int) * 1024 ** 2
+        self.store = FrameStore(settings.value("ram_loop/format", DEFAULT_STORE_FORMAT))
+        self.decoder_name = decoder
+        self.frame_size = QSize(frame_size) if frame_size is not None else None
+        self.frame_pool = None
+        self.decoder = None
+        self.path = None
+        self.state = self.CAPTURING
+        self._lock = threading.Lock()
+        self._capturing = False
+        self._at_start = True
+        self._capture_origin = None  # (perf_counter, 播放位置)，第一帧到达时确定
+        self._capture_clock = None  # 开始采集时的 (process_time, perf_counter)
+        self._ram_clock = None  # 开始内存播放时的 (process_time, perf_counter)
+        self._rate = 1.0
+        self._position = 0.0
+        self._clock_start = 0.0
+        self._playing = False
+        self._released = False
+        self._shown_entry = -1
+        self.frames_shown = 0
+        self.playback_seconds = 0.0
+        self.decode_cpu_percent = None
+        self.ram_cpu_percent = None
+
+        self._relay = _RamLoopRelay()
+        self._relay.frame_ready.connect(self._on_decoded_frame)
+        self._relay.ended.connect(self._on_pass_end)
+        self.timer = QTimer()
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.timeout.connect(self._show_next)
+        self._create_decoder()
+
+    def _create_decoder(self):
+        decoder = self.decoder_name() if callable(self.decoder_name) else create_backend(self.decoder_name)
+        if not decoder.supports_frame_buffers:
+            decoder.release()
+            raise ValueError(f"{decoder.display_name} 不支持解码到帧缓冲，不能用于内存循环")
+        decoder.end_callback = self._relay.ended.emit
+        self.decoder = decoder
+
+    def _release_decoder(self):
+        if self.decoder is not None:
+            self.decoder.stop()
+            self.decoder.release()
+            self.decoder = None
+
+    def use_frame_buffers(self, pool):
+        self.frame_pool = pool
+        self.frame_size = QSize(pool.size)
+
+    def open(self, path):
+        self.pause()
+        self._stop_capture()
+        if self.decoder is None:
+            self._create_decoder()
+        self.path = path
+        self.state = self.CAPTURING
+        self._at_start = True
+        self._position = 0.0
+        size = self.frame_size or QGuiApplication.primaryScreen().size()
+        pool = FrameBufferPool(size)
+        self.decoder.use_frame_buffers(pool)
+        self.decoder.set_frame_sink(lambda image: self._capture_frame(image, pool))
+        self.decoder.set_seamless_loop(self.seamless_loop)
+        self.decoder.open(path)
+        self.decoder.set_loop(False)  # 一遍结束时由 _on_pass_end 决定切换到内存还是重新解码
+
+    # ---- 播放控制 ----
+
+    def _now(self):
+        return (time.perf_counter() - self._clock_start) * self._rate
+
+    def play(self):
+        if self.state == self.RAM:
+            if not self._playing:
+                self._clock_start = time.perf_counter() - self._position / self._rate
+                self._playing = True
+                self._start_timer()
+            return
+        if self.state == self.CAPTURING and not self.loop:
+            self.state = self.STREAMING  # 不循环的视频只播一遍，没有必要保存
+        if self.state == self.CAPTURING and self._at_start:
+            self._start_capture()
+        self._playing = True
+        self.decoder.play()
+
+    def play_from(self, seconds):
+        if self.state == self.RAM or seconds <= 0:
+            self.seek(seconds)
+            self.play()
+            return
+        self._at_start = False
+        self._playing = True
+        self.decoder.play_from(seconds)
+
+    def pause(self):
+        if self.state == self.RAM:
+            if self._playing:
+                self._position = self._now()
+            self.timer.stop()
+        elif self.decoder is not None:
+            self.decoder.pause()
+            self._stop_capture()
+            self._at_start = False
+        self._playing = False
+
+    def stop(self):
+        self.pause()
+        self._position = 0.0
+        if self.decoder is not None:
+            self.decoder.stop()
+            self._at_start = True
+
+    def seek(self, seconds):
+        if self.state == self.RAM:
+            duration = self.store.duration
+            self._position = max(0.0, seconds % duration if self.loop else min(seconds, duration))
+            if self._playing:
+                self._clock_start = time.perf_counter() - self._position / self._rate
+            return
+        self.decoder.seek(seconds)
+        if seconds > 0:
+            self._stop_capture()
+            self._at_start = False
+
+    def set_loop(self, loop):
+        self.loop = loop
+        if self.state == self.STREAMING and self.decoder.loop and not loop:
+            self.decoder.set_loop(False)
+
+    def set_rate(self, rate):
+        rate = max(0.01, rate)
+        if self.state == self.RAM:
+            position = self._now() if self._playing else self._position
+            self._rate = rate
+            self.seek(position)
+            if self._playing:
+                self._start_timer()
+            return
+        with self._lock:
+            if self._capture_origin is not None:
+                # 采集中改变速率：从当前位置起按新速率换算帧的播放位置
+                now = time.perf_counter()
+                start, offset = self._capture_origin
+                self._capture_origin = (now, offset + (now - start) * self._rate)
+            self._rate = rate
+        self.decoder.set_rate(rate)
+
+    def set_decode_scale(self, scale):
+        # 帧大小在采集时确定；内存播放几乎没有开销，不需要降低分辨率
+        pass
+
+    def needs_media(self):
+        return self.state != self.RAM
+
+    # ---- 采集 ----
+
+    def _start_capture(self):
+        with self._lock:
+            self.store.clear()
+            self._capturing = True
+            self._capture_origin = None
+            self._capture_clock = (time.process_time(), time.perf_counter())
+
+    def _stop_capture(self):
+        with self._lock:
+            self._capturing = False
+            self._capture_origin = None
+            self.store.clear()
+
+    def _capture_frame(self, image, pool):
+        """解码线程：保存一帧并转交GUI线程显示，立即归还解码缓冲"""
+        timestamp = None
+        try:
+            with self._lock:
+                if self._capturing:
+                    now = time.perf_counter()
+                    if self._capture_origin is None:
+                        self._capture_origin = (now, 0.0)
+                    start, offset = self._capture_origin
+                    timestamp = offset + (now - start) * self._rate
+                    shown = self.store.add(image, timestamp)
+                else:
+                    shown = image.copy()
+        finally:
+            pool.release(image)
+        self._relay.frame_ready.emit(shown, timestamp)
+
+    def _on_decoded_frame(self, image, timestamp):
+        if self.state == self.RAM or self._released:
+            return
+        if self.state == self.CAPTURING:
+            self._check_limits(timestamp)
+        self._deliver(image)
+
+    def _check_limits(self, timestamp):
+        """时长或预计内存超过上限时放弃采集（timestamp 为 None 时这一遍没有采集，只检查时长）"""
+        duration = self.decoder.duration()
+        longest = max(duration, timestamp or 0.0)
+        if longest > self.max_seconds:
+            self._give_up({'reason': "too_long", 'duration': round(longest, 1), 'limit': self.max_seconds})
+            return
+        if timestamp is None:
+            return
+        estimated = self.store.memory_bytes
+        if duration and timestamp > 0 and self.store.frames >= self.ESTIMATE_MIN_FRAMES:
+            estimated = max(estimated, self.store.memory_bytes / timestamp * duration)
+        if estimated > self.max_bytes:
+            self._give_up({'reason': "too_large", 'duration': round(duration, 1),
+                           'estimated_mb': round(estimated / 1024 ** 2, 1), 'limit': self.max_bytes / 1024 ** 2})
+
+    def _give_up(self, report):
+        self._stop_capture()
+        self.state = self.STREAMING
+        report.update(mode="streaming", format=self.store.store_format)
+        logger.info(f"{self.path} 超出内存循环的上限，按普通解码播放",
+                    extra={'event': 'ram_loop_skipped', **report})
+        self._report(report)
+
+    def _on_pass_end(self):
+        """解码完一遍（GUI线程）：采集完整时切换到内存播放，否则重新解码下一遍"""
+        if self.state == self.RAM or self.decoder is None or self._released:
+            return
+        if self._capturing and self.store.frames:
+            self._start_ram()
+            return
+        self._stop_capture()
+        if not self.loop or not self._playing:
+            self._playing = False
+            if self.end_callback:
+                self.end_callback()
+            return
+        self.decoder.stop()
+        if self.state == self.STREAMING:
+            self.decoder.set_loop(True)  # 之后由解码后端自己循环
+        self._at_start = True
+        self.play()
+
+    # ---- 内存播放 ----
+
+    def _start_ram(self):
+        with self._lock:
+            self._capturing = False
+        cpu_start, wall_start = self._capture_clock
+        capture_seconds = time.perf_counter() - wall_start
+        self.decode_cpu_percent = (time.process_time() - cpu_start) / max(1e-6, capture_seconds) * 100
+        store = self.store
+        store.finish(store.timestamps[-1] + store.frame_interval())
+        self._release_decoder()
+        self.state = self.RAM
+        self._position = 0.0
+        self._shown_entry = -1
+        self._playing = False
+        self.play()
+        self._ram_clock = (time.process_time(), time.perf_counter())
+        QTimer.singleShot(int(max(self.REPORT_SECONDS, store.duration) * 1000), self._report_ram)
+        logger.info(f"已切换到内存循环: {store.frames} 帧（{store.stored_frames} 帧不重复），"
+                    f"{store.memory_bytes / 1024 ** 2:.1f} MB",
+                    extra={'event': 'ram_loop_ready', 'frames': store.frames,
+                           'memory_mb': round(store.memory_bytes / 1024 ** 2, 1),
+                           'duration_ms': round(capture_seconds * 1000, 1)})
+
+    def _start_timer(self):
+        self.timer.start(max(1, int(self.store.frame_interval() * 1000 / self._rate)))
+
+    def _show_next(self):
+        start = time.perf_counter()
+        store = self.store
+        position = self._now()
+        if position >= store.duration:
+            if not self.loop:
+                self._position = store.duration
+                self._playing = False
+                self.timer.stop()
+                if self.end_callback:
+                    self.end_callback()
+                return
+            position %= store.duration
+            self._clock_start = start - position / self._rate
+        entry = store.frame_entries[store.index_at(position)]
+        if entry != self._shown_entry:
+            # 与正在显示的帧相同时不输出，静止的片段不触发重绘
+            self._shown_entry = entry
+            self.frames_shown += 1
+            self._deliver(store.image(entry))
+        self.playback_seconds += time.perf_counter() - start
+
+    def _deliver(self, image):
+        if self.frame_sink is None:
+            return
+        if self.frame_pool is None:
+            self.frame_sink(image)
+            return
+        # 宿主的帧缓冲会被混合插件图层，复制一份再交出
+        target = self.frame_pool.acquire()
+        if target is None:
+            return
+        if target.size() == image.size() and target.format() == image.format():
+            ctypes.memmove(int(target.bits()), int(image.constBits()), image.sizeInBytes())
+        else:
+            painter = QPainter(target)
+            painter.drawImage(target.rect(), image)
+            painter.end()
+        self.frame_sink(target)
+
+    def _report_ram(self):
+        if self.state != self.RAM or self._released:
+            return
+        cpu_start, wall_start = self._ram_clock
+        self.ram_cpu_percent = (time.process_time() - cpu_start) / max(1e-6, time.perf_counter() - wall_start) * 100
+        store = self.store
+        report = {
+            'mode': "ram",
+            'frames': store.frames,
+            'stored_frames': store.stored_frames,
+            'frame_size': f"{store.frame_size.width()}x{store.frame_size.height()}",
+            'format': store.store_format,
+            'memory_mb': round(store.memory_bytes / 1024 ** 2, 1),
+            'duration': round(store.duration, 2),
+            'decode_cpu_percent': round(self.decode_cpu_percent, 1),
+            'ram_cpu_percent': round(self.ram_cpu_percent, 1),
+        }
+        logger.info(f"内存循环: 进程CPU {report['decode_cpu_percent']}% → {report['ram_cpu_percent']}%，"
+                    f"内存 {report['memory_mb']} MB", extra={'event': 'ram_loop_report', **report})
+        self._report(report)
+
+    def _report(self, report):
+        if self.report_callback is None:
+            return
+        try:
+            self.report_callback(report)
+        except Exception as e:
+            logger.error(f"保存内存循环结果时出错: {e}")
+
+    def stats(self):
+        store = self.store
+        if self.state == self.RAM:
+            frames = self.frames_shown
+            result = {
+                'backend': self.name,
+                'position': self._now() % store.duration if self._playing else self._position,
+                'duration': store.duration,
+                'rate': self._rate,
+                'fps': 1.0 / store.frame_interval(),
+                'frames_shown': frames,
+                'playback_ms_per_frame': self.playback_seconds * 1000 / frames if frames else 0.0,
+                'decode_cpu_percent': self.decode_cpu_percent,
+                'ram_cpu_percent': self.ram_cpu_percent,
+            }
+        else:
+            result = dict(self.decoder.stats()) if self.decoder is not None else {'position': 0.0, 'duration': 0.0}
+            result['backend'] = self.name
+            result['decoder'] = getattr(self.decoder, "name", None)
+        result.update({
+            'ram_state': self.state,
+            'store_format': store.store_format,
+            'stored_frames': store.stored_frames,
+            'memory_bytes': store.memory_bytes,
+        })
+        return result
+
+    def release(self):
+        self._released = True
+        self.timer.stop()
+        self._playing = False
+        self._release_decoder()
+        self._stop_capture()
+        self.frame_sink = None
+        self.end_callback = None
+        self.report_callback = None
+        try:
+            self._relay.frame_ready.disconnect(self._on_decoded_frame)
+            self._relay.ended.disconnect(self._on_pass_end)
+        except TypeError:
+            pass
+
+
+BACKENDS = OrderedDict([
+    (VlcBackend.name, VlcBackend),
+    (QtMultimediaBackend.name, QtMultimediaBackend),
+    (NullBackend.name, NullBackend),
+    (ProceduralBackend.name, ProceduralBackend),
+    (RamLoopBackend.name, RamLoopBackend),
+    (ImageBackend.name, ImageBackend),
+])
+DEFAULT_BACKEND = VlcBackend.name
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".gif")
+
+
+def video_backend_key(video_path):
+    """单个视频的后端设置键（对路径做哈希，避免路径字符影响设置键）"""
+    normalized = os.path.normcase(os.path.abspath(video_path)).encode("utf-8")
+    return f"video_backends/{hashlib.sha1(normalized).hexdigest()[:16]}"
+
+
+def resolve_backend_name(settings, video_path, override=None):
+    """
+    确定视频使用的后端
+
+    优先级：显式指定 > .py 文件使用程序化后端、图片使用静态图片后端 > 视频单独设置 > 本机设置 > 默认后端
+    （设置中保存的只按扩展名选用的后端会被忽略）
+
+    Args:
+        settings (QSettings): 应用设置
+        video_path (str): 视频路径
+        override (str): 命令行等显式指定的后端名
+
+    Returns:
+        str: 后端名称
+    """
+    extension = os.path.splitext(video_path or "")[1].lower()
+    for name in (override,
+                 ProceduralBackend.name if extension == ".py" else "",
+                 ImageBackend.name if extension in IMAGE_EXTENSIONS else ""):
+        if name and name in BACKENDS:
+            return name
+    for name in (settings.value(video_backend_key(video_path), "") if video_path else "",
+                 settings.value("media_backend", "")):
+        if name in BACKENDS and BACKENDS[name].decodes_video:
+            return name
+    return DEFAULT_BACKEND
+
+
+def create_backend(name):
+    """
+    根据名称创建后端实例
+
+    Raises:
+        ValueError: 后端名称未知
+    """
+    backend_cls = BACKENDS.get(name)
+    if backend_cls is None:
+        raise ValueError(f"未知的媒体后端: {name}")
+    return backend_cls()
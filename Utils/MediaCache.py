@@ -0,0 +1,295 @@
+import os
+import sys
+import json
+import time
+import ctypes
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from Utils.AppPaths import get_app_data_dir
+from Utils.LogService import get_logger
+from Utils import Metrics
+
+logger = get_logger("media_cache")
+
+COPY_CHUNK = 1024 * 1024
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+# Windows GetDriveTypeW 返回值
+DRIVE_REMOVABLE = 2
+DRIVE_REMOTE = 4
+
+# 视为慢速存储的文件系统类型（Linux /proc/mounts）
+SLOW_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smbfs", "smb3", "sshfs", "fuse.sshfs", "fuse.rclone", "9p", "davfs"}
+
+
+def is_slow_source(path):
+    """判断文件是否位于网络共享或可移动存储上"""
+    path = os.path.abspath(path)
+    if sys.platform == "win32":
+        if path.startswith("\\\\"):
+            return True
+        drive = os.path.splitdrive(path)[0]
+        if not drive:
+            return False
+        return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") in (DRIVE_REMOVABLE, DRIVE_REMOTE)
+
+    best_mount, best_type = "", ""
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point, fs_type = fields[1], fields[2]
+                if path.startswith(mount_point.rstrip("/") + "/") and len(mount_point) > len(best_mount):
+                    best_mount, best_type = mount_point, fs_type
+    except OSError:
+        return False
+    return best_type in SLOW_FILESYSTEMS or best_mount.startswith(("/media/", "/run/media/"))
+
+
+def _hash_file(path, stopping=None):
+    """计算 SHA-256；stopping（threading.Event）被设置时抛出 InterruptedError，退出时不必等整个文件读完"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            if stopping is not None and stopping.is_set():
+                raise InterruptedError("程序退出，校验已取消")
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCache(QObject):
+    """
+    网络共享和可移动存储上视频的本地缓存
+
+    resolve() 命中时直接返回本地副本；未命中时返回原路径，并在后台线程把源文件复制到缓存目录
+    （复制时计算 SHA-256，写完后回读校验），完成后发出 ready(源路径, 本地路径)，播放器随即切换到本地副本。
+    源文件大小或修改时间变化时缓存失效；源文件暂时不可访问（共享断开、U盘拔出）时继续使用已有副本。
+    总大小超过上限时按最近使用时间淘汰，正在播放的副本不会被淘汰。
+    每个副本在本次运行中第一次命中时在后台重新校验一次，校验失败的副本被丢弃。
+    """
+    ready = pyqtSignal(str, str)  # 源路径, 本地副本路径
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, slow_source=is_slow_source, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir or get_app_data_dir("media_cache")
+        self.max_bytes = max_bytes
+        self.slow_source = slow_source
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="media-cache")
+        self._filling = set()
+        self._verified = set()
+        self._pinned = set()
+        self._stopping = threading.Event()
+        self.entries = self._load_index()
+        self._remove_orphans()
+
+        self.hits = Metrics.counter("media_cache.hits", "从本地副本开始播放的次数")
+        self.misses = Metrics.counter("media_cache.misses", "慢速存储上的视频未命中缓存的次数")
+        self.bytes_saved = Metrics.counter("media_cache.bytes_saved", "命中缓存而无需从源读取的字节数")
+        self.bytes_filled = Metrics.counter("media_cache.bytes_filled", "复制到缓存的字节数")
+        self.corrupt = Metrics.counter("media_cache.corrupt", "校验失败而丢弃的副本数")
+        self.size_gauge = Metrics.gauge("media_cache.size_bytes", "缓存目录中副本的总大小")
+        self.size_gauge.set(self.total_bytes())
+
+    # ---- 索引 ----
+
+    @staticmethod
+    def _key(source):
+        return hashlib.sha1(os.path.normcase(os.path.abspath(source)).encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # 丢弃副本已不存在或大小不符的条目
+        return {key: entry for key, entry in entries.items()
+                if os.path.isfile(self._local_path(entry))
+                and os.path.getsize(self._local_path(entry)) == entry['size']}
+
+    def _remove_orphans(self):
+        """删除索引之外的文件（未完成的复制、上次无法删除的副本）"""
+        referenced = {entry['file'] for entry in self.entries.values()} | {"index.json"}
+        for filename in os.listdir(self.cache_dir):
+            if filename not in referenced:
+                try:
+                    os.remove(os.path.join(self.cache_dir, filename))
+                except OSError:
+                    pass
+
+    def _save_index(self):
+        """写入索引（调用方持有锁）"""
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.index_path)
+        self.size_gauge.set(sum(entry['size'] for entry in self.entries.values()))
+
+    def _local_path(self, entry):
+        return os.path.join(self.cache_dir, entry['file'])
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry['size'] for entry in self.entries.values())
+
+    # ---- 查询 ----
+
+    def resolve(self, source):
+        """
+        返回应当播放的路径：命中时为本地副本，否则为源路径（慢速存储上的源会开始后台缓存）
+        """
+        key = self._key(source)
+        try:
+            stat = os.stat(source)
+        except OSError:
+            stat = None
+
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and stat is not None and (
+                    entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime):
+                logger.info(f"源文件已变化，缓存失效: {source}", extra={'event': 'media_cache_stale'})
+                self._remove_entry(key)
+                entry = None
+            if entry is not None:
+                entry['last_used'] = time.time()
+                self._pinned = {key}
+                local_path = self._local_path(entry)
+
+        if entry is not None:
+            self.hits.inc()
+            self.bytes_saved.inc(entry['size'])
+            if key not in self._verified:
+                self._verified.add(key)
+                self._executor.submit(self._verify, key)
+            return local_path
+
+        if stat is None or not self.slow_source(source):
+            return source
+        self.misses.inc()
+        self.prefetch(source)
+        return source
+
+    def prefetch(self, source):
+        """在后台把源文件复制到缓存（已缓存或正在复制时忽略）"""
+        key = self._key(source)
+        with self._lock:
+            if key in self.entries or key in self._filling:
+                return
+            self._filling.add(key)
+            self._pinned = {key}
+        self._executor.submit(self._fill, source, key)
+
+    # ---- 后台线程 ----
+
+    def _fill(self, source, key):
+        part_path = os.path.join(self.cache_dir, key + ".part")
+        try:
+            stat = os.stat(source)
+            if stat.st_size > self.max_bytes:
+                logger.info(f"视频大于缓存上限，不缓存: {source}")
+                return
+            self._evict(stat.st_size)
+
+            start = time.perf_counter()
+            digest = hashlib.sha256()
+            with open(source, "rb") as src, open(part_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(COPY_CHUNK), b""):
+                    if self._stopping.is_set():
+                        raise InterruptedError("程序退出，复制已取消")
+                    digest.update(chunk)
+                    dst.write(chunk)
+            checksum = digest.hexdigest()
+
+            # 复制期间源文件被修改，或者写入的数据回读不一致，都放弃这次缓存
+            after = os.stat(source)
+            if (after.st_size, after.st_mtime) != (stat.st_size, stat.st_mtime):
+                raise OSError("复制期间源文件发生变化")
+            if os.path.getsize(part_path) != stat.st_size or _hash_file(part_path, self._stopping) != checksum:
+                raise OSError("副本校验失败")
+
+            entry = {'source': source, 'file': key + os.path.splitext(source)[1].lower(),
+                     'size': stat.st_size, 'mtime': stat.st_mtime, 'sha256': checksum, 'last_used': time.time()}
+            os.replace(part_path, self._local_path(entry))
+            with self._lock:
+                self.entries[key] = entry
+                self._verified.add(key)
+                self._save_index()
+            self.bytes_filled.inc(stat.st_size)
+            duration = time.perf_counter() - start
+            logger.info(f"已缓存 {source}（{stat.st_size / 1024 ** 2:.1f}MB）",
+                        extra={'event': 'media_cache_filled', 'duration_ms': round(duration * 1000, 1)})
+            self.ready.emit(source, self._local_path(entry))
+        except OSError as e:
+            logger.warning(f"缓存视频失败 {source}: {e}", extra={'event': 'media_cache_fill_failed'})
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+        finally:
+            with self._lock:
+                self._filling.discard(key)
+
+    def _verify(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None or self._stopping.is_set():
+            return
+        try:
+            valid = _hash_file(self._local_path(entry), self._stopping) == entry['sha256']
+        except InterruptedError:
+            return  # 退出时中断，不代表副本损坏
+        except OSError:
+            valid = False
+        if not valid:
+            self.corrupt.inc()
+            logger.warning(f"缓存副本校验失败，已丢弃: {entry['source']}", extra={'event': 'media_cache_corrupt'})
+            with self._lock:
+                self._remove_entry(key)
+
+    def _evict(self, incoming):
+        """按最近使用时间淘汰，直到可以放下 incoming 字节"""
+        with self._lock:
+            total = sum(entry['size'] for entry in self.entries.values())
+            for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+                if total + incoming <= self.max_bytes:
+                    break
+                if key in self._pinned:
+                    continue
+                total -= entry['size']
+                logger.info(f"淘汰缓存: {entry['source']}", extra={'event': 'media_cache_evict'})
+                self._remove_entry(key)
+
+    def _remove_entry(self, key):
+        """删除条目和副本（调用方持有锁）；副本正被占用无法删除时留待下次启动清理"""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        try:
+            os.remove(self._local_path(entry))
+        except OSError:
+            pass
+        self._save_index()
+
+    def clear(self):
+        with self._lock:
+            for key in list(self.entries):
+                self._remove_entry(key)
+
+    def shutdown(self):
+        """取消未完成的复制和校验（进行中的在下一块数据处中止）并保存最近使用时间"""
+        self._stopping.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            try:
+                self._save_index()
+            except OSError:
+                pass
@@ -0,0 +1,684 @@
+import os
+import sys
+import time
+import shutil
+import ctypes
+import sqlite3
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict, deque
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QListView, QLineEdit,
+                             QPushButton, QLabel, QFileDialog, QComboBox, QMessageBox)
+from PyQt5.QtCore import (Qt, QObject, QThread, QThreadPool, QRunnable, QSize,
+                          QAbstractListModel, QModelIndex, QSortFilterProxyModel, pyqtSignal)
+from PyQt5.QtGui import QImage, QPixmap, QPainter, QColor
+
+from Utils.AppPaths import get_app_data_dir
+from Utils.LogService import get_logger
+
+logger = get_logger("media_library")
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov", ".wmv", ".webm", ".m4v", ".flv")
+
+THUMB_SIZE = QSize(240, 135)
+STRIP_FRAMES = 5
+STRIP_FRAME_SIZE = QSize(160, 90)
+
+
+def make_thumb_key(path, size, mtime_ns):
+    """
+    根据文件路径、大小和修改时间生成缩略图缓存键
+
+    Args:
+        path (str): 文件路径
+        size (int): 文件大小
+        mtime_ns (int): 修改时间（纳秒）
+
+    Returns:
+        str: 缓存键，文件变化后键随之变化
+    """
+    raw = f"{os.path.normcase(path)}|{size}|{mtime_ns}".encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:24]
+
+
+class MediaIndex:
+    """
+    媒体库的SQLite持久化索引
+    每个线程需使用独立的实例（sqlite连接不能跨线程共享）
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(get_app_data_dir(), "library.db")
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self):
+        """创建数据表"""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS folders ("
+                "path TEXT PRIMARY KEY, added REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS media ("
+                "id INTEGER PRIMARY KEY, folder TEXT NOT NULL, path TEXT NOT NULL UNIQUE, "
+                "name TEXT NOT NULL, size INTEGER NOT NULL, mtime INTEGER NOT NULL, "
+                "thumb_key TEXT NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_media_folder ON media(folder)")
+
+    def close(self):
+        self.conn.close()
+
+    def folders(self):
+        """返回所有监视的文件夹"""
+        return [row[0] for row in self.conn.execute("SELECT path FROM folders ORDER BY path")]
+
+    def add_folder(self, folder):
+        folder = os.path.abspath(folder)
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO folders(path, added) VALUES (?, ?)",
+                              (folder, time.time()))
+        return folder
+
+    def remove_folder(self, folder):
+        """
+        移除监视的文件夹及其媒体记录
+
+        Returns:
+            list: 被移除媒体的缩略图缓存键
+        """
+        keys = [row[0] for row in self.conn.execute(
+            "SELECT thumb_key FROM media WHERE folder = ?", (folder,))]
+        with self.conn:
+            self.conn.execute("DELETE FROM media WHERE folder = ?", (folder,))
+            self.conn.execute("DELETE FROM folders WHERE path = ?", (folder,))
+        return keys
+
+    def all_media(self, folder=None):
+        """
+        读取媒体记录，按名称排序
+
+        Args:
+            folder (str): 仅返回该文件夹的媒体，None表示全部
+
+        Returns:
+            list: (path, name, size, mtime, thumb_key) 元组列表
+        """
+        if folder:
+            cursor = self.conn.execute(
+                "SELECT path, name, size, mtime, thumb_key FROM media WHERE folder = ? "
+                "ORDER BY name COLLATE NOCASE", (folder,))
+        else:
+            cursor = self.conn.execute(
+                "SELECT path, name, size, mtime, thumb_key FROM media ORDER BY name COLLATE NOCASE")
+        return cursor.fetchall()
+
+    def scan_folder(self, folder, should_stop=None):
+        """
+        增量扫描文件夹：仅根据文件大小和修改时间判断新增、变更和删除
+
+        Args:
+            folder (str): 监视的文件夹
+            should_stop (callable): 返回True时中止扫描
+
+        Returns:
+            dict: 扫描结果，包含 added/updated/removed 数量和失效的缩略图缓存键 stale_keys；
+                  文件夹或其中的子目录无法读取（网络共享断开、U盘拔出）时不修改索引，
+                  只返回带 error 说明的空结果，避免把读取不到的文件当作已删除
+        """
+        known = {}
+        for path, size, mtime, thumb_key in self.conn.execute(
+                "SELECT path, size, mtime, thumb_key FROM media WHERE folder = ?", (folder,)):
+            known[path] = (size, mtime, thumb_key)
+
+        inserts = []
+        updates = []
+        stale_keys = []
+        seen = set()
+        pending_dirs = [folder]
+        while pending_dirs:
+            if should_stop and should_stop():
+                return None
+            current = pending_dirs.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError as e:
+                logger.warning(f"扫描目录 {current} 失败，本次不更新文件夹 {folder}: {e}")
+                return {'added': 0, 'updated': 0, 'removed': 0, 'stale_keys': [], 'error': f"{current}: {e}"}
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending_dirs.append(entry.path)
+                        continue
+                    if not entry.name.lower().endswith(VIDEO_EXTENSIONS):
+                        continue
+                    # Windows下scandir已缓存stat信息，不会额外访问磁盘
+                    stat = entry.stat()
+                except OSError:
+                    continue
+
+                path = entry.path
+                seen.add(path)
+                size, mtime = stat.st_size, stat.st_mtime_ns
+                old = known.get(path)
+                if old is None:
+                    inserts.append((folder, path, entry.name, size, mtime,
+                                    make_thumb_key(path, size, mtime)))
+                elif old[0] != size or old[1] != mtime:
+                    updates.append((size, mtime, make_thumb_key(path, size, mtime), path))
+                    stale_keys.append(old[2])
+
+        removed = [path for path in known if path not in seen]
+        stale_keys.extend(known[path][2] for path in removed)
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO media(folder, path, name, size, mtime, thumb_key) "
+                "VALUES (?, ?, ?, ?, ?, ?)", inserts)
+            self.conn.executemany(
+                "UPDATE media SET size = ?, mtime = ?, thumb_key = ? WHERE path = ?", updates)
+            self.conn.executemany("DELETE FROM media WHERE path = ?", [(p,) for p in removed])
+
+        return {
+            'added': len(inserts),
+            'updated': len(updates),
+            'removed': len(removed),
+            'stale_keys': stale_keys
+        }
+
+
+class ThumbnailCache:
+    """缩略图和预览条的磁盘缓存"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or get_app_data_dir("thumbnails")
+
+    def thumb_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+    def strip_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}_strip.jpg")
+
+    def remove(self, keys):
+        """删除失效的缓存文件"""
+        for key in keys:
+            for path in (self.thumb_path(key), self.strip_path(key)):
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    logger.warning(f"删除缩略图缓存失败 {path}: {e}")
+
+
+def _run_hidden(args, timeout):
+    """运行外部命令（Windows下不弹出控制台窗口）"""
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+    return subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          timeout=timeout, **kwargs)
+
+
+def _probe_duration_ffprobe(ffprobe, path):
+    try:
+        result = _run_hidden([ffprobe, "-v", "error", "-show_entries", "format=duration",
+                              "-of", "default=noprint_wrappers=1:nokey=1", path], timeout=10)
+        return float(result.stdout.strip() or 0)
+    except (subprocess.SubprocessError, ValueError, OSError):
+        return 0.0
+
+
+def _grab_frames_ffmpeg(path, offsets, size):
+    """使用ffmpeg抓取指定时间点的帧，返回QImage列表（失败的位置为None）"""
+    ffmpeg = shutil.which("ffmpeg")
+    frames = []
+    for offset in offsets:
+        args = [ffmpeg, "-v", "error", "-ss", f"{offset:.3f}", "-i", path, "-frames:v", "1",
+                "-vf", f"scale={size.width()}:{size.height()}:force_original_aspect_ratio=decrease",
+                "-f", "image2pipe", "-vcodec", "png", "-"]
+        try:
+            result = _run_hidden(args, timeout=20)
+            image = QImage.fromData(result.stdout, "PNG") if result.stdout else QImage()
+        except (subprocess.SubprocessError, OSError):
+            image = QImage()
+        frames.append(None if image.isNull() else image)
+    return frames
+
+
+def _grab_frames_vlc(path, offsets, size):
+    """未安装ffmpeg时，使用VLC的视频回调在内存中抓取帧"""
+    import vlc
+
+    width, height = size.width(), size.height()
+    buffer = ctypes.create_string_buffer(width * height * 4)
+    frame_event = threading.Event()
+
+    @vlc.CallbackDecorators.VideoLockCb
+    def lock(opaque, planes):
+        planes[0] = ctypes.cast(buffer, ctypes.c_void_p).value
+        return None
+
+    @vlc.CallbackDecorators.VideoUnlockCb
+    def unlock(opaque, picture, planes):
+        pass
+
+    @vlc.CallbackDecorators.VideoDisplayCb
+    def display(opaque, picture):
+        frame_event.set()
+
+    instance = vlc.Instance("--intf=dummy", "--no-audio", "--quiet")
+    player = instance.media_player_new()
+    player.video_set_callbacks(lock, unlock, display, None)
+    player.video_set_format("RV32", width, height, width * 4)
+    frames = []
+    try:
+        for offset in offsets:
+            media = instance.media_new(path)
+            media.add_option(f":start-time={offset:.3f}")
+            player.set_media(media)
+            frame_event.clear()
+            player.play()
+            if frame_event.wait(5.0):
+                frames.append(QImage(buffer.raw, width, height, QImage.Format_RGB32).copy())
+            else:
+                frames.append(None)
+            player.stop()
+            media.release()
+    finally:
+        player.release()
+        instance.release()
+    return frames
+
+
+def generate_thumbnails(path, thumb_file, strip_file):
+    """
+    生成单个视频的缩略图和预览条
+
+    Args:
+        path (str): 视频路径
+        thumb_file (str): 缩略图输出路径
+        strip_file (str): 预览条输出路径
+
+    Returns:
+        bool: 是否成功生成缩略图
+    """
+    ffprobe = shutil.which("ffprobe")
+    duration = _probe_duration_ffprobe(ffprobe, path) if ffprobe else 0.0
+    if duration > 0:
+        offsets = [duration * (i + 0.5) / STRIP_FRAMES for i in range(STRIP_FRAMES)]
+    else:
+        offsets = [float(i * 2) for i in range(STRIP_FRAMES)]
+
+    if shutil.which("ffmpeg"):
+        frames = _grab_frames_ffmpeg(path, offsets, STRIP_FRAME_SIZE)
+    else:
+        frames = _grab_frames_vlc(path, offsets, STRIP_FRAME_SIZE)
+
+    valid = [frame for frame in frames if frame is not None]
+    if not valid:
+        return False
+
+    # 缩略图取中间的帧
+    thumb = valid[len(valid) // 2].scaled(THUMB_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    thumb.save(thumb_file, "JPG", 85)
+
+    strip = QImage(STRIP_FRAME_SIZE.width() * len(valid), STRIP_FRAME_SIZE.height(), QImage.Format_RGB32)
+    strip.fill(QColor(0, 0, 0))
+    painter = QPainter(strip)
+    for i, frame in enumerate(valid):
+        x = i * STRIP_FRAME_SIZE.width() + (STRIP_FRAME_SIZE.width() - frame.width()) // 2
+        y = (STRIP_FRAME_SIZE.height() - frame.height()) // 2
+        painter.drawImage(x, y, frame)
+    painter.end()
+    strip.save(strip_file, "JPG", 80)
+    return True
+
+
+class _ThumbnailTask(QRunnable):
+    """线程池任务：循环处理缩略图队列，直到队列为空"""
+
+    def __init__(self, loader):
+        super().__init__()
+        self.loader = loader
+
+    def run(self):
+        while True:
+            job = self.loader._take_job()
+            if job is None:
+                return
+            key, path = job
+            image = QImage()
+            try:
+                thumb_file = self.loader.cache.thumb_path(key)
+                if not os.path.exists(thumb_file):
+                    generate_thumbnails(path, thumb_file, self.loader.cache.strip_path(key))
+                if os.path.exists(thumb_file):
+                    image = QImage(thumb_file)
+            except Exception as e:
+                logger.warning(f"生成缩略图失败 {path}: {e}")
+            self.loader.thumbnail_ready.emit(key, image)
+
+
+class ThumbnailLoader(QObject):
+    """
+    有界线程池的缩略图加载器
+    最近请求的缩略图优先处理（滚动时优先加载当前可见的行），队列超出上限时丢弃最旧的请求
+    """
+    thumbnail_ready = pyqtSignal(str, QImage)
+
+    def __init__(self, cache, max_workers=None, max_pending=256, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_workers or max(1, min(4, (os.cpu_count() or 2) // 2)))
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._queued = set()
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def request(self, key, path):
+        """请求加载缩略图，结果通过 thumbnail_ready 信号在GUI线程送达"""
+        with self._lock:
+            if key in self._queued:
+                return
+            self._pending.append((key, path))
+            self._queued.add(key)
+            while len(self._pending) > self.max_pending:
+                old_key, _ = self._pending.popleft()
+                self._queued.discard(old_key)
+            if self._active >= self.pool.maxThreadCount():
+                return
+            self._active += 1
+        self.pool.start(_ThumbnailTask(self))
+
+    def _take_job(self):
+        with self._lock:
+            if not self._pending:
+                self._active -= 1
+                return None
+            key, path = self._pending.pop()
+            self._queued.discard(key)
+            return key, path
+
+    def clear_pending(self):
+        with self._lock:
+            self._pending.clear()
+            self._queued.clear()
+
+    def shutdown(self):
+        self.clear_pending()
+        self.pool.waitForDone(3000)
+
+
+class LibraryScanner(QThread):
+    """后台增量扫描线程"""
+    progress_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(dict)
+
+    def __init__(self, db_path, folders, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.folders = list(folders)
+        self._is_running = True
+
+    def run(self):
+        summary = {'added': 0, 'updated': 0, 'removed': 0, 'stale_keys': [], 'errors': []}
+        index = MediaIndex(self.db_path)
+        try:
+            for folder in self.folders:
+                self.progress_signal.emit(f"正在扫描: {folder}")
+                result = index.scan_folder(folder, should_stop=lambda: not self._is_running)
+                if result is None:
+                    break
+                for key in ('added', 'updated', 'removed'):
+                    summary[key] += result[key]
+                summary['stale_keys'].extend(result['stale_keys'])
+                if 'error' in result:
+                    summary['errors'].append(result['error'])
+        except Exception as e:
+            logger.exception(f"扫描媒体库时出错: {e}")
+        finally:
+            index.close()
+        self.finished_signal.emit(summary)
+
+    def stop(self):
+        self._is_running = False
+        self.wait()
+
+
+class MediaLibraryModel(QAbstractListModel):
+    """媒体库列表模型，缩略图在行进入可视区域时才按需加载"""
+    PathRole = Qt.UserRole + 1
+
+    def __init__(self, media_index, loader, max_cached_pixmaps=512, parent=None):
+        super().__init__(parent)
+        self.media_index = media_index
+        self.loader = loader
+        self.rows = []
+        self.key_to_row = {}
+        self.max_cached_pixmaps = max_cached_pixmaps
+        self._pixmaps = OrderedDict()
+        self._failed = set()
+        self._placeholder = QPixmap(THUMB_SIZE)
+        self._placeholder.fill(QColor(40, 40, 40))
+        self.loader.thumbnail_ready.connect(self._on_thumbnail_ready)
+
+    def reload(self, folder=None):
+        """从索引重新读取所有行"""
+        self.beginResetModel()
+        self.rows = self.media_index.all_media(folder)
+        self.key_to_row = {row[4]: i for i, row in enumerate(self.rows)}
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        path, name, size, mtime, thumb_key = self.rows[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.DecorationRole:
+            pixmap = self._pixmaps.get(thumb_key)
+            if pixmap is not None:
+                self._pixmaps.move_to_end(thumb_key)
+                return pixmap
+            if thumb_key not in self._failed:
+                self.loader.request(thumb_key, path)
+            return self._placeholder
+        if role == Qt.ToolTipRole:
+            strip_file = self.loader.cache.strip_path(thumb_key)
+            size_mb = size / (1024 * 1024)
+            if os.path.exists(strip_file):
+                return f"{path}<br>{size_mb:.1f}MB<br><img src='{strip_file}'>"
+            return f"{path}<br>{size_mb:.1f}MB"
+        if role == self.PathRole:
+            return path
+        return None
+
+    def _on_thumbnail_ready(self, key, image):
+        row = self.key_to_row.get(key)
+        if image.isNull():
+            self._failed.add(key)
+        else:
+            self._pixmaps[key] = QPixmap.fromImage(image)
+            while len(self._pixmaps) > self.max_cached_pixmaps:
+                self._pixmaps.popitem(last=False)
+        if row is not None:
+            model_index = self.index_for_row(row)
+            self.dataChanged.emit(model_index, model_index, [Qt.DecorationRole, Qt.ToolTipRole])
+
+    def index_for_row(self, row):
+        return self.createIndex(row, 0)
+
+    def invalidate_keys(self, keys):
+        for key in keys:
+            self._pixmaps.pop(key, None)
+            self._failed.discard(key)
+
+
+class MediaLibraryDialog(QDialog):
+    """媒体库窗口：管理监视文件夹并浏览其中的视频"""
+    video_selected = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("媒体库")
+        self.resize(900, 600)
+
+        self.media_index = MediaIndex()
+        self.cache = ThumbnailCache()
+        self.loader = ThumbnailLoader(self.cache, parent=self)
+        self.model = MediaLibraryModel(self.media_index, self.loader, parent=self)
+        self.proxy_model = QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.proxy_model.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.scanner = None
+
+        self.init_ui()
+        self.refresh_folders()
+        self.model.reload()
+        self.update_status()
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+
+        toolbar_layout = QHBoxLayout()
+        self.folder_combo = QComboBox()
+        self.folder_combo.currentIndexChanged.connect(self.on_folder_changed)
+        self.add_folder_btn = QPushButton("添加文件夹...")
+        self.add_folder_btn.clicked.connect(self.add_folder)
+        self.remove_folder_btn = QPushButton("移除文件夹")
+        self.remove_folder_btn.clicked.connect(self.remove_folder)
+        self.rescan_btn = QPushButton("重新扫描")
+        self.rescan_btn.clicked.connect(lambda: self.rescan())
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索...")
+        self.search_input.textChanged.connect(self.proxy_model.setFilterFixedString)
+        toolbar_layout.addWidget(self.folder_combo, 1)
+        toolbar_layout.addWidget(self.add_folder_btn)
+        toolbar_layout.addWidget(self.remove_folder_btn)
+        toolbar_layout.addWidget(self.rescan_btn)
+        toolbar_layout.addWidget(self.search_input, 1)
+        main_layout.addLayout(toolbar_layout)
+
+        self.list_view = QListView()
+        self.list_view.setViewMode(QListView.IconMode)
+        self.list_view.setResizeMode(QListView.Adjust)
+        self.list_view.setMovement(QListView.Static)
+        self.list_view.setIconSize(THUMB_SIZE)
+        self.list_view.setGridSize(QSize(THUMB_SIZE.width() + 20, THUMB_SIZE.height() + 40))
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setLayoutMode(QListView.Batched)
+        self.list_view.setBatchSize(200)
+        self.list_view.setWordWrap(True)
+        self.list_view.setModel(self.proxy_model)
+        self.list_view.doubleClicked.connect(self.on_item_activated)
+        main_layout.addWidget(self.list_view)
+
+        bottom_layout = QHBoxLayout()
+        self.status_label = QLabel()
+        bottom_layout.addWidget(self.status_label, 1)
+        self.select_btn = QPushButton("使用所选视频")
+        self.select_btn.clicked.connect(lambda: self.on_item_activated(self.list_view.currentIndex()))
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        bottom_layout.addWidget(self.select_btn)
+        bottom_layout.addWidget(close_btn)
+        main_layout.addLayout(bottom_layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # 打开时直接展示已有索引，并在后台增量扫描
+        self.rescan()
+
+    def refresh_folders(self):
+        current = self.folder_combo.currentData()
+        self.folder_combo.blockSignals(True)
+        self.folder_combo.clear()
+        self.folder_combo.addItem("全部文件夹", None)
+        for folder in self.media_index.folders():
+            self.folder_combo.addItem(folder, folder)
+        position = self.folder_combo.findData(current)
+        self.folder_combo.setCurrentIndex(max(0, position))
+        self.folder_combo.blockSignals(False)
+
+    def update_status(self, message=None):
+        text = f"共 {self.model.rowCount()} 个视频"
+        if message:
+            text += f"  |  {message}"
+        self.status_label.setText(text)
+
+    def on_folder_changed(self, _):
+        self.model.reload(self.folder_combo.currentData())
+        self.update_status()
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "选择视频文件夹")
+        if not folder:
+            return
+        folder = self.media_index.add_folder(folder)
+        self.refresh_folders()
+        self.rescan([folder])
+
+    def remove_folder(self):
+        folder = self.folder_combo.currentData()
+        if not folder:
+            QMessageBox.information(self, "提示", "请先在下拉框中选择要移除的文件夹。")
+            return
+        stale_keys = self.media_index.remove_folder(folder)
+        self.cache.remove(stale_keys)
+        self.model.invalidate_keys(stale_keys)
+        self.refresh_folders()
+        self.model.reload(self.folder_combo.currentData())
+        self.update_status()
+
+    def rescan(self, folders=None):
+        if self.scanner and self.scanner.isRunning():
+            return
+        folders = folders or self.media_index.folders()
+        if not folders:
+            return
+        self.rescan_btn.setEnabled(False)
+        self.scanner = LibraryScanner(self.media_index.db_path, folders, self)
+        self.scanner.progress_signal.connect(self.update_status)
+        self.scanner.finished_signal.connect(self.on_scan_finished)
+        self.scanner.start()
+
+    def on_scan_finished(self, summary):
+        self.rescan_btn.setEnabled(True)
+        stale_keys = summary.get('stale_keys', [])
+        self.cache.remove(stale_keys)
+        self.model.invalidate_keys(stale_keys)
+        if summary['added'] or summary['updated'] or summary['removed']:
+            self.model.reload(self.folder_combo.currentData())
+        message = f"扫描完成: 新增 {summary['added']}，更新 {summary['updated']}，移除 {summary['removed']}"
+        if summary['errors']:
+            message += f"；{len(summary['errors'])} 个文件夹无法读取，已保留原有记录"
+        self.update_status(message)
+
+    def on_item_activated(self, proxy_index):
+        if not proxy_index.isValid():
+            return
+        path = self.proxy_model.data(proxy_index, MediaLibraryModel.PathRole)
+        if path:
+            self.video_selected.emit(path)
+            self.close()
+
+    def closeEvent(self, event):
+        self.loader.clear_pending()
+        super().closeEvent(event)
+
+    def shutdown(self):
+        """程序退出时停止后台扫描和缩略图线程"""
+        if self.scanner and self.scanner.isRunning():
+            self.scanner.stop()
+        self.loader.shutdown()
+        self.media_index.close()
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import threading
+
+from Utils.AppPaths import get_app_data_dir
+
+_lock = threading.Lock()
+_registry = {}
+
+
+class Counter:
+    """单调递增计数器（可在任意线程调用 inc）"""
+    __slots__ = ("name", "help", "value")
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        with _lock:
+            self.value += amount
+
+
+class Gauge:
+    """可增可减的瞬时值"""
+    __slots__ = ("name", "help", "value")
+    kind = "gauge"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+
+def _get_or_create(cls, name, help):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help)
+        elif not isinstance(metric, cls):
+            raise TypeError(f"指标 {name} 已注册为 {metric.kind}")
+        return metric
+
+
+def counter(name, help=""):
+    """获取（不存在时注册）计数器，名称用点分隔，例如 media_cache.hits"""
+    return _get_or_create(Counter, name, help)
+
+
+def gauge(name, help=""):
+    return _get_or_create(Gauge, name, help)
+
+
+def snapshot():
+    """所有指标的当前值 {名称: 值}"""
+    with _lock:
+        return {name: metric.value for name, metric in sorted(_registry.items())}
+
+
+def export_metrics(path=None):
+    """
+    把指标写入JSON文件，默认写入数据目录 logs/metrics.json
+
+    Returns:
+        str: 文件路径
+    """
+    path = path or os.path.join(get_app_data_dir("logs"), "metrics.json")
+    with _lock:
+        metrics = {name: {'type': metric.kind, 'value': metric.value, 'help': metric.help}
+                   for name, metric in sorted(_registry.items())}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"), 'metrics': metrics}, f,
+                  ensure_ascii=False, indent=2)
+    return path
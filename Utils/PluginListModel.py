@@ -0,0 +1,202 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle, QStyleOptionButton, QApplication
+from PyQt5.QtCore import Qt, QRect, QEvent, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, pyqtSignal
+from PyQt5.QtGui import QFont
+
+COLUMNS = ("插件", "作者", "加载(ms)", "CPU(ms)", "内存", "控件", "定时器", "描述")
+COL_NAME, COL_AUTHOR, COL_LOAD, COL_CPU, COL_MEMORY, COL_WIDGETS, COL_TIMERS, COL_DESCRIPTION = range(len(COLUMNS))
+COLUMN_WIDTHS = (170, 90, 70, 70, 80, 50, 55)  # 描述列占用剩余宽度
+
+# 统计列 -> PluginResourceMonitor.usage() 中的键
+USAGE_KEYS = {COL_CPU: 'cpu_ms', COL_MEMORY: 'memory_bytes', COL_WIDGETS: 'widgets', COL_TIMERS: 'timers'}
+
+
+def format_bytes(value):
+    if value < 1024 * 1024:
+        return f"{value / 1024:.0f} KB"
+    return f"{value / 1024 ** 2:.1f} MB"
+
+
+class PluginListModel(QAbstractTableModel):
+    """
+    插件表格模型
+
+    只保存插件引用，文本在绘制时按需读取，不为每个插件创建控件。
+    加载耗时来自 PluginManager.load_times；CPU时间、内存、控件和定时器数量来自
+    refresh_stats() 时插件管理器资源统计（Utils.PluginResources）的快照，未开启内存统计时内存列显示“-”。
+    """
+    PluginRole = Qt.UserRole + 1
+    SearchRole = Qt.UserRole + 2
+    SortRole = Qt.UserRole + 3
+
+    enabled_changed = pyqtSignal(list)  # 启用状态发生变化的插件列表
+
+    def __init__(self, plugin_manager, parent=None):
+        super().__init__(parent)
+        self.plugin_manager = plugin_manager
+        # 源数据预先按名称排序，默认排序无需经过代理模型逐项比较
+        self.plugins = sorted(plugin_manager.plugins, key=lambda plugin: plugin.name.lower())
+        self._search_text = {}
+        self.usage = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.plugins)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation != Qt.Horizontal:
+            return None
+        if role == Qt.DisplayRole:
+            return COLUMNS[section]
+        if role == Qt.TextAlignmentRole and COL_LOAD <= section <= COL_TIMERS:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        plugin = self.plugins[index.row()]
+        column = index.column()
+        if role == self.PluginRole:
+            return plugin
+        if role == self.SearchRole:
+            text = self._search_text.get(plugin)
+            if text is None:
+                text = f"{plugin.name}\n{plugin.author}\n{plugin.description}".lower()
+                self._search_text[plugin] = text
+            return text
+        if role == Qt.ToolTipRole:
+            return plugin.description
+
+        if column == COL_NAME:
+            if role == Qt.DisplayRole:
+                return f"{plugin.name} v{plugin.version}"
+            if role == Qt.CheckStateRole:
+                return Qt.Checked if plugin.enabled else Qt.Unchecked
+            if role == self.SortRole:
+                return plugin.name.lower()
+        elif column == COL_AUTHOR:
+            if role == Qt.DisplayRole:
+                return plugin.author
+            if role == self.SortRole:
+                return plugin.author.lower()
+        elif column == COL_DESCRIPTION:
+            if role in (Qt.DisplayRole, self.SortRole):
+                return plugin.description
+        else:
+            value = self.stat(plugin, column)
+            if role == self.SortRole:
+                return -1 if value is None else value
+            if role == Qt.DisplayRole:
+                if value is None:
+                    return "-"
+                if column == COL_MEMORY:
+                    return format_bytes(value)
+                if column in (COL_LOAD, COL_CPU):
+                    return f"{value:.1f}"
+                return str(value)
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def stat(self, plugin, column):
+        """统计列的原始数值（毫秒、字节或个数），没有数据时为 None"""
+        if column == COL_LOAD:
+            return self.plugin_manager.load_times.get(plugin, 0.0) * 1000
+        usage = self.usage.get(plugin)
+        return usage[USAGE_KEYS[column]] if usage is not None else None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == COL_NAME:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid() or index.column() != COL_NAME:
+            return False
+        return self.set_enabled([index.row()], value == Qt.Checked)
+
+    def set_enabled(self, rows, enabled):
+        """批量设置启用状态，只发出一次数据变化通知"""
+        changed = []
+        for row in rows:
+            plugin = self.plugins[row]
+            if plugin.enabled != enabled:
+                plugin.enabled = enabled
+                changed.append(row)
+        if not changed:
+            return False
+        self.dataChanged.emit(self.index(min(changed), COL_NAME), self.index(max(changed), COL_NAME),
+                              [Qt.CheckStateRole])
+        self.enabled_changed.emit([self.plugins[row] for row in changed])
+        return True
+
+    def refresh_stats(self):
+        """重新读取资源统计并通知视图刷新统计列（CPU时间等会随运行增长）"""
+        self.usage = self.plugin_manager.resources.usage()
+        if self.plugins:
+            self.dataChanged.emit(self.index(0, COL_LOAD), self.index(len(self.plugins) - 1, COL_TIMERS),
+                                  [Qt.DisplayRole, self.SortRole])
+
+
+class PluginFilterModel(QSortFilterProxyModel):
+    """按名称、作者、描述过滤，点击表头按任意列排序"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterRole(PluginListModel.SearchRole)
+        self.setFilterKeyColumn(COL_NAME)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setSortRole(PluginListModel.SortRole)
+
+    def set_search_text(self, text):
+        self.setFilterFixedString(text.strip().lower())
+
+
+class PluginItemDelegate(QStyledItemDelegate):
+    """绘制名称列：复选框和加粗的名称、版本（直接绘制，不为每行创建控件）"""
+
+    def _check_rect(self, option):
+        size = QApplication.style().pixelMetric(QStyle.PM_IndicatorWidth)
+        return QRect(option.rect.left() + 6, option.rect.center().y() - size // 2, size, size)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        style = QApplication.style()
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+            text_color = option.palette.highlightedText().color()
+        else:
+            text_color = option.palette.text().color()
+
+        check = QStyleOptionButton()
+        check.rect = self._check_rect(option)
+        check.state = QStyle.State_Enabled
+        check.state |= QStyle.State_On if index.data(Qt.CheckStateRole) == Qt.Checked else QStyle.State_Off
+        style.drawPrimitive(QStyle.PE_IndicatorCheckBox, check, painter)
+
+        left = check.rect.right() + 8
+        text_rect = QRect(left, option.rect.top(), option.rect.right() - left - 4, option.rect.height())
+        bold = QFont(option.font)
+        bold.setBold(True)
+        painter.setFont(bold)
+        painter.setPen(text_color)
+        title = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole), Qt.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, title)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """点击复选框区域或按空格切换启用状态"""
+        toggle = False
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            toggle = self._check_rect(option).adjusted(-4, -4, 4, 4).contains(event.pos())
+        elif event.type() == QEvent.KeyPress and event.key() == Qt.Key_Space:
+            toggle = True
+        if not toggle:
+            return False
+        state = Qt.Unchecked if index.data(Qt.CheckStateRole) == Qt.Checked else Qt.Checked
+        return model.setData(index, state, Qt.CheckStateRole)
@@ -0,0 +1,166 @@
+import time
+
+from PyQt5.QtWidgets import QWidget, QApplication
+from PyQt5.QtCore import Qt, QEvent, QRect, QPoint, QTimer
+from PyQt5.QtGui import QRegion, QImage
+
+
+class PluginOverlay(QWidget):
+    """
+    插件控件覆盖层
+
+    插件在 canvas 上创建控件，canvas 与屏幕等大，坐标即屏幕坐标。
+    顶层窗口只覆盖所有可见插件控件的外接矩形，并以控件区域的并集作为窗口遮罩：
+    透明窗口的缓冲区和合成开销只与插件实际占用的面积有关，遮罩以外的点击直接落到桌面。
+    插件控件移动、缩放、显示或隐藏时，区域在下一次事件循环中重新计算（多次变化合并为一次）。
+
+    合成模式下不显示覆盖层窗口，插件控件被渲染为缓存图层，由宿主混合进视频帧。
+    独立窗口模式下按 max_fps 限制重绘频率：插件控件的 update() 在间隔内合并，到期后一次绘制。
+    """
+
+    def __init__(self, screen_geometry, parent=None):
+        super().__init__(parent)
+        self.setWindowFlags(
+            Qt.FramelessWindowHint |
+            Qt.Tool |
+            Qt.WindowStaysOnTopHint |
+            Qt.WindowDoesNotAcceptFocus
+        )
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents, False)
+
+        self.screen_geometry = QRect(screen_geometry)
+        self.canvas = QWidget(self)
+        self.canvas.setGeometry(0, 0, screen_geometry.width(), screen_geometry.height())
+        self.canvas.installEventFilter(self)
+
+        self.active = False
+        self.composited = False
+        self.layers = []
+        self._layer_images = {}
+        self.bounds = QRect()
+        self.region = QRegion()
+        self._update_pending = False
+        self.max_fps = None
+        self._last_flush = 0.0
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush)
+        self.setGeometry(screen_geometry.x(), screen_geometry.y(), 1, 1)
+
+    def activate(self):
+        """开始显示覆盖层（有可见插件控件时才显示顶层窗口）"""
+        self.active = True
+        self.update_region()
+
+    def set_composited(self, composited):
+        """切换合成模式：开启后覆盖层窗口保持隐藏，插件控件只以图层形式输出"""
+        self.composited = composited
+        if composited:
+            self.hide()
+        self.schedule_update()
+
+    def set_max_fps(self, fps):
+        """设置独立窗口模式下的重绘帧率上限（画质档位的 overlay_fps），None 为不限制"""
+        self.max_fps = fps
+
+    def event(self, event):
+        # 插件控件的 update() 最终汇成顶层窗口的 UpdateRequest，间隔未到时推迟，期间的脏区域合并为一次绘制
+        if event.type() == QEvent.UpdateRequest and self.max_fps and not self.composited:
+            wait = self._last_flush + 1.0 / self.max_fps - time.perf_counter()
+            if wait > 0:
+                if not self._flush_timer.isActive():
+                    self._flush_timer.start(int(wait * 1000) + 1)
+                return True
+            self._last_flush = time.perf_counter()
+        return super().event(event)
+
+    def _flush(self):
+        QApplication.postEvent(self, QEvent(QEvent.UpdateRequest))
+
+    def eventFilter(self, obj, event):
+        event_type = event.type()
+        if obj is self.canvas:
+            if event_type == QEvent.ChildAdded and event.child().isWidgetType():
+                event.child().installEventFilter(self)
+                self.schedule_update()
+            elif event_type == QEvent.ChildRemoved:
+                self.schedule_update()
+        elif event_type in (QEvent.Move, QEvent.Resize, QEvent.ShowToParent, QEvent.HideToParent):
+            self.schedule_update()
+        return False
+
+    def schedule_update(self):
+        if not self._update_pending:
+            self._update_pending = True
+            QTimer.singleShot(0, self.update_region)
+
+    def plugin_region(self):
+        """所有显式显示的插件控件区域的并集（canvas坐标）"""
+        region = QRegion()
+        for child in self.canvas.children():
+            if not child.isWidgetType() or child.isHidden():
+                continue
+            mask = child.mask()
+            if mask.isEmpty():
+                region += QRegion(child.geometry())
+            else:
+                region += mask.translated(child.pos())
+        return region.intersected(QRegion(self.canvas.rect()))
+
+    def update_region(self):
+        self._update_pending = False
+        region = self.plugin_region()
+        if self.composited:
+            self.region = region
+            self.refresh_layers()
+            return
+        if region == self.region and (self.isVisible() or region.isEmpty() or not self.active):
+            return
+        self.region = region
+
+        if region.isEmpty():
+            self.bounds = QRect()
+            self.hide()
+            return
+
+        bounds = region.boundingRect()
+        if bounds != self.bounds:
+            self.bounds = bounds
+            self.setGeometry(bounds.translated(self.screen_geometry.topLeft()))
+            self.canvas.move(-bounds.topLeft())
+
+        local_region = region.translated(-bounds.topLeft())
+        if local_region == QRegion(self.rect()):
+            self.clearMask()
+        else:
+            self.setMask(local_region)
+
+        if self.active and not self.isVisible():
+            self.show()
+
+    def refresh_layers(self):
+        """重新渲染插件控件图层（合成模式下由宿主按覆盖层帧率调用），图层缓冲按控件复用"""
+        layers = []
+        images = {}
+        for child in self.canvas.children():
+            if not child.isWidgetType() or child.isHidden():
+                continue
+            image = self._layer_images.get(child)
+            if image is None or image.size() != child.size():
+                image = QImage(child.size(), QImage.Format_ARGB32_Premultiplied)
+            image.fill(Qt.transparent)
+            child.render(image, QPoint(), QRegion(), QWidget.DrawChildren)
+            images[child] = image
+            layers.append((child.pos(), image))
+        self._layer_images = images
+        self.layers = layers
+
+    def composite_into(self, painter):
+        """把缓存的图层绘制到视频帧上（帧坐标与画布坐标一致）"""
+        for pos, image in self.layers:
+            painter.drawImage(pos, image)
+
+    def backing_store_bytes(self):
+        """顶层窗口ARGB缓冲区大小（字节）"""
+        return self.width() * self.height() * 4 if self.isVisible() else 0
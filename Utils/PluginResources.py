@@ -0,0 +1,181 @@
+import glob
+import time
+import tracemalloc
+
+from PyQt5.QtCore import QObject, QTimer, QEvent
+
+from Utils.LogService import get_logger
+from Utils import Metrics
+from Utils import Tracing
+
+logger = get_logger("plugin_resources")
+
+# 在插件的定时器和控件上计时的事件：定时器触发（timeout 槽函数）和绘制（paintEvent）
+TIMED_EVENTS = {QEvent.Timer: "plugin.tick", QEvent.Paint: "plugin.paint"}
+
+# 拍摄 tracemalloc 快照的耗时与分配记录数成正比（数十万条时上百毫秒），内存统计按此间隔缓存（秒）
+MEMORY_REFRESH_SECONDS = 10.0
+
+
+class _PluginEventTimer(QObject):
+    """
+    安装在插件拥有的定时器和控件上的事件过滤器
+
+    收到定时器或绘制事件时由过滤器自己调用 obj.event() 完成分发并计时，再返回 True 阻止重复分发。
+    嵌套的事件（例如定时器回调中同步重绘）只计入外层。
+    """
+
+    def __init__(self, plugin_name):
+        super().__init__()
+        self.plugin_name = plugin_name
+        self.seconds = 0.0
+        self._depth = 0
+
+    def eventFilter(self, obj, event):
+        name = TIMED_EVENTS.get(event.type())
+        if name is None or self._depth:
+            return False
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            obj.event(event)
+        finally:
+            end = time.perf_counter()
+            self._depth -= 1
+            self.seconds += end - start
+            recorder = Tracing.recorder()
+            if recorder is not None:
+                recorder.complete(name, "plugin", start, end, {'plugin': self.plugin_name})
+        return True
+
+
+class PluginResourceMonitor:
+    """
+    按插件统计资源占用（在GUI线程使用）
+
+    - CPU时间：事件总线记录的钩子处理耗时，加上插件拥有的定时器触发和控件绘制的耗时
+      （由安装在这些对象上的事件过滤器计时）；QTimer.singleShot 和连接到宿主信号的槽函数不在统计范围内
+    - 控件和定时器：插件拥有的Qt对象（与卸载时销毁的范围一致）及其全部子对象，
+      在插件初始化和 operate_on_window 之后统计，之后插件自行创建的对象不计入
+    - 内存：开启 tracemalloc 后按分配发生的源文件归属到插件，只包含开启之后的分配；
+      Qt在C++中分配的内存不在统计范围内
+    """
+
+    def __init__(self, plugin_manager):
+        self.plugin_manager = plugin_manager
+        self._event_timers = {}  # plugin -> _PluginEventTimer
+        self._counts = {}  # plugin -> (控件数, 定时器数)，最近一次 watch() 的结果
+        self._memory = None
+        self._memory_time = 0.0
+
+    def watch(self, plugin):
+        """
+        在插件当前拥有的定时器和控件上安装计时过滤器（重复安装无副作用）并记录数量，
+        插件管理器只在插件初始化和 operate_on_window 之后调用
+
+        Returns:
+            tuple: (控件数, 定时器数)
+        """
+        event_timer = self._event_timers.get(plugin)
+        if event_timer is None:
+            event_timer = self._event_timers[plugin] = _PluginEventTimer(plugin.name)
+        widgets = timers = 0
+        seen = set()
+        for root in self.plugin_manager.plugin_objects(plugin):
+            for obj in [root] + root.findChildren(QObject):
+                if id(obj) in seen:
+                    continue
+                seen.add(id(obj))
+                if obj.isWidgetType():
+                    widgets += 1
+                elif isinstance(obj, QTimer):
+                    timers += 1
+                else:
+                    continue
+                obj.installEventFilter(event_timer)
+        self._counts[plugin] = (widgets, timers)
+        return widgets, timers
+
+    def forget(self, plugin):
+        """丢弃已卸载插件的统计（不再持有插件引用）"""
+        self._counts.pop(plugin, None)
+        event_timer = self._event_timers.pop(plugin, None)
+        if event_timer is not None:
+            event_timer.deleteLater()
+
+    # ---- 内存 ----
+
+    @property
+    def memory_tracking(self):
+        return tracemalloc.is_tracing()
+
+    def set_memory_tracking(self, enabled):
+        """开启或关闭 tracemalloc（开启后内存分配略有开销，只统计开启之后的分配）"""
+        self._memory = None
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            logger.info("已开启插件内存统计", extra={'event': 'plugin_memory_tracking'})
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _memory_by_file(self):
+        """插件文件 -> 该文件中分配且仍存活的字节数（按 MEMORY_REFRESH_SECONDS 缓存）"""
+        now = time.monotonic()
+        plugin_files = self.plugin_manager.plugin_files
+        if (self._memory is not None and self._memory.keys() == plugin_files.keys()
+                and now - self._memory_time < MEMORY_REFRESH_SECONDS):
+            return self._memory
+        memory = dict.fromkeys(plugin_files, 0)
+        if plugin_files:
+            # 只保留分配发生在插件文件中的记录（路径中的通配符需转义）
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(True, glob.escape(path)) for path in plugin_files])
+            for stat in snapshot.statistics("filename"):
+                filename = stat.traceback[0].filename
+                if filename in memory:
+                    memory[filename] += stat.size
+        self._memory, self._memory_time = memory, now
+        return memory
+
+    # ---- 汇总 ----
+
+    def usage(self):
+        """
+        当前各插件的资源占用（在GUI线程调用）
+
+        Returns:
+            dict: plugin -> {'cpu_ms', 'hook_ms', 'event_ms', 'memory_bytes', 'widgets', 'timers'}，
+                  未开启内存统计时 memory_bytes 为 None
+        """
+        manager = self.plugin_manager
+        memory = self._memory_by_file() if tracemalloc.is_tracing() else None
+        result = {}
+        for plugin in manager.plugins:
+            widgets, timers = self._counts.get(plugin, (0, 0))
+            hook_time = manager.event_bus.handler_time.get(plugin, 0.0)
+            event_time = self._event_timers[plugin].seconds
+            module = manager.modules.get(plugin)
+            memory_bytes = None
+            if memory is not None and module is not None:
+                memory_bytes = memory.get(module.__file__, 0)
+            result[plugin] = {
+                'cpu_ms': (hook_time + event_time) * 1000,
+                'hook_ms': hook_time * 1000,
+                'event_ms': event_time * 1000,
+                'memory_bytes': memory_bytes,
+                'widgets': widgets,
+                'timers': timers,
+            }
+        return result
+
+    def publish_metrics(self):
+        """把各插件的资源占用写入指标（plugins.<插件名>.cpu_ms 等），随指标导出"""
+        for plugin, usage in self.usage().items():
+            prefix = f"plugins.{plugin.name}"
+            Metrics.gauge(f"{prefix}.cpu_ms", "插件在GUI线程的处理耗时（钩子、定时器和绘制）").set(
+                round(usage['cpu_ms'], 1))
+            Metrics.gauge(f"{prefix}.widgets", "插件拥有的控件数").set(usage['widgets'])
+            Metrics.gauge(f"{prefix}.timers", "插件拥有的定时器数").set(usage['timers'])
+            if usage['memory_bytes'] is not None:
+                Metrics.gauge(f"{prefix}.memory_bytes", "插件代码分配且仍存活的内存（tracemalloc）").set(
+                    usage['memory_bytes'])
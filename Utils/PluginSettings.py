@@ -0,0 +1,263 @@
+from PyQt5.QtWidgets import (QDialog, QFormLayout, QVBoxLayout, QHBoxLayout, QLineEdit, QSpinBox,
+                             QDoubleSpinBox, QCheckBox, QComboBox, QPushButton, QColorDialog, QWidget, QLabel)
+from PyQt5.QtCore import Qt, QSettings, QPoint
+from PyQt5.QtGui import QColor
+
+from Utils.LogService import get_logger
+
+logger = get_logger("plugin_settings")
+
+FIELD_TYPES = ("str", "int", "float", "bool", "color", "choice", "point")
+DEFAULT_COLOR = "#ffffff"
+
+
+def _normalize_color(value, fallback):
+    """颜色统一为 QColor.name() 的 #rrggbb 形式，无效时返回 fallback"""
+    color = QColor(value) if value is not None else QColor()
+    return color.name() if color.isValid() else fallback
+
+
+class SettingField:
+    """
+    插件设置项声明
+
+    Args:
+        key (str): 设置键
+        type (str): 类型，见 FIELD_TYPES；point 的值为 (x, y)
+        label (str): 表单中显示的名称
+        default: 默认值；int、float、point 省略时取 minimum（没有时为 0），color 统一为 #rrggbb 形式
+        minimum / maximum: int、float、point 的取值范围
+        step: float 的步长
+        choices (list): choice 的可选值
+        tooltip (str): 提示文字
+    """
+    __slots__ = ("key", "type", "label", "default", "minimum", "maximum", "step", "choices", "tooltip")
+
+    def __init__(self, key, type="str", label=None, default=None, minimum=None, maximum=None,
+                 step=None, choices=None, tooltip=""):
+        if type not in FIELD_TYPES:
+            raise ValueError(f"未知的设置类型: {type}")
+        self.key = key
+        self.type = type
+        self.label = label or key
+        self.minimum = minimum
+        self.maximum = maximum
+        self.step = step
+        self.choices = list(choices or [])
+        self.tooltip = tooltip
+        # 数值编辑框不能显示 None；颜色与编辑器返回的值写法一致（QColor.name() 为小写），否则每次保存都算作修改
+        if default is None and type in ("int", "float", "point"):
+            low = minimum if minimum is not None else 0
+            default = (low, low) if type == "point" else low
+        elif type == "color":
+            default = _normalize_color(default, DEFAULT_COLOR)
+        self.default = default
+
+    def coerce(self, value):
+        """把从设置存储读出的值转换为声明的类型，无法转换时返回默认值"""
+        try:
+            if self.type == "bool":
+                if isinstance(value, str):
+                    return value.lower() in ("true", "1", "yes")
+                return bool(value)
+            if self.type == "int":
+                return int(value)
+            if self.type == "float":
+                return float(value)
+            if self.type == "point":
+                if isinstance(value, QPoint):
+                    return (value.x(), value.y())
+                x, y = value
+                return (int(x), int(y))
+            if self.type == "color":
+                return _normalize_color(value, self.default)
+            if self.type == "choice":
+                return value if value in self.choices else self.default
+            return str(value)
+        except (TypeError, ValueError):
+            return self.default
+
+
+def _settings_group(plugin):
+    return f"plugins/{plugin.name}"
+
+
+def load_plugin_settings(plugin):
+    """
+    按插件声明的设置项读取已保存的值
+
+    Returns:
+        dict: 设置键 -> 值，未保存的键使用默认值
+    """
+    settings = QSettings("VideoWallpaper", "PluginSettings")
+    settings.beginGroup(_settings_group(plugin))
+    values = {}
+    for field in plugin.settings_schema:
+        raw = settings.value(field.key, None)
+        values[field.key] = field.default if raw is None else field.coerce(raw)
+    settings.endGroup()
+    return values
+
+
+def save_plugin_settings(plugin, values):
+    """保存插件设置（point 以 QPoint 存储）"""
+    settings = QSettings("VideoWallpaper", "PluginSettings")
+    settings.beginGroup(_settings_group(plugin))
+    for field in plugin.settings_schema:
+        if field.key not in values:
+            continue
+        value = values[field.key]
+        settings.setValue(field.key, QPoint(*value) if field.type == "point" else value)
+    settings.endGroup()
+    settings.sync()
+
+
+class _ColorButton(QPushButton):
+    """显示当前颜色的按钮，点击弹出颜色选择"""
+
+    def __init__(self, color, parent=None):
+        super().__init__(parent)
+        self.clicked.connect(self._choose)
+        self.set_color(color)
+
+    def set_color(self, color):
+        self._color = _normalize_color(color, DEFAULT_COLOR)
+        self.setText(self._color)
+        self.setStyleSheet(f"background-color: {self._color};")
+
+    def color(self):
+        return self._color
+
+    def _choose(self):
+        color = QColorDialog.getColor(QColor(self._color), self, "选择颜色")
+        if color.isValid():
+            self.set_color(color)
+
+
+class PluginSettingsDialog(QDialog):
+    """
+    根据插件声明的设置项生成的非模态设置表单
+
+    保存时写入插件设置存储、更新 plugin.settings，并以变化的键调用 plugin.apply_settings()
+    """
+
+    def __init__(self, plugin, parent=None):
+        super().__init__(parent)
+        self.plugin = plugin
+        self.setWindowTitle(f"{plugin.name} 设置")
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setModal(False)
+        self.editors = {}
+
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        for field in plugin.settings_schema:
+            editor = self._create_editor(field)
+            editor.setToolTip(field.tooltip)
+            self.editors[field.key] = editor
+            form.addRow(field.label, editor)
+        layout.addLayout(form)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        btn_layout = QHBoxLayout()
+        reset_btn = QPushButton("恢复默认")
+        reset_btn.clicked.connect(self.reset_defaults)
+        save_btn = QPushButton("保存设置")
+        save_btn.clicked.connect(self.save)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(reset_btn)
+        btn_layout.addStretch()
+        btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.set_values(plugin.settings)
+
+    def _create_editor(self, field):
+        if field.type == "int":
+            editor = QSpinBox()
+            editor.setRange(field.minimum if field.minimum is not None else -1000000,
+                            field.maximum if field.maximum is not None else 1000000)
+        elif field.type == "float":
+            editor = QDoubleSpinBox()
+            editor.setDecimals(3)
+            editor.setRange(field.minimum if field.minimum is not None else -1e6,
+                            field.maximum if field.maximum is not None else 1e6)
+            editor.setSingleStep(field.step or 0.1)
+        elif field.type == "bool":
+            editor = QCheckBox()
+        elif field.type == "color":
+            editor = _ColorButton(field.default)
+        elif field.type == "choice":
+            editor = QComboBox()
+            editor.addItems([str(choice) for choice in field.choices])
+        elif field.type == "point":
+            editor = QWidget()
+            row = QHBoxLayout(editor)
+            row.setContentsMargins(0, 0, 0, 0)
+            editor.spins = []
+            for axis in ("X", "Y"):
+                spin = QSpinBox()
+                spin.setRange(field.minimum if field.minimum is not None else -100000,
+                              field.maximum if field.maximum is not None else 100000)
+                spin.setPrefix(f"{axis}: ")
+                row.addWidget(spin)
+                editor.spins.append(spin)
+        else:
+            editor = QLineEdit()
+        return editor
+
+    def set_values(self, values):
+        for field in self.plugin.settings_schema:
+            value = values.get(field.key, field.default)
+            editor = self.editors[field.key]
+            if field.type in ("int", "float"):
+                editor.setValue(value)
+            elif field.type == "bool":
+                editor.setChecked(bool(value))
+            elif field.type == "color":
+                editor.set_color(value)
+            elif field.type == "choice":
+                index = field.choices.index(value) if value in field.choices else 0
+                editor.setCurrentIndex(index)
+            elif field.type == "point":
+                editor.spins[0].setValue(value[0])
+                editor.spins[1].setValue(value[1])
+            else:
+                editor.setText("" if value is None else str(value))
+
+    def values(self):
+        result = {}
+        for field in self.plugin.settings_schema:
+            editor = self.editors[field.key]
+            if field.type in ("int", "float"):
+                result[field.key] = editor.value()
+            elif field.type == "bool":
+                result[field.key] = editor.isChecked()
+            elif field.type == "color":
+                result[field.key] = editor.color()
+            elif field.type == "choice":
+                result[field.key] = field.choices[editor.currentIndex()] if field.choices else None
+            elif field.type == "point":
+                result[field.key] = (editor.spins[0].value(), editor.spins[1].value())
+            else:
+                result[field.key] = editor.text()
+        return result
+
+    def reset_defaults(self):
+        self.set_values({field.key: field.default for field in self.plugin.settings_schema})
+
+    def save(self):
+        values = self.values()
+        changed = {key: value for key, value in values.items() if self.plugin.settings.get(key) != value}
+        save_plugin_settings(self.plugin, values)
+        self.plugin.settings.update(values)
+        if changed:
+            try:
+                self.plugin.apply_settings(changed)
+            except Exception as e:
+                logger.error(f"插件 {self.plugin.name} 应用设置时出错: {e}", extra={'plugin': self.plugin.name})
+        self.status_label.setText("设置已保存")
@@ -0,0 +1,117 @@
+import os
+import importlib.util
+
+import numpy as np
+from PyQt5.QtGui import QImage
+
+SHADER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shaders")
+
+
+class ShaderGrid:
+    """
+    传给着色函数的坐标网格（内部渲染分辨率）
+
+    Attributes:
+        width / height (int): 内部分辨率
+        x / y (numpy.ndarray): 形状为 (height, width) 的 float32 坐标，范围 [0, 1)，y 向下
+        aspect (float): 宽高比
+        state (dict): 着色函数可在帧之间保存的状态（例如粒子位置），分辨率变化时清空
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.aspect = width / height
+        xs = (np.arange(width, dtype=np.float32) + 0.5) / width
+        ys = (np.arange(height, dtype=np.float32) + 0.5) / height
+        self.x, self.y = np.meshgrid(xs, ys)
+        self.state = {}
+
+
+def load_shader(path):
+    """
+    从 .py 文件加载着色函数 shade(t, grid)
+
+    Raises:
+        ValueError: 不是 .py 文件，或文件中没有 shade 函数
+    """
+    name = "shader_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None:
+        raise ValueError(f"着色器必须是 .py 文件: {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    shade = getattr(module, "shade", None)
+    if not callable(shade):
+        raise ValueError(f"着色器 {path} 缺少 shade(t, grid) 函数")
+    return shade
+
+
+def builtin_shaders():
+    """内置着色器 {名称: 路径}"""
+    if not os.path.isdir(SHADER_DIR):
+        return {}
+    return {os.path.splitext(filename)[0]: os.path.join(SHADER_DIR, filename)
+            for filename in sorted(os.listdir(SHADER_DIR))
+            if filename.endswith(".py") and not filename.startswith("__")}
+
+
+class ProceduralRenderer:
+    """
+    调用着色函数并把结果转换为可直接显示的 QImage
+
+    着色函数返回 (高, 宽, 3) 或 (高, 宽, 4) 的数组：uint8 原样使用，浮点数按 [0, 1] 截断后换算。
+    QImage 直接包装输出缓冲区，不复制像素；缓冲区按 buffers 个轮换使用，
+    同一个缓冲区在 buffers 帧之后才会被覆盖。
+    """
+
+    def __init__(self, shade, width, height, buffers=3):
+        self.shade = shade
+        self.buffers = buffers
+        self.resize(width, height)
+
+    def resize(self, width, height):
+        width, height = max(1, int(width)), max(1, int(height))
+        self.grid = ShaderGrid(width, height)
+        self._outputs = {}
+        self._index = 0
+
+    @property
+    def size(self):
+        return self.grid.width, self.grid.height
+
+    def _output(self, channels):
+        """取下一个输出缓冲区（每行按4字节对齐，满足 QImage 的要求）"""
+        key = (channels, self._index)
+        self._index = (self._index + 1) % self.buffers
+        output = self._outputs.get(key)
+        if output is None:
+            stride = (self.grid.width * channels + 3) & ~3
+            storage = np.zeros((self.grid.height, stride), dtype=np.uint8)
+            output = storage, storage[:, :self.grid.width * channels].reshape(
+                self.grid.height, self.grid.width, channels)
+            self._outputs[key] = output
+        return output
+
+    def render(self, t):
+        """
+        渲染 t 秒时的一帧
+
+        Returns:
+            QImage: 包装内部缓冲区的图像（内容在 buffers 帧之后被覆盖）
+        """
+        pixels = np.asarray(self.shade(t, self.grid))
+        height, width = self.grid.height, self.grid.width
+        if pixels.ndim != 3 or pixels.shape[:2] != (height, width) or pixels.shape[2] not in (3, 4):
+            raise ValueError(f"着色器输出形状应为 ({height}, {width}, 3|4)，实际为 {pixels.shape}")
+        channels = pixels.shape[2]
+        storage, view = self._output(channels)
+        if pixels.dtype == np.uint8:
+            view[...] = pixels
+        else:
+            np.multiply(np.clip(pixels, 0.0, 1.0), 255.0, out=view, casting="unsafe")
+
+        image_format = QImage.Format_RGB888 if channels == 3 else QImage.Format_RGBA8888
+        image = QImage(storage.data, width, height, storage.strides[0], image_format)
+        image.ndarray = storage  # 保持缓冲区引用
+        return image
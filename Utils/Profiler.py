@@ -0,0 +1,250 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+import psutil
+
+from Utils.AppPaths import get_app_data_dir
+from Utils.LogService import get_logger
+
+logger = get_logger("profiler")
+
+DEFAULT_INTERVAL_MS = 10
+# 读取各线程CPU时间的间隔（采样次数）；Windows 上 Process.threads() 需要拍摄全系统线程快照，不能每次采样都读
+CPU_SAMPLE_TICKS = 10
+TOP_FUNCTIONS = 30
+
+_profiler = None
+
+
+def _thread_cpu_times(process):
+    """原生线程ID -> 累计CPU时间（秒）"""
+    try:
+        return {thread.id: thread.user_time + thread.system_time for thread in process.threads()}
+    except psutil.Error:
+        return {}
+
+
+def _label(code):
+    # 折叠栈格式以分号分隔栈帧
+    filename = os.path.basename(code.co_filename).replace(";", ":")
+    return f"{code.co_name.replace(';', ':')} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    采样分析器：后台线程按固定间隔通过 sys._current_frames() 抓取所有Python线程的调用栈
+
+    cpu_only 为 True（默认）时只统计消耗了CPU的线程，等待中的线程（事件循环空闲、线程池等待任务）
+    不计入，结果对应“CPU花在哪里”：线程CPU时间每 CPU_SAMPLE_TICKS 次采样读取一次，期间抓取的栈
+    先暂存，该线程在这段时间内消耗了CPU时才计入。没有Python栈的原生线程（例如VLC解码线程）
+    只统计线程CPU时间。未开始采样时不产生任何开销。
+    """
+
+    def __init__(self, plugin_manager=None, interval_ms=DEFAULT_INTERVAL_MS, cpu_only=True):
+        self.plugin_manager = plugin_manager
+        self.interval = interval_ms / 1000.0
+        self.cpu_only = cpu_only
+        self.stacks = Counter()  # (线程名, (code, ...) 从外到内) -> 样本数
+        self.ticks = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._process = psutil.Process()
+        self._cpu_start = {}
+        self._cpu_end = {}
+        self._process_cpu_start = 0.0
+        self._process_cpu = 0.0
+        self.sampler_cpu = 0.0  # 采样线程自身的CPU时间（秒）
+        self._thread_names = {}  # 原生线程ID -> 线程名
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.started_at = time.perf_counter()
+        cpu = self._process.cpu_times()
+        self._process_cpu_start = cpu.user + cpu.system
+        self._cpu_start = _thread_cpu_times(self._process)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        cpu = self._process.cpu_times()
+        self._process_cpu = cpu.user + cpu.system - self._process_cpu_start
+
+    # ---- 采样线程 ----
+
+    def _run(self):
+        me = threading.get_ident()
+        sampler_start = time.thread_time()
+        last_cpu = dict(self._cpu_start)
+        pending = []  # 上次读取线程CPU时间之后抓取的 (原生线程ID, 栈)
+        while not self._stop_event.wait(self.interval):
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            self.ticks += 1
+            for ident, frame in frames.items():
+                if ident == me:
+                    continue
+                thread = threads.get(ident)
+                name = thread.name if thread is not None else f"thread-{ident}"
+                native_id = getattr(thread, "native_id", None)
+                if native_id is not None:
+                    self._thread_names[native_id] = name
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                if self.cpu_only:
+                    pending.append((native_id, (name, tuple(stack))))
+                else:
+                    self.stacks[(name, tuple(stack))] += 1
+            frames = frame = None  # 不保留栈帧引用
+            if self.cpu_only and self.ticks % CPU_SAMPLE_TICKS == 0:
+                cpu = _thread_cpu_times(self._process)
+                self._commit(pending, last_cpu, cpu)
+                pending, last_cpu = [], cpu
+        # 在采样线程退出前记录，结果中包含采样线程自身的开销
+        self._thread_names[threading.get_native_id()] = threading.current_thread().name
+        self._cpu_end = _thread_cpu_times(self._process)
+        if self.cpu_only:
+            self._commit(pending, last_cpu, self._cpu_end)
+        self.sampler_cpu = time.thread_time() - sampler_start
+
+    def _commit(self, pending, last_cpu, cpu):
+        """计入期间消耗了CPU的线程的栈，等待中的线程丢弃"""
+        busy = {native_id for native_id, seconds in cpu.items() if seconds - last_cpu.get(native_id, 0.0) > 0}
+        for native_id, key in pending:
+            if native_id in busy:
+                self.stacks[key] += 1
+
+    # ---- 结果 ----
+
+    def _plugin_of(self, code, cache):
+        filename = code.co_filename
+        if filename not in cache:
+            plugin = None
+            if self.plugin_manager is not None:
+                normalized = os.path.normcase(os.path.abspath(filename))
+                for path, owner in list(self.plugin_manager.plugin_files.items()):
+                    if os.path.normcase(os.path.abspath(path)) == normalized:
+                        plugin = owner.name
+                        break
+                else:
+                    plugin_dir = os.path.normcase(os.path.abspath(self.plugin_manager.plugin_dir)) + os.sep
+                    if normalized.startswith(plugin_dir):
+                        plugin = os.path.splitext(os.path.basename(filename))[0]
+            cache[filename] = plugin
+        return cache[filename]
+
+    def collapsed(self):
+        """折叠栈格式（每行“线程;外层;...;内层 样本数”），可直接交给 flamegraph.pl、speedscope 等工具"""
+        lines = [f"{name.replace(';', ':')};{';'.join(_label(code) for code in stack)} {count}"
+                 for (name, stack), count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """按函数（自身/含调用）、线程、插件汇总的文字报告"""
+        total = self.samples
+        self_counts, total_counts, threads, plugins = Counter(), Counter(), Counter(), Counter()
+        plugin_cache = {}
+        for (name, stack), count in self.stacks.items():
+            threads[name] += count
+            if stack:
+                self_counts[stack[-1]] += count
+            for code in set(stack):
+                total_counts[code] += count
+            # 从最内层开始查找插件代码，插件调用宿主服务时仍算作该插件
+            plugin = next((plugin for plugin in (self._plugin_of(code, plugin_cache) for code in reversed(stack))
+                           if plugin), None)
+            plugins[plugin or "（宿主）"] += count
+
+        def percent(count):
+            return f"{count / total:6.1%}" if total else "     -"
+
+        mode = "仅统计消耗CPU的线程" if self.cpu_only else "统计所有线程"
+        lines = [f"采样时长 {self.duration:.1f}s，间隔 {self.interval * 1000:.0f}ms，{self.ticks} 次采样，"
+                 f"{total} 个样本（{mode}）",
+                 f"进程CPU占用 {self._process_cpu / self.duration:.1%}（单核百分比），其中采样线程自身 "
+                 f"{self.sampler_cpu / self.duration:.1%}" if self.duration else "",
+                 "", "按插件:"]
+        lines += [f"  {percent(count)}  {count:7d}  {name}" for name, count in plugins.most_common()]
+        lines += ["", "按线程:"]
+        lines += [f"  {percent(count)}  {count:7d}  {name}" for name, count in threads.most_common()]
+        lines += ["", "线程CPU时间（含没有Python栈的原生线程）:"]
+        used = {native_id: seconds - self._cpu_start.get(native_id, 0.0)
+                for native_id, seconds in self._cpu_end.items()}
+        for native_id, seconds in sorted(used.items(), key=lambda item: -item[1]):
+            if seconds > 0:
+                name = self._thread_names.get(native_id, f"native-{native_id}")
+                lines.append(f"  {seconds * 1000:8.0f}ms  {name}")
+        lines += ["", f"自身耗时最多的函数（前 {TOP_FUNCTIONS} 个）:"]
+        lines += [f"  {percent(count)}  {count:7d}  {_label(code)}" for code, count in
+                  self_counts.most_common(TOP_FUNCTIONS)]
+        lines += ["", f"含调用耗时最多的函数（前 {TOP_FUNCTIONS} 个）:"]
+        lines += [f"  {percent(count)}  {count:7d}  {_label(code)}" for code, count in
+                  total_counts.most_common(TOP_FUNCTIONS)]
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory=None, prefix=None):
+        """
+        写出折叠栈和汇总报告
+
+        Returns:
+            tuple: (折叠栈文件路径, 汇总报告文件路径)
+        """
+        directory = directory or get_app_data_dir("profiles")
+        prefix = prefix or time.strftime("profile-%Y%m%d-%H%M%S")
+        collapsed_path = os.path.join(directory, prefix + ".collapsed")
+        summary_path = os.path.join(directory, prefix + ".txt")
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        with open(summary_path, "w", encoding="utf-8") as f:
+            f.write(self.summary())
+        return collapsed_path, summary_path
+
+
+def is_profiling():
+    return _profiler is not None
+
+
+def start_profiling(plugin_manager=None, interval_ms=DEFAULT_INTERVAL_MS, cpu_only=True):
+    """开始采样（已在采样时保持不变）"""
+    global _profiler
+    if _profiler is None:
+        _profiler = SamplingProfiler(plugin_manager, interval_ms, cpu_only)
+        _profiler.start()
+        logger.info(f"开始CPU采样分析（间隔 {interval_ms}ms）", extra={'event': 'profile_start'})
+    return _profiler
+
+
+def stop_profiling(directory=None):
+    """
+    停止采样并写出结果（数据目录 profiles/）
+
+    Returns:
+        tuple: (折叠栈文件路径, 汇总报告文件路径)，未在采样时为 None
+    """
+    global _profiler
+    current, _profiler = _profiler, None
+    if current is None:
+        return None
+    current.stop()
+    paths = current.write(directory)
+    logger.info(f"CPU采样分析已保存: {paths[1]}（{current.samples} 个样本）", extra={'event': 'profile_saved'})
+    return paths
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+from collections import namedtuple, deque
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from Utils.AppPaths import get_app_data_dir
+from Utils.LogService import get_logger
+
+logger = get_logger("quality")
+
+# 决策日志超过此大小时轮转为 governor.jsonl.1（只保留一份）
+LOG_MAX_BYTES = 1024 * 1024
+
+QualityLevel = namedtuple(
+    "QualityLevel",
+    ["name", "playback_rate", "decode_scale", "overlay_fps", "plugin_tick_scale"]
+)
+
+# 从高到低排列的画质档位
+QUALITY_LEVELS = [
+    QualityLevel("full", 1.0, 1.0, 30, 1.0),
+    QualityLevel("high", 1.0, 0.75, 20, 1.5),
+    QualityLevel("medium", 1.0, 0.5, 15, 2.0),
+    QualityLevel("low", 0.75, 0.5, 10, 3.0),
+    QualityLevel("minimal", 0.5, 0.25, 5, 4.0),
+]
+
+
+class QualityGovernor(QObject):
+    """
+    根据实时CPU占用自动调整画质的调节器
+
+    CPU预算以单核百分比表示（与 psutil 的进程 cpu_percent 一致，100 表示占满一个核心）。
+    平滑后的占用连续超出预算时降一档；连续低于 预算*headroom 时升一档；
+    两次调整之间至少间隔 cooldown 秒，避免来回震荡。每次决策都会写入日志。
+    """
+    level_changed = pyqtSignal(object)  # QualityLevel
+
+    def __init__(self, cpu_budget=5.0, enabled=True, down_samples=2, up_samples=5,
+                 headroom=0.6, cooldown=10.0, smoothing=0.5, log_path=None, parent=None):
+        super().__init__(parent)
+        self.cpu_budget = cpu_budget
+        self.enabled = enabled
+        self.down_samples = down_samples
+        self.up_samples = up_samples
+        self.headroom = headroom
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.log_path = log_path or os.path.join(get_app_data_dir("logs"), "governor.jsonl")
+
+        self.level_index = 0
+        self.smoothed_cpu = None
+        self._over_count = 0
+        self._under_count = 0
+        self._last_change = 0.0
+        self.decisions = deque(maxlen=200)
+
+    @property
+    def level(self):
+        return QUALITY_LEVELS[self.level_index]
+
+    def configure(self, cpu_budget=None, enabled=None):
+        """更新预算或启用状态；禁用时恢复到最高画质"""
+        if cpu_budget is not None and cpu_budget != self.cpu_budget:
+            self.cpu_budget = cpu_budget
+            self._log_decision("budget", self.level_index, self.level_index, None)
+        if enabled is not None and enabled != self.enabled:
+            self.enabled = enabled
+            self._over_count = self._under_count = 0
+            if not enabled and self.level_index != 0:
+                self._set_level(0, "disabled", None)
+
+    def on_sample(self, cpu_percent, memory_mb=None):
+        """接收一次CPU采样（连接到 ProcessMonitor.update_signal）"""
+        if self.smoothed_cpu is None:
+            self.smoothed_cpu = cpu_percent
+        else:
+            self.smoothed_cpu = self.smoothing * cpu_percent + (1 - self.smoothing) * self.smoothed_cpu
+
+        if not self.enabled:
+            return
+
+        if self.smoothed_cpu > self.cpu_budget:
+            self._over_count += 1
+            self._under_count = 0
+        elif self.smoothed_cpu < self.cpu_budget * self.headroom:
+            self._under_count += 1
+            self._over_count = 0
+        else:
+            self._over_count = self._under_count = 0
+
+        if time.monotonic() - self._last_change < self.cooldown:
+            return
+
+        if self._over_count >= self.down_samples and self.level_index < len(QUALITY_LEVELS) - 1:
+            self._set_level(self.level_index + 1, "step_down", cpu_percent)
+        elif self._under_count >= self.up_samples and self.level_index > 0:
+            self._set_level(self.level_index - 1, "step_up", cpu_percent)
+
+    def _set_level(self, index, action, cpu_percent):
+        previous = self.level_index
+        self.level_index = index
+        self._over_count = self._under_count = 0
+        self._last_change = time.monotonic()
+        self._log_decision(action, previous, index, cpu_percent)
+        self.level_changed.emit(self.level)
+
+    def _log_decision(self, action, previous, current, cpu_percent):
+        record = {
+            'ts': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'action': action,
+            'from': QUALITY_LEVELS[previous].name,
+            'to': QUALITY_LEVELS[current].name,
+            'cpu': None if cpu_percent is None else round(cpu_percent, 2),
+            'smoothed_cpu': None if self.smoothed_cpu is None else round(self.smoothed_cpu, 2),
+            'budget': self.cpu_budget,
+        }
+        self.decisions.append(record)
+        logger.info(f"画质调节: {record['action']} {record['from']} -> {record['to']} "
+                    f"(CPU {record['smoothed_cpu']}% / 预算 {record['budget']}%)",
+                    extra={'event': 'quality_' + action, 'fields': record})
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= LOG_MAX_BYTES:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"写入画质调节日志失败: {e}")
@@ -0,0 +1,147 @@
+import os
+import json
+import zlib
+import bisect
+import hashlib
+
+from PyQt5.QtGui import QImage
+
+# 帧的保存格式：rgb32 原样保存（播放时不做任何处理），rgb16 内存减半（颜色精度降低），
+# zlib 无损压缩（内存最少，播放每帧需要解压）
+STORE_FORMATS = ("rgb32", "rgb16", "zlib")
+DEFAULT_STORE_FORMAT = "rgb16"
+DEFAULT_MAX_SECONDS = 10.0
+DEFAULT_MAX_MB = 1024
+ZLIB_LEVEL = 1
+
+
+class FrameStore:
+    """
+    内存中的解码帧
+
+    帧按到达顺序追加，附带播放位置（秒）；与上一帧像素完全相同的帧共用一份数据，
+    播放时可据此跳过重绘。add() 可在解码线程调用，读取只在 finish() 之后进行。
+    """
+
+    def __init__(self, store_format=DEFAULT_STORE_FORMAT):
+        if store_format not in STORE_FORMATS:
+            raise ValueError(f"未知的帧保存格式: {store_format}，可选: {', '.join(STORE_FORMATS)}")
+        self.store_format = store_format
+        self.clear()
+
+    def clear(self):
+        self.timestamps = []
+        self.frame_entries = []  # 帧序号 -> 数据序号
+        self._entries = []
+        self._last = None
+        self.memory_bytes = 0
+        self.duration = 0.0
+        self.frame_size = None
+        self._decoded_index = -1
+        self._decoded = None
+
+    @property
+    def frames(self):
+        return len(self.frame_entries)
+
+    @property
+    def stored_frames(self):
+        return len(self._entries)
+
+    def add(self, image, timestamp):
+        """
+        保存一帧（image 之后可能被解码方复用，这里会复制）
+
+        Returns:
+            QImage: 可直接显示的副本
+        """
+        if self.store_format == "rgb32":
+            converted = image.copy()
+            key = payload = converted
+            size = converted.sizeInBytes()
+        elif self.store_format == "rgb16":
+            converted = image.convertToFormat(QImage.Format_RGB16)
+            key = payload = converted
+            size = converted.sizeInBytes()
+        else:
+            raw = image.constBits().asstring(image.sizeInBytes())
+            converted = self._wrap(raw, image.width(), image.height(), image.bytesPerLine(), image.format())
+            key, payload, size = raw, None, 0
+        self.frame_size = image.size()
+        self.timestamps.append(timestamp)
+        if self._last is not None and key == self._last:
+            # 与上一帧相同（静止画面），不再占用内存
+            self.frame_entries.append(len(self._entries) - 1)
+            return converted
+        if payload is None:
+            payload = (zlib.compress(key, ZLIB_LEVEL), image.width(), image.height(), image.bytesPerLine(),
+                       image.format())
+            size = len(payload[0])
+        self._entries.append(payload)
+        self._last = key
+        self.memory_bytes += size
+        self.frame_entries.append(len(self._entries) - 1)
+        return converted
+
+    @staticmethod
+    def _wrap(data, width, height, bytes_per_line, image_format):
+        image = QImage(data, width, height, bytes_per_line, image_format)
+        image.raw = data  # 保持像素数据的引用
+        return image
+
+    def finish(self, duration):
+        """采集结束：丢弃用于比较的上一帧并确定循环时长"""
+        self._last = None
+        self.duration = duration
+
+    def frame_interval(self):
+        """相邻帧间隔的中位数（秒）"""
+        gaps = sorted(b - a for a, b in zip(self.timestamps, self.timestamps[1:]) if b > a)
+        return gaps[len(gaps) // 2] if gaps else 1.0 / 30
+
+    def index_at(self, position):
+        """position 秒时应显示的帧序号"""
+        return max(0, bisect.bisect_right(self.timestamps, position) - 1)
+
+    def image(self, entry_index):
+        """按数据序号取出可显示的帧（zlib 格式时解压，最近一次的结果会被缓存）"""
+        payload = self._entries[entry_index]
+        if self.store_format != "zlib":
+            return payload
+        if entry_index != self._decoded_index:
+            data, width, height, bytes_per_line, image_format = payload
+            self._decoded = self._wrap(zlib.decompress(data), width, height, bytes_per_line, image_format)
+            self._decoded_index = entry_index
+        return self._decoded
+
+
+def _report_key(video_path):
+    normalized = os.path.normcase(os.path.abspath(video_path)).encode("utf-8")
+    return f"ram_loop/reports/{hashlib.sha1(normalized).hexdigest()[:16]}"
+
+
+def save_report(settings, video_path, report):
+    """保存某个视频最近一次内存循环的结果（见 RamLoopBackend 的 report_callback）"""
+    settings.setValue(_report_key(video_path), json.dumps(report))
+
+
+def load_report(settings, video_path):
+    """读取保存的结果，没有记录时返回 None"""
+    value = settings.value(_report_key(video_path), "")
+    try:
+        return json.loads(value) if value else None
+    except ValueError:
+        return None
+
+
+def format_report(report):
+    """把结果整理为设置窗口中显示的一行说明"""
+    if report.get('mode') == "ram":
+        return (f"内存循环：{report['frames']} 帧 {report['frame_size']}（{report['format']}），"
+                f"占用内存 {report['memory_mb']:.0f} MB；进程CPU 解码时 {report['decode_cpu_percent']:.1f}% → "
+                f"内存播放 {report['ram_cpu_percent']:.1f}%")
+    if report.get('reason') == "too_long":
+        return (f"内存循环：时长 {report['duration']:.1f}s 超过上限 {report['limit']:.0f}s，"
+                f"已按普通解码播放")
+    return (f"内存循环：预计占用 {report['estimated_mb']:.0f} MB 超过上限 {report['limit']:.0f} MB，"
+            f"已按普通解码播放")
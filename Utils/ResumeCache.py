@@ -0,0 +1,146 @@
+import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt, QSettings
+from PyQt5.QtGui import QImage
+
+from Utils.AppPaths import get_app_data_dir
+from Utils.LogService import get_logger
+
+logger = get_logger("resume_cache")
+
+DEFAULT_MAX_ENTRIES = 16
+STILL_QUALITY = 90
+# 距离结尾不足这么多秒的位置不再恢复，从头播放
+END_MARGIN = 2.0
+
+
+class ResumeCache:
+    """
+    每个视频最后显示的画面和播放位置，用于启动时立即显示画面并从上次的位置继续
+
+    画面按屏幕大小保存为 JPEG（数据目录 resume/），位置保存在设置中（resume/<键>）。
+    缩放和编码在后台线程进行，GUI线程只复制一次帧；画面数超过 max_entries 时删除最久未更新的。
+    """
+
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MAX_ENTRIES, settings=None):
+        self.cache_dir = cache_dir or get_app_data_dir("resume")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_entries = max_entries
+        self.settings = settings or QSettings("VideoWallpaper", "Settings")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resume-cache")
+
+    @staticmethod
+    def _key(video_path):
+        normalized = os.path.normcase(os.path.abspath(video_path)).encode("utf-8")
+        return hashlib.sha1(normalized).hexdigest()[:16]
+
+    def _still_path(self, video_path):
+        return os.path.join(self.cache_dir, self._key(video_path) + ".jpg")
+
+    # ---- 读取（GUI线程） ----
+
+    def load_still(self, video_path, size=None):
+        """
+        读取保存的画面
+
+        Args:
+            size (QSize): 屏幕大小，保存的画面大小不同（分辨率已变化）时按此缩放
+
+        Returns:
+            QImage: 没有保存的画面时为 None
+        """
+        path = self._still_path(video_path)
+        if not os.path.exists(path):
+            return None
+        image = QImage(path)
+        if image.isNull():
+            return None
+        if size is not None and image.size() != size:
+            image = image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        return image
+
+    def position(self, video_path, duration=0.0):
+        """
+        上次的播放位置（秒），没有记录或已接近结尾时为 0
+
+        Args:
+            duration (float): 媒体时长，已知时用于判断是否接近结尾
+        """
+        position = self.settings.value(f"resume/{self._key(video_path)}", 0.0, type=float)
+        if duration and position >= duration - END_MARGIN:
+            return 0.0
+        return max(0.0, position)
+
+    # ---- 保存 ----
+
+    def save_position(self, video_path, position):
+        self.settings.setValue(f"resume/{self._key(video_path)}", round(position, 2))
+
+    def save_still(self, image, video_path, size):
+        """
+        在后台把画面缩放到 size 并写入（image 由调用方复制，之后不再修改）
+        """
+        self._executor.submit(self._write_still, image, self._still_path(video_path), size)
+
+    def save_still_file(self, source_path, video_path, size):
+        """把后端生成的截图文件（例如 VLC 快照）转换为保存的画面，之后删除源文件"""
+        self._executor.submit(self._convert_still_file, source_path, self._still_path(video_path), size)
+
+    def _convert_still_file(self, source_path, path, size):
+        try:
+            image = QImage(source_path)
+            if not image.isNull():
+                self._write_still(image, path, size)
+        finally:
+            try:
+                os.remove(source_path)
+            except OSError:
+                pass
+
+    def _write_still(self, image, path, size):
+        start = time.perf_counter()
+        if image.size() != size:
+            image = image.scaled(size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        temp_path = path + ".tmp"
+        # 写入临时文件再替换，启动时不会读到写了一半的画面
+        if not image.save(temp_path, "JPG", STILL_QUALITY):
+            logger.warning(f"保存画面失败: {path}")
+            return
+        try:
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"保存画面失败: {e}")
+            return
+        logger.debug("已保存画面", extra={'event': 'resume_still_saved',
+                                          'duration_ms': round((time.perf_counter() - start) * 1000, 1)})
+        self._prune()
+
+    def _prune(self):
+        stills = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".jpg")]
+        if len(stills) <= self.max_entries:
+            return
+        stills.sort(key=lambda path: os.path.getmtime(path))
+        for path in stills[:len(stills) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def snapshot_path(self, video_path):
+        """后端截图的临时文件路径"""
+        return os.path.join(self.cache_dir, self._key(video_path) + ".snapshot.png")
+
+    def forget(self, video_path):
+        self.settings.remove(f"resume/{self._key(video_path)}")
+        try:
+            os.remove(self._still_path(video_path))
+        except OSError:
+            pass
+
+    def shutdown(self):
+        """等待未完成的画面写入（退出时调用）"""
+        self._executor.shutdown(wait=True)
+        self.settings.sync()
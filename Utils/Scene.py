@@ -0,0 +1,294 @@
+import os
+import json
+
+from PyQt5.QtWidgets import QWidget, QLabel
+from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtGui import QPainter, QFont, QColor, QBitmap
+
+from Utils.LogService import get_logger
+
+logger = get_logger("scene")
+
+SCENE_EXTENSIONS = (".json", ".toml")
+LAYER_TYPES = ("image", "text")
+
+
+class SceneError(Exception):
+    """场景文件无法读取或格式不正确"""
+    pass
+
+
+def is_scene_file(path):
+    return bool(path) and path.lower().endswith(SCENE_EXTENSIONS)
+
+
+class Scene:
+    """
+    场景：一个视频或图片背景，加上若干图片和文字图层，以及本场景使用的插件和插件设置
+
+    Attributes:
+        background (dict): {'source': 绝对路径, 'loop': bool 或 None（沿用界面设置）, 'backend': 后端名或 None}
+        layers (list): 规范化后的图层 dict（见 load_scene），按从下到上的顺序
+        plugins (dict): 插件名 -> 覆盖的设置 dict；为 None 时不改变插件的启用状态和设置
+    """
+    __slots__ = ("path", "name", "background", "layers", "plugins")
+
+    def __init__(self, path, name, background, layers, plugins):
+        self.path = path
+        self.name = name
+        self.background = background
+        self.layers = layers
+        self.plugins = plugins
+
+
+def _parse(path):
+    try:
+        if path.lower().endswith(".toml"):
+            try:
+                import tomllib
+            except ImportError:
+                raise SceneError("读取 TOML 场景文件需要 Python 3.11 及以上版本，请改用 JSON")
+            with open(path, "rb") as f:
+                return tomllib.load(f)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except OSError as e:
+        raise SceneError(f"无法读取场景文件: {e}")
+    except ValueError as e:
+        # json.JSONDecodeError 和 tomllib.TOMLDecodeError 都是 ValueError
+        raise SceneError(f"场景文件格式错误: {e}")
+
+
+def _number(spec, key, default, minimum=None, maximum=None):
+    value = spec.get(key, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SceneError(f"图层的 {key} 应为数字")
+    if minimum is not None:
+        value = max(minimum, value)
+    if maximum is not None:
+        value = min(maximum, value)
+    return float(value)
+
+
+def _normalize_layer(spec, base_dir, index):
+    if not isinstance(spec, dict):
+        raise SceneError(f"第 {index + 1} 个图层应为对象")
+    layer_type = spec.get("type", "image")
+    if layer_type not in LAYER_TYPES:
+        raise SceneError(f"第 {index + 1} 个图层的类型 {layer_type} 未知，可选: {', '.join(LAYER_TYPES)}")
+    layer = {
+        'type': layer_type,
+        'x': _number(spec, "x", 0.0),
+        'y': _number(spec, "y", 0.0),
+        'opacity': _number(spec, "opacity", 1.0, 0.0, 1.0),
+    }
+    if layer_type == "image":
+        source = spec.get("source")
+        if not isinstance(source, str) or not source:
+            raise SceneError(f"第 {index + 1} 个图层缺少 source")
+        layer['source'] = os.path.abspath(os.path.join(base_dir, source))
+        layer['width'] = _number(spec, "width", None, 0.0)
+        layer['height'] = _number(spec, "height", None, 0.0)
+    else:
+        color = spec.get("color", "#FFFFFF")
+        if not QColor(color).isValid():
+            raise SceneError(f"第 {index + 1} 个图层的颜色 {color} 无效")
+        layer.update({
+            'text': str(spec.get("text", "")),
+            'font': str(spec.get("font", "")),
+            'size': _number(spec, "size", 32, 1.0),
+            'color': color,
+            'bold': bool(spec.get("bold", False)),
+        })
+    return layer
+
+
+def _normalize_plugins(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        value = {name: {} for name in value}
+    if not isinstance(value, dict):
+        raise SceneError("plugins 应为插件名列表，或插件名到设置的映射")
+    plugins = {}
+    for name, settings in value.items():
+        settings = settings or {}
+        if not isinstance(settings, dict):
+            raise SceneError(f"插件 {name} 的设置应为对象")
+        plugins[str(name)] = dict(settings)
+    return plugins
+
+
+def load_scene(path):
+    """
+    读取场景文件（.json，或 Python 3.11+ 下的 .toml）
+
+    图片路径相对于场景文件所在目录；x、y、width、height 是相对屏幕宽高的比例，
+    只指定 width 或 height 之一时按图片宽高比计算另一个，都不指定时按图片原始大小显示。
+
+    Raises:
+        SceneError: 无法读取、格式错误或背景文件不存在
+    """
+    path = os.path.abspath(path)
+    data = _parse(path)
+    if not isinstance(data, dict):
+        raise SceneError("场景文件的顶层应为对象")
+    base_dir = os.path.dirname(path)
+
+    background = data.get("background")
+    if isinstance(background, str):
+        background = {"source": background}
+    if not isinstance(background, dict) or not isinstance(background.get("source"), str):
+        raise SceneError("场景缺少背景（background.source 为视频或图片路径）")
+    source = os.path.abspath(os.path.join(base_dir, background["source"]))
+    if not os.path.exists(source):
+        raise SceneError(f"背景文件不存在: {source}")
+    loop = background.get("loop")
+
+    layers = data.get("layers", [])
+    if not isinstance(layers, list):
+        raise SceneError("layers 应为列表")
+
+    return Scene(
+        path=path,
+        name=str(data.get("name") or os.path.splitext(os.path.basename(path))[0]),
+        background={'source': source, 'loop': None if loop is None else bool(loop),
+                    'backend': background.get("backend") or None},
+        layers=[_normalize_layer(spec, base_dir, index) for index, spec in enumerate(layers)],
+        plugins=_normalize_plugins(data.get("plugins")),
+    )
+
+
+class _ImageLayer(QWidget):
+    """图片图层：图片加载完成后按图层大小缩放一次，带透明通道时以不透明区域作为遮罩"""
+
+    def __init__(self, canvas, layer):
+        super().__init__(canvas)
+        self.layer = layer
+        self.image = None
+        self.setAttribute(Qt.WA_TransparentForMouseEvents, True)
+        self.hide()
+
+    def set_image(self, image):
+        screen = self.parentWidget().size()
+        width, height = self.layer['width'], self.layer['height']
+        if width is None and height is None:
+            size = image.size()
+        elif height is None:
+            size = image.size().scaled(QSize(round(width * screen.width()), 1 << 30), Qt.KeepAspectRatio)
+        elif width is None:
+            size = image.size().scaled(QSize(1 << 30, round(height * screen.height())), Qt.KeepAspectRatio)
+        else:
+            size = QSize(round(width * screen.width()), round(height * screen.height()))
+        if size.isEmpty():
+            return
+        self.image = image if size == image.size() else image.scaled(size, Qt.IgnoreAspectRatio,
+                                                                    Qt.SmoothTransformation)
+        self.setGeometry(round(self.layer['x'] * screen.width()), round(self.layer['y'] * screen.height()),
+                         size.width(), size.height())
+        if self.image.hasAlphaChannel():
+            # 覆盖层按控件遮罩计算窗口区域，透明部分不遮挡桌面
+            self.setMask(QBitmap.fromImage(self.image.createAlphaMask()))
+        self.show()
+        self.update()
+
+    def paintEvent(self, event):
+        if self.image is None:
+            return
+        painter = QPainter(self)
+        painter.setOpacity(self.layer['opacity'])
+        painter.drawImage(0, 0, self.image)
+        painter.end()
+
+
+def _text_layer(canvas, layer):
+    label = QLabel(layer['text'], canvas)
+    label.setAttribute(Qt.WA_TransparentForMouseEvents, True)
+    font = QFont(layer['font']) if layer['font'] else QFont()
+    font.setPixelSize(round(layer['size']))
+    font.setBold(layer['bold'])
+    label.setFont(font)
+    color = QColor(layer['color'])
+    color.setAlphaF(color.alphaF() * layer['opacity'])
+    label.setStyleSheet(f"color: rgba({color.red()}, {color.green()}, {color.blue()}, {color.alpha()});"
+                        "background: transparent;")
+    label.adjustSize()
+    screen = canvas.size()
+    label.move(round(layer['x'] * screen.width()), round(layer['y'] * screen.height()))
+    label.show()
+    return label
+
+
+class _LayerEntry:
+    """SceneView 中的一个图层：图层定义、控件、持有的图片摘要"""
+    __slots__ = ("layer", "widget", "digest", "alive")
+
+    def __init__(self, layer, widget):
+        self.layer = layer
+        self.widget = widget
+        self.digest = None
+        self.alive = True
+
+
+class SceneView:
+    """
+    把场景图层放到覆盖层画布上（位于插件控件之下），图片通过 AssetCache 延迟加载并共享
+
+    apply() 切换场景时，与当前场景完全相同的图层原样保留，只创建和加载变化的部分。
+    """
+
+    def __init__(self, canvas, assets):
+        self.canvas = canvas
+        self.assets = assets
+        self._entries = []
+
+    def apply(self, scene):
+        """显示场景的图层"""
+        previous = self._entries
+        entries = []
+        for layer in scene.layers:
+            reused = next((entry for entry in previous if entry.layer == layer), None)
+            if reused is not None:
+                previous.remove(reused)
+                entries.append(reused)
+            else:
+                entries.append(self._create(layer))
+        self._entries = entries
+        # 先创建新图层（取得图片引用）再释放旧图层，两个场景共用的图片不会被丢弃后重新解码
+        for entry in previous:
+            self._destroy(entry)
+        for entry in reversed(entries):
+            entry.widget.lower()  # 列表中越靠前越靠下，全部位于插件控件之下
+        logger.info(f"已显示场景: {scene.name}（{len(entries)} 个图层，移除 {len(previous)} 个）",
+                    extra={'event': 'scene_applied'})
+
+    def _create(self, layer):
+        if layer['type'] == "text":
+            return _LayerEntry(layer, _text_layer(self.canvas, layer))
+        entry = _LayerEntry(layer, _ImageLayer(self.canvas, layer))
+
+        def loaded(digest, image):
+            if digest is None:
+                return
+            if not entry.alive:
+                self.assets.release(digest)  # 加载完成之前图层已被移除
+                return
+            entry.digest = digest
+            entry.widget.set_image(image)
+
+        self.assets.request(layer['source'], loaded)
+        return entry
+
+    def _destroy(self, entry):
+        entry.alive = False
+        if entry.digest is not None:
+            self.assets.release(entry.digest)
+            entry.digest = None
+        entry.widget.deleteLater()
+
+    def clear(self):
+        for entry in self._entries:
+            self._destroy(entry)
+        self._entries = []
@@ -0,0 +1,352 @@
+import os
+import sys
+import time
+import inspect
+import threading
+import multiprocessing
+import importlib.util
+from collections import deque, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import psutil
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+
+from Utils.LogService import get_logger
+from Utils import Metrics
+from Utils import Tracing
+from Utils.ThreadPool import DaemonThreadPoolExecutor
+
+logger = get_logger("tasks")
+
+DEFAULT_MAX_QUEUED = 32  # 每个插件最多排队的任务数
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+CANCELLED = "cancelled"
+
+_current = threading.local()
+
+
+def default_concurrency():
+    """默认并发上限：给视频解码和GUI线程留出两个核心，最多4个"""
+    return max(1, min(4, (os.cpu_count() or 2) - 2))
+
+
+def current_task():
+    """在线程池任务中返回正在执行的 Task（长任务可检查 cancelled 提前结束），其他情况返回 None"""
+    return getattr(_current, "task", None)
+
+
+class TaskQueueFull(Exception):
+    """插件排队中的任务数已达上限"""
+    pass
+
+
+class Task:
+    """一个后台任务，submit() 的返回值"""
+    __slots__ = ("service", "fn", "args", "kwargs", "callback", "errback", "owner", "process", "state",
+                 "_cancelled")
+
+    def __init__(self, service, fn, args, kwargs, callback, errback, owner, process):
+        self.service = service
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.callback = callback
+        self.errback = errback
+        self.owner = owner
+        self.process = process
+        self.state = QUEUED
+        self._cancelled = False
+
+    @property
+    def cancelled(self):
+        """已取消，或所属插件已被禁用（可在任意线程读取）"""
+        return self._cancelled or (self.owner is not None and not self.owner.enabled)
+
+    def cancel(self):
+        """取消任务：未开始的不再执行，已开始的结果被丢弃（进程池中的任务无法中断）"""
+        if self.state in (QUEUED, RUNNING):
+            self.service.cancel(self)
+
+    def _release(self):
+        """任务结束后不再持有函数、参数和回调（其中通常引用着插件）"""
+        self.fn = self.args = self.kwargs = self.callback = self.errback = None
+
+
+def _process_target(fn):
+    """
+    进程池任务的可序列化引用
+
+    能按 模块名.限定名 找到的函数直接传递；插件模块不在 sys.modules 中，
+    改为传递 (文件路径, 模块名, 限定名)，由子进程按路径导入
+    """
+    qualname = getattr(fn, "__qualname__", None)
+    module = sys.modules.get(getattr(fn, "__module__", None))
+    bound_to = getattr(fn, "__self__", None)  # 内置函数的 __self__ 是所在模块
+    if not qualname or "<" in qualname or (bound_to is not None and not inspect.ismodule(bound_to)):
+        raise ValueError("进程池任务必须是模块顶层函数（不能是 lambda、闭包或绑定方法）")
+    if module is not None and _resolve(vars(module), qualname) is fn:
+        return fn
+    namespace = getattr(fn, "__globals__", {})
+    if not namespace.get("__file__") or _resolve(namespace, qualname) is not fn:
+        raise ValueError(f"无法在子进程中找到函数 {qualname}")
+    return namespace["__file__"], fn.__module__, qualname
+
+
+def _resolve(namespace, qualname):
+    """按限定名（可含类名，例如 Parser.parse）在模块命名空间中查找对象，找不到时返回 None"""
+    first, *rest = qualname.split(".")
+    target = namespace.get(first)
+    for part in rest:
+        target = getattr(target, part, None)
+    return target
+
+
+_process_modules = {}
+
+
+def _run_in_process(target, args, kwargs):
+    """子进程：解析函数引用并执行"""
+    if isinstance(target, tuple):
+        path, module_name, qualname = target
+        module = _process_modules.get(path)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(module_name, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            _process_modules[path] = module
+        target = _resolve(vars(module), qualname)
+    return target(*args, **kwargs)
+
+
+def _lower_priority():
+    """子进程初始化：降低优先级，CPU紧张时让出给解码和界面"""
+    try:
+        process = psutil.Process()
+        process.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS if sys.platform == "win32" else 10)
+    except (psutil.Error, OSError):
+        pass
+
+
+class TaskService(QObject):
+    """
+    插件的后台任务服务
+
+    - 任务在宿主管理的线程池中执行，纯CPU计算可选择进程池（不受GIL限制）
+    - 线程池和进程池共用一个并发上限，插件再多也不会占满解码需要的核心；
+      超出上限的任务按提交顺序排队，每个插件的排队数有上限，超出时 submit 抛出 TaskQueueFull
+    - 结果通过信号回到GUI线程，在GUI线程调用 callback / errback
+    - 插件被禁用、卸载或壁纸停止时，未开始的任务被取消，已开始的任务结果被丢弃
+    """
+    _finished = pyqtSignal(object, object, object)  # task, result, error
+
+    def __init__(self, max_workers=None, max_queued=DEFAULT_MAX_QUEUED, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers or default_concurrency()
+        self.max_queued = max_queued
+        self._threads = None
+        self._processes = None
+        self._queue = deque()
+        self._queued = defaultdict(int)  # owner -> 排队中的任务数
+        self._running = set()
+        self._closed = False
+
+        self.submitted = Metrics.counter("plugin_tasks.submitted", "插件提交的后台任务数")
+        self.rejected = Metrics.counter("plugin_tasks.rejected", "排队已满而被拒绝的任务数")
+        self.cancelled = Metrics.counter("plugin_tasks.cancelled", "被取消或结果被丢弃的任务数")
+        self.failed = Metrics.counter("plugin_tasks.failed", "执行出错的任务数")
+        # 跨线程发出时本来就是排队连接；同步完成的 future 也一律经过事件循环，回调时机保持一致
+        self._finished.connect(self._on_finished, Qt.QueuedConnection)
+
+    @property
+    def running(self):
+        return len(self._running)
+
+    @property
+    def queued(self):
+        return len(self._queue)
+
+    def submit(self, fn, *args, callback=None, errback=None, owner=None, process=False, **kwargs):
+        """
+        提交后台任务
+
+        Args:
+            fn (callable): fn(*args, **kwargs)，不可操作控件
+            callback (callable): callback(result)，在GUI线程执行
+            errback (callable): errback(Exception)，在GUI线程执行；未提供时记录错误日志
+            owner: 所属插件
+            process (bool): 在进程池中执行；fn 须为模块顶层函数，参数和返回值须可序列化
+
+        Returns:
+            Task: 可用于 cancel()
+
+        Raises:
+            TaskQueueFull: 该插件排队的任务已达 max_queued
+            ValueError: process=True 时 fn 无法在子进程中找到
+        """
+        if self._closed:
+            raise RuntimeError("后台任务服务已关闭")
+        if process:
+            fn = _process_target(fn)
+        if self._queued.get(owner, 0) >= self.max_queued:
+            self.rejected.inc()
+            owner_name = getattr(owner, "name", "宿主")
+            raise TaskQueueFull(f"{owner_name} 已有 {self.max_queued} 个任务在排队")
+        task = Task(self, fn, args, kwargs, callback, errback, owner, process)
+        self.submitted.inc()
+        if task.cancelled:
+            # 插件已被禁用，不再执行
+            self._finish_cancelled(task)
+            return task
+        self._queue.append(task)
+        self._queued[owner] += 1
+        self._dispatch()
+        return task
+
+    # ---- 调度 ----
+
+    def _dequeued(self, task):
+        count = self._queued[task.owner] - 1
+        if count > 0:
+            self._queued[task.owner] = count
+        else:
+            del self._queued[task.owner]  # 不保留已卸载插件的引用
+
+    def _dispatch(self):
+        while self._queue and len(self._running) < self.max_workers:
+            task = self._queue.popleft()
+            self._dequeued(task)
+            if task.cancelled:
+                self._finish_cancelled(task)
+                continue
+            task.state = RUNNING
+            self._running.add(task)
+            try:
+                if task.process:
+                    future = self._process_pool().submit(_run_in_process, task.fn, task.args, task.kwargs)
+                else:
+                    future = self._thread_pool().submit(self._run, task)
+            except (RuntimeError, BrokenProcessPool) as e:
+                self._finished.emit(task, None, e)
+                continue
+            future.add_done_callback(lambda done, task=task: self._on_future_done(task, done))
+
+    def _thread_pool(self):
+        if self._threads is None:
+            self._threads = DaemonThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="plugin-task")
+        return self._threads
+
+    def _process_pool(self):
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_lower_priority)
+        return self._processes
+
+    @staticmethod
+    def _run(task):
+        """工作线程：执行任务并记录追踪区间"""
+        _current.task = task
+        start = time.perf_counter()
+        try:
+            return task.fn(*task.args, **task.kwargs)
+        finally:
+            _current.task = None
+            recorder = Tracing.recorder()
+            if recorder is not None:
+                recorder.complete("plugin.task", "plugin", start, time.perf_counter(),
+                                  {'plugin': getattr(task.owner, "name", None),
+                                   'function': getattr(task.fn, "__qualname__", None)})
+
+    def _on_future_done(self, task, future):
+        """工作线程（或进程池的管理线程）：把结果交回GUI线程"""
+        if future.cancelled():
+            self._finished.emit(task, None, None)
+            return
+        error = future.exception()
+        self._finished.emit(task, None if error is not None else future.result(), error)
+
+    def _on_finished(self, task, result, error):
+        self._running.discard(task)
+        if isinstance(error, BrokenProcessPool):
+            # 子进程异常退出后进程池不可再用，下次提交时重建
+            self._processes = None
+        if task.cancelled:
+            self._finish_cancelled(task)
+        else:
+            task.state = DONE
+            if error is None:
+                self._call(task, task.callback, result)
+            else:
+                self.failed.inc()
+                if task.errback is not None:
+                    self._call(task, task.errback, error)
+                else:
+                    owner_name = getattr(task.owner, "name", "宿主")
+                    logger.error(f"{owner_name} 的后台任务出错: {error!r}",
+                                 extra={'plugin': getattr(task.owner, "name", None), 'event': 'task_failed'})
+            task._release()
+        self._dispatch()
+
+    def _finish_cancelled(self, task):
+        task._cancelled = True
+        task.state = CANCELLED
+        task._release()
+        self.cancelled.inc()
+
+    @staticmethod
+    def _call(task, func, value):
+        if func is None:
+            return
+        try:
+            func(value)
+        except Exception as e:
+            owner_name = getattr(task.owner, "name", "宿主")
+            logger.error(f"{owner_name} 的任务回调出错: {e}", extra={'plugin': getattr(task.owner, "name", None)})
+
+    # ---- 取消 ----
+
+    def cancel(self, task):
+        if task.state == QUEUED:
+            self._queue.remove(task)
+            self._dequeued(task)
+            self._finish_cancelled(task)
+        elif task.state == RUNNING:
+            # 结束时在 _on_finished 中丢弃结果
+            task._cancelled = True
+
+    def cancel_owner(self, owner):
+        """取消某个插件的全部任务（插件卸载时调用）"""
+        self._cancel_where(lambda task: task.owner is owner)
+
+    def cancel_all(self):
+        """取消全部任务（壁纸停止时调用）"""
+        self._cancel_where(lambda task: True)
+
+    def _cancel_where(self, predicate):
+        keep = deque()
+        for task in self._queue:
+            if predicate(task):
+                self._dequeued(task)
+                self._finish_cancelled(task)
+            else:
+                keep.append(task)
+        self._queue = keep
+        for task in self._running:
+            if predicate(task):
+                task._cancelled = True
+
+    def shutdown(self):
+        """取消全部任务并停止线程池和进程池（不等待正在执行的任务，也不阻止程序退出）"""
+        self._closed = True
+        self.cancel_all()
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+            # 进程池在解释器退出时会等待执行中的任务，直接结束工作进程（程序中只有这里使用 multiprocessing）
+            for child in multiprocessing.active_children():
+                child.terminate()
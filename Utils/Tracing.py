@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+
+from Utils.AppPaths import get_app_data_dir
+from Utils.LogService import get_logger
+
+logger = get_logger("tracing")
+
+_recorder = None
+
+
+class TraceRecorder:
+    """
+    区间记录器，输出 Chrome Trace Event 格式（可在 Perfetto 或 chrome://tracing 中打开）
+
+    每个区间在结束时追加一条完整事件（ph="X"）到有界队列，deque.append 本身是线程安全的，
+    记录时不加锁；超出容量时丢弃最早的事件。
+    """
+
+    def __init__(self, capacity=200000):
+        self.events = deque(maxlen=capacity)
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.thread_names = {}
+
+    def complete(self, name, cat, start, end, args=None):
+        """记录一个已结束的区间，start/end 为 time.perf_counter() 的返回值"""
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        event = {'name': name, 'cat': cat, 'ph': "X", 'pid': self.pid, 'tid': tid,
+                 'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def instant(self, name, cat, args=None):
+        """记录一个瞬时事件"""
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        event = {'name': name, 'cat': cat, 'ph': "i", 's': "t", 'pid': self.pid, 'tid': tid,
+                 'ts': (time.perf_counter() - self.origin) * 1e6}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def to_json(self):
+        metadata = [{'name': "process_name", 'ph': "M", 'pid': self.pid, 'tid': 0,
+                     'args': {'name': "LiangYuPaper"}}]
+        metadata += [{'name': "thread_name", 'ph': "M", 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in list(self.thread_names.items())]
+        return {'traceEvents': metadata + list(self.events), 'displayTimeUnit': "ms"}
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "cat", "args", "start")
+
+    def __init__(self, recorder, name, cat, args):
+        self.recorder = recorder
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=exc_type.__name__)
+        self.recorder.complete(self.name, self.cat, self.start, time.perf_counter(), args)
+        return False
+
+
+class _NullSpan:
+    """未开启追踪时返回的共享空区间"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def recorder():
+    """当前的记录器，未开启追踪时为 None（热路径可先取一次再判断）"""
+    return _recorder
+
+
+def is_tracing():
+    return _recorder is not None
+
+
+def span(name, cat="host", **args):
+    """
+    追踪一个代码区间，未开启追踪时返回共享的空上下文管理器
+
+    用法:
+        with span("find_workerw"):
+            ...
+    """
+    current = _recorder
+    if current is None:
+        return _NULL_SPAN
+    return _Span(current, name, cat, args or None)
+
+
+def instant(name, cat="host", **args):
+    current = _recorder
+    if current is not None:
+        current.instant(name, cat, args or None)
+
+
+def start_tracing(capacity=200000):
+    """开始记录（已在记录时保持不变）"""
+    global _recorder
+    if _recorder is None:
+        _recorder = TraceRecorder(capacity)
+        logger.info("开始性能追踪", extra={'event': 'trace_start'})
+    return _recorder
+
+
+def stop_tracing(path=None):
+    """
+    停止记录并写出 Trace Event JSON
+
+    Args:
+        path (str): 输出路径，默认写入数据目录 traces/trace-时间.json
+
+    Returns:
+        str: 写出的文件路径，未在记录时为 None
+    """
+    global _recorder
+    current, _recorder = _recorder, None
+    if current is None:
+        return None
+    path = path or os.path.join(get_app_data_dir("traces"), time.strftime("trace-%Y%m%d-%H%M%S.json"))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(current.to_json(), f, ensure_ascii=False, default=str)
+    logger.info(f"性能追踪已保存: {path}（{len(current.events)} 个事件）", extra={'event': 'trace_saved'})
+    return path
@@ -0,0 +1,1402 @@
+"""
+LiangYuPaper 无界面基准测试
+
+在 QT_QPA_PLATFORM=offscreen 下使用合成帧媒体后端（null）运行，结果以JSON输出。
+
+用法:
+    python benchmark.py                                  # 运行全部基准，JSON输出到标准输出
+    python benchmark.py --output result.json             # 保存结果（可作为基线）
+    python benchmark.py --baseline base.json             # 与基线对比，出现退化时返回码为1
+    python benchmark.py --only plugin_load,dispatch      # 只运行指定的基准
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import types
+import platform
+import tempfile
+import statistics
+import threading
+import contextlib
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import psutil
+from PyQt5.QtWidgets import QApplication, QWidget, QMessageBox
+from PyQt5.QtCore import QSettings, QCoreApplication, QEventLoop, QEvent, QRect, QTimer
+from PyQt5.QtGui import QImage, QPainter
+
+SYNTHETIC_PLUGIN = '''from plugin_base import PluginBase
+
+
+class BenchPlugin(PluginBase):
+    def __init__(self):
+        super().__init__()
+        self.name = "bench_plugin_{index}"
+        self.counter = 0
+
+    def initialize(self, app_instance):
+        pass
+
+    def on_wallpaper_start(self, video_path, loop):
+        self.counter += 1
+
+    def on_wallpaper_stop(self):
+        self.counter += 1
+
+    def on_settings_changed(self, settings):
+        self.counter += len(settings)
+
+    def show_settings_dialog(self):
+        pass
+
+    def operate_on_window(self, window):
+        pass
+
+
+def create_plugin():
+    return BenchPlugin()
+'''
+
+# 各单位的噪声下限，差值小于该值时不判定为退化
+NOISE_FLOOR = {
+    'ms': 0.05,
+    'us': 2.0,
+    'MB': 2.0,
+    '%': 1.0,
+    'ops/s': 0.0,
+    'count': 0.0,
+}
+
+
+def _metric(value, unit, better="lower"):
+    return {'value': round(value, 4), 'unit': unit, 'better': better}
+
+
+def _time_ms(func, repeat=7, number=1):
+    """重复执行并返回单次调用耗时的中位数（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) * 1000 / number)
+    return statistics.median(samples)
+
+
+def _process_events(seconds):
+    """运行事件循环指定时长"""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        QCoreApplication.processEvents(QEventLoop.AllEvents, 50)
+        time.sleep(0.005)
+
+
+def _wait_until(predicate, timeout=5.0):
+    """运行事件循环直到条件满足或超时"""
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        QCoreApplication.processEvents(QEventLoop.AllEvents, 10)
+        time.sleep(0.0005)
+    return predicate()
+
+
+class _StubHttpHandler(BaseHTTPRequestHandler):
+    """本地替身HTTP服务：固定内容、带ETag，并统计收到的请求数"""
+    body = json.dumps({'temperature': 21, 'items': list(range(200))}).encode("utf-8")
+    etag = '"bench-v1"'
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        time.sleep(0.02)  # 模拟网络延迟，让并发请求有机会合并
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubVlcObject:
+    """替身 libvlc 对象：记录调用，不解码"""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, name):
+        def method(*args, **kwargs):
+            self.calls.append(name)
+            return _StubVlcObject(self.calls) if name in ("event_manager", "media_list_new") else 0
+        return method
+
+
+class _StubVlcMedia(_StubVlcObject):
+    def __init__(self, calls, path):
+        super().__init__(calls)
+        self.path = path
+        self.options = []
+
+    def add_option(self, option):
+        self.options.append(option)
+
+
+class _StubVlcInstance(_StubVlcObject):
+    def __init__(self, *args):
+        super().__init__([])
+        self.media = []  # 创建过的媒体，最后一个是当前播放列表中的媒体
+
+    def media_new(self, path):
+        media = _StubVlcMedia(self.calls, path)
+        self.media.append(media)
+        return media
+
+    def media_player_new(self):
+        return _StubVlcObject(self.calls)
+
+    def media_list_player_new(self):
+        return _StubVlcObject(self.calls)
+
+
+@contextlib.contextmanager
+def stub_vlc():
+    """用替身 vlc 模块代替 python-vlc，检查 VlcBackend 交给 libvlc 的媒体选项"""
+    module = types.ModuleType("vlc")
+    module.Instance = _StubVlcInstance
+    module.EventType = types.SimpleNamespace(MediaPlayerEndReached=1)
+    module.PlaybackMode = types.SimpleNamespace(default=0, loop=1)
+    module.State = types.SimpleNamespace(Playing=3)
+    saved = sys.modules.get("vlc")
+    sys.modules["vlc"] = module
+    try:
+        yield module
+    finally:
+        if saved is None:
+            sys.modules.pop("vlc", None)
+        else:
+            sys.modules["vlc"] = saved
+
+
+def silence_dialogs():
+    """模态对话框在无界面环境下会阻塞，基准测试中直接返回"""
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.warning = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.critical = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+
+
+class BenchContext:
+    """基准测试共享环境：临时目录、隔离的设置存储和数据目录"""
+
+    def __init__(self, args):
+        self.args = args
+        self.work_dir = tempfile.mkdtemp(prefix="liangyu_bench_")
+        # 数据目录（日志、缓存、续播画面、媒体库索引等）指向临时目录，不写入用户的真实数据目录
+        self._saved_appdata = os.environ.get("LOCALAPPDATA")
+        os.environ["LOCALAPPDATA"] = os.path.join(self.work_dir, "appdata")
+        self.video_path = os.path.join(self.work_dir, "fake_video.mp4")
+        with open(self.video_path, "wb") as f:
+            f.write(b"\0" * 1024)
+
+    def make_plugin_dir(self, count):
+        plugin_dir = os.path.join(self.work_dir, f"plugins_{count}")
+        if not os.path.exists(plugin_dir):
+            os.makedirs(plugin_dir)
+            for i in range(count):
+                with open(os.path.join(plugin_dir, f"bench_plugin_{i}.py"), "w", encoding="utf-8") as f:
+                    f.write(SYNTHETIC_PLUGIN.format(index=i))
+        return plugin_dir
+
+    def make_plugin_manager(self, plugin_dir=None):
+        from main import PluginManager
+        return PluginManager(None, plugin_dir=plugin_dir or self.make_plugin_dir(0))
+
+    def cleanup(self):
+        if self._saved_appdata is None:
+            os.environ.pop("LOCALAPPDATA", None)
+        else:
+            os.environ["LOCALAPPDATA"] = self._saved_appdata
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def bench_plugin_load(ctx):
+    """插件发现与加载耗时随插件数量的变化"""
+    results = OrderedDict()
+    for count in (1, 10, 50, 100):
+        plugin_dir = ctx.make_plugin_dir(count)
+        manager = ctx.make_plugin_manager(plugin_dir)
+        elapsed = _time_ms(manager.load_plugins, repeat=5)
+        results[f"plugin_load.{count}_plugins"] = _metric(elapsed, "ms")
+        results[f"plugin_load.{count}_plugins.per_plugin"] = _metric(elapsed / count, "ms")
+        manager.cleanup_plugins()
+    return results
+
+
+def bench_dispatch(ctx):
+    """trigger_* 事件分发延迟"""
+    manager = ctx.make_plugin_manager(ctx.make_plugin_dir(50))
+    manager.load_plugins()
+    settings = {'video_path': ctx.video_path, 'loop': True, 'bat_path': '', 'minimize_to_tray': True}
+
+    def settings_changed():
+        # 每次改变一个键，并立即分发队列，测量完整的增量通知开销
+        settings['loop'] = not settings['loop']
+        manager.trigger_settings_changed(settings)
+        manager.event_bus.flush()
+
+    cases = OrderedDict([
+        ("trigger_wallpaper_start", lambda: manager.trigger_wallpaper_start(ctx.video_path, True)),
+        ("trigger_wallpaper_stop", manager.trigger_wallpaper_stop),
+        ("trigger_settings_changed", settings_changed),
+    ])
+    results = OrderedDict()
+    for name, func in cases.items():
+        results[f"dispatch.{name}.50_plugins"] = _metric(_time_ms(func, number=200) * 1000, "us")
+    manager.cleanup_plugins()
+    return results
+
+
+def bench_overlay_paint(ctx):
+    """示例插件在覆盖层上的绘制开销"""
+    from Utils.PluginOverlay import PluginOverlay
+
+    example_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins")
+    manager = ctx.make_plugin_manager(example_dir)
+    manager.load_plugin("exampleplugin.py")
+    plugin = manager.plugins[-1]
+
+    overlay = PluginOverlay(QRect(0, 0, 1920, 1080))
+    overlay.activate()
+    plugin.operate_on_window(overlay.canvas)
+    _process_events(0.2)
+
+    widget_image = QImage(plugin.widget.size(), QImage.Format_ARGB32_Premultiplied)
+    overlay_image = QImage(overlay.size(), QImage.Format_ARGB32_Premultiplied)
+
+    results = OrderedDict()
+    results["overlay_paint.example_widget"] = _metric(
+        _time_ms(lambda: plugin.widget.render(widget_image), number=50), "ms")
+    results["overlay_paint.full_overlay"] = _metric(
+        _time_ms(lambda: overlay.render(overlay_image), number=10), "ms")
+    results["overlay_paint.backing_store"] = _metric(overlay.backing_store_bytes() / (1024 * 1024), "MB")
+
+    plugin.on_wallpaper_stop()
+    overlay.close()
+    overlay.deleteLater()
+    _process_events(0.05)
+    return results
+
+
+def bench_plugin_dialog(ctx):
+    """插件信息窗口打开耗时与插件数量的关系"""
+    from main import PluginInfoDialog
+
+    results = OrderedDict()
+    for count in (10, 500):
+        manager = ctx.make_plugin_manager(ctx.make_plugin_dir(count))
+        manager.load_plugins()
+
+        def open_dialog():
+            dialog = PluginInfoDialog(manager)
+            dialog.show()
+            QCoreApplication.processEvents()
+            dialog.search_input.setText("bench_plugin_1")
+            dialog.proxy.set_search_text(dialog.search_input.text())
+            QCoreApplication.processEvents()
+            dialog.close()
+            dialog.deleteLater()
+            QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+        results[f"plugin_dialog.open_{count}_plugins"] = _metric(_time_ms(open_dialog, repeat=5), "ms")
+        manager.cleanup_plugins()
+    return results
+
+
+def bench_settings(ctx):
+    """设置读写吞吐量"""
+    settings = QSettings("VideoWallpaperBench", "Settings")
+    keys = [f"bench/key_{i}" for i in range(1000)]
+
+    def write_all():
+        for i, key in enumerate(keys):
+            settings.setValue(key, i)
+        settings.sync()
+
+    def read_all():
+        for key in keys:
+            settings.value(key, 0, type=int)
+
+    write_ms = _time_ms(write_all, repeat=5)
+    read_ms = _time_ms(read_all, repeat=5)
+    settings.clear()
+    settings.sync()
+    return OrderedDict([
+        ("settings.write", _metric(len(keys) / write_ms * 1000, "ops/s", better="higher")),
+        ("settings.read", _metric(len(keys) / read_ms * 1000, "ops/s", better="higher")),
+    ])
+
+
+def bench_wallpaper(ctx):
+    """壁纸启动/停止延迟（合成帧媒体后端）"""
+    from main import VideoWallpaper
+
+    manager = ctx.make_plugin_manager(ctx.make_plugin_dir(10))
+    manager.load_plugins()
+    start_samples = []
+    stop_samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        manager.trigger_wallpaper_start(ctx.video_path, True)
+        window = VideoWallpaper(ctx.video_path, True, manager, backend_name="null")
+        window.show()
+        _wait_until(lambda: window.backend is not None)  # 后端在窗口显示之后创建
+        start_samples.append((time.perf_counter() - start) * 1000)
+        _process_events(0.05)
+
+        start = time.perf_counter()
+        window.stop_wallpaper()
+        window.deleteLater()
+        manager.trigger_wallpaper_stop()
+        stop_samples.append((time.perf_counter() - start) * 1000)
+        _process_events(0.05)
+
+    manager.cleanup_plugins()
+    return OrderedDict([
+        ("wallpaper.start", _metric(statistics.median(start_samples), "ms")),
+        ("wallpaper.stop", _metric(statistics.median(stop_samples), "ms")),
+    ])
+
+
+def bench_composite(ctx):
+    """合成模式：插件图层混合进视频帧的开销与实际显示帧率（合成帧媒体后端）"""
+    from main import VideoWallpaper
+
+    example_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plugins")
+    manager = ctx.make_plugin_manager(example_dir)
+    manager.load_plugin("exampleplugin.py")
+    window = VideoWallpaper(ctx.video_path, True, manager, backend_name="null", composite=True)
+    window.show()
+    _process_events(0.3)
+
+    presented = []
+    window.frame_decoded.connect(lambda image: presented.append(time.perf_counter()))
+    _process_events(1.0)
+    frame_rate = len(presented) / (presented[-1] - presented[0]) if len(presented) > 1 else 0.0
+
+    frame = QImage(window.frame_pool.size, QImage.Format_RGB32)
+    painter = QPainter(frame)
+    blend_ms = _time_ms(lambda: window.widget_overlay.composite_into(painter), number=50)
+    painter.end()
+    layer_ms = _time_ms(window.widget_overlay.refresh_layers, number=20)
+    dropped = window.frame_pool.dropped_frames
+
+    window.stop_wallpaper()
+    window.deleteLater()
+    manager.cleanup_plugins()
+    _process_events(0.05)
+    return OrderedDict([
+        ("composite.blend", _metric(blend_ms, "ms")),
+        ("composite.layer_refresh", _metric(layer_ms, "ms")),
+        ("composite.presented_fps", _metric(frame_rate, "ops/s", better="higher")),
+        ("composite.dropped_frames", _metric(dropped, "count")),
+    ])
+
+
+def bench_instant_on(ctx):
+    """秒开：无保存画面与恢复启动时的首次出画、第一帧耗时，恢复位置误差，以及保存画面占用GUI线程的时间"""
+    from main import VideoWallpaper
+    from Utils.ResumeCache import ResumeCache
+    from Utils import Metrics
+
+    cache = ResumeCache(cache_dir=os.path.join(ctx.work_dir, "resume"),
+                        settings=QSettings("VideoWallpaperBench", "Settings"))
+    cache.forget(ctx.video_path)
+    results = OrderedDict()
+    for mode in ("cold", "resume"):
+        window = VideoWallpaper(ctx.video_path, True, None, backend_name="null", resume_cache=cache)
+        window.show()
+        _wait_until(lambda: window._first_frame)
+        metrics = Metrics.snapshot()
+        results[f"instant_on.{mode}.first_pixel"] = _metric(metrics["wallpaper.first_pixel_ms"], "ms")
+        results[f"instant_on.{mode}.first_frame"] = _metric(metrics["wallpaper.first_frame_ms"], "ms")
+        if mode == "resume":
+            results["instant_on.resume_position_error"] = _metric(
+                abs(window.backend.position() - saved_position) * 1000, "ms")
+        _process_events(1.0)
+        if mode == "cold":
+            window.resume_timer.stop()
+            results["instant_on.save_state_gui"] = _metric(_time_ms(window.save_resume_state, repeat=5), "ms")
+        saved_position = window.backend.position()
+        window.stop_wallpaper()
+        window.deleteLater()
+        cache.shutdown()  # 等待画面写入完成
+        cache = ResumeCache(cache_dir=cache.cache_dir, settings=cache.settings)
+        _process_events(0.05)
+    cache.forget(ctx.video_path)
+    return results
+
+
+def bench_frame_tap(ctx):
+    """视频帧分发：无订阅者时的开销、缩放分发开销和分析工具耗时"""
+    from Utils.FrameTap import FrameTap, mean_color, dominant_color, histogram, mean_luminance
+
+    tap = FrameTap()
+    frame = QImage(1920, 1080, QImage.Format_RGB32)
+    frame.fill(0x336699)
+    results = OrderedDict()
+    results["frame_tap.offer_idle"] = _metric(_time_ms(lambda: tap.offer(frame), number=1000) * 1000, "us")
+
+    received = []
+    for _ in range(5):
+        tap.subscribe(received.append, fps=1e6)  # 每次都到期，测量完整的缩放与分发
+    results["frame_tap.offer_5_subscribers"] = _metric(_time_ms(lambda: tap.offer(frame), number=20), "ms")
+    array = received[-1]
+    for name, func in (("mean_color", mean_color), ("dominant_color", dominant_color),
+                       ("histogram", histogram), ("mean_luminance", mean_luminance)):
+        results[f"frame_tap.{name}"] = _metric(_time_ms(lambda: func(array), number=20), "ms")
+    return results
+
+
+def bench_logging(ctx):
+    """日志：调用线程上单条记录的开销（写文件在后台线程完成）以及清空队列的耗时"""
+    from Utils.LogService import get_logger, get_plugin_logger, setup_logging, shutdown_logging
+
+    log_dir = os.path.join(ctx.work_dir, "logs")
+    os.makedirs(log_dir, exist_ok=True)
+    buffer = setup_logging(log_dir=log_dir, console=False)
+    logger = get_logger("bench")
+    plugin_logger = get_plugin_logger("bench_plugin")
+    results = OrderedDict()
+    try:
+        results["logging.info_call"] = _metric(
+            _time_ms(lambda: logger.info("基准日志 %d", 42, extra={'event': 'bench', 'duration_ms': 1.5}),
+                     number=500) * 1000, "us")
+        results["logging.plugin_call"] = _metric(
+            _time_ms(lambda: plugin_logger.info("插件日志"), number=500) * 1000, "us")
+        results["logging.filtered_call"] = _metric(
+            _time_ms(lambda: logger.debug("不会输出的调试日志"), number=500) * 1000, "us")
+    finally:
+        start = time.perf_counter()
+        shutdown_logging()
+        results["logging.drain"] = _metric((time.perf_counter() - start) * 1000, "ms")
+    results["logging.records"] = _metric(buffer.total, "count", better="higher")
+    return results
+
+
+def bench_tracing(ctx):
+    """性能追踪：未开启时记录点的开销，开启时单个区间的开销"""
+    from Utils import Tracing
+
+    def traced():
+        with Tracing.span("bench", index=1):
+            pass
+
+    results = OrderedDict()
+    results["tracing.span_disabled"] = _metric(_time_ms(traced, number=5000) * 1000, "us")
+    Tracing.start_tracing()
+    try:
+        results["tracing.span_enabled"] = _metric(_time_ms(traced, number=5000) * 1000, "us")
+    finally:
+        path = Tracing.stop_tracing(os.path.join(ctx.work_dir, "trace.json"))
+    with open(path, "r", encoding="utf-8") as f:
+        results["tracing.events"] = _metric(len(json.load(f)["traceEvents"]), "count", better="higher")
+    return results
+
+
+SLOW_PLUGIN = '''import time
+from plugin_base import PluginBase
+
+
+class SlowPlugin(PluginBase):
+    def __init__(self):
+        super().__init__()
+        self.name = "slow_plugin"
+
+    def initialize(self, app_instance):
+        pass
+
+    def on_wallpaper_start(self, video_path, loop):
+        time.sleep(0.4)
+
+    def on_wallpaper_stop(self):
+        pass
+
+    def operate_on_window(self, window):
+        pass
+
+
+def create_plugin():
+    return SlowPlugin()
+'''
+
+
+def bench_loop_monitor(ctx):
+    """事件循环监视：心跳开销，以及插件阻塞GUI线程时能否抓到调用栈并指出插件"""
+    from Utils.LoopMonitor import LoopMonitor
+
+    plugin_dir = os.path.join(ctx.work_dir, "plugins_slow")
+    os.makedirs(plugin_dir, exist_ok=True)
+    with open(os.path.join(plugin_dir, "slow_plugin.py"), "w", encoding="utf-8") as f:
+        f.write(SLOW_PLUGIN)
+    manager = ctx.make_plugin_manager(plugin_dir)
+    manager.load_plugins()
+
+    results = OrderedDict()
+    results["loop_monitor.beat"] = _metric(_time_ms(LoopMonitor()._beat, number=2000) * 1000, "us")
+    monitor = LoopMonitor(manager, interval_ms=20, stall_threshold_ms=100)
+    monitor.start()
+    try:
+        _process_events(0.2)
+        manager.trigger_wallpaper_start(ctx.video_path, True)
+        _process_events(0.2)
+    finally:
+        monitor.stop()
+        manager.cleanup_plugins()
+    results["loop_monitor.stalls_detected"] = _metric(monitor.stalls, "count", better="higher")
+    blamed = monitor.last_stall is not None and monitor.last_stall['plugin'] == "slow_plugin"
+    results["loop_monitor.blamed_plugin"] = _metric(int(blamed), "count", better="higher")
+    return results
+
+
+def bench_media_cache(ctx):
+    """本地媒体缓存：复制并校验一个模拟位于网络共享上的视频，命中查询耗时，以及淘汰后的占用"""
+    from Utils.MediaCache import MediaCache
+    from Utils import Metrics
+
+    source = os.path.join(ctx.work_dir, "nas_video.mp4")
+    with open(source, "wb") as f:
+        f.write(os.urandom(32 * 1024 * 1024))
+    cache_dir = os.path.join(ctx.work_dir, "media_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    cache = MediaCache(cache_dir=cache_dir, max_bytes=48 * 1024 * 1024, slow_source=lambda path: True)
+    ready = []
+    cache.ready.connect(lambda src, local: ready.append(local))
+
+    results = OrderedDict()
+    try:
+        start = time.perf_counter()
+        first = cache.resolve(source)
+        _wait_until(lambda: ready, timeout=30.0)
+        results["media_cache.fill_32MB"] = _metric((time.perf_counter() - start) * 1000, "ms")
+        results["media_cache.first_resolve_is_source"] = _metric(int(first == source), "count", better="higher")
+        results["media_cache.resolve_hit"] = _metric(_time_ms(lambda: cache.resolve(source), number=200) * 1000, "us")
+
+        # 第二个视频放不下时淘汰最久未使用的副本
+        other = os.path.join(ctx.work_dir, "nas_video_2.mp4")
+        with open(other, "wb") as f:
+            f.write(os.urandom(24 * 1024 * 1024))
+        cache.resolve(other)
+        _wait_until(lambda: len(ready) >= 2, timeout=30.0)
+        results["media_cache.size_after_evict"] = _metric(cache.total_bytes() / 1024 ** 2, "MB")
+    finally:
+        cache.shutdown()
+    metrics = Metrics.snapshot()
+    results["media_cache.hits"] = _metric(metrics["media_cache.hits"], "count", better="higher")
+    results["media_cache.misses"] = _metric(metrics["media_cache.misses"], "count")
+    results["media_cache.mb_saved"] = _metric(metrics["media_cache.bytes_saved"] / 1024 ** 2, "MB", better="higher")
+    return results
+
+
+def bench_media_library(ctx):
+    """媒体库：索引中有1万个视频时打开窗口的耗时，以及文件夹无法读取时扫描不删除原有记录"""
+    from Utils.MediaLibrary import MediaIndex, MediaLibraryDialog, make_thumb_key
+
+    results = OrderedDict()
+    # 媒体库的索引和缩略图缓存位于数据目录，BenchContext 已把数据目录指向临时目录
+    index = MediaIndex()
+    folder = index.add_folder(os.path.join(ctx.work_dir, "offline_share"))
+    rows = []
+    for i in range(10000):
+        path = os.path.join(folder, f"video_{i:05d}.mp4")
+        rows.append((folder, path, os.path.basename(path), 1024, i, make_thumb_key(path, 1024, i)))
+    with index.conn:
+        index.conn.executemany("INSERT INTO media(folder, path, name, size, mtime, thumb_key) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def open_dialog():
+        dialog = MediaLibraryDialog()
+        dialog.show()
+        QCoreApplication.processEvents()
+        dialog.shutdown()
+        dialog.deleteLater()
+
+    results["media_library.open_10k"] = _metric(_time_ms(open_dialog, repeat=3), "ms")
+
+    # 文件夹不存在（网络共享断开）：扫描应放弃，而不是把1万条记录当作已删除
+    result = index.scan_folder(folder)
+    results["media_library.removed_when_offline"] = _metric(result['removed'], "count")
+    results["media_library.rows_after_offline_scan"] = _metric(len(index.all_media(folder)), "count",
+                                                               better="higher")
+    index.close()
+    return results
+
+
+def bench_loop_gap(ctx):
+    """循环点的帧间隔：普通循环（关闭并重新打开媒体）与无缝循环下相邻两帧的最大间隔和黑帧数，以及VLC后端的媒体是否带有 input-repeat"""
+    from Utils.MediaBackend import NullBackend, VlcBackend
+
+    results = OrderedDict()
+    for mode, seamless in (("reopen", False), ("seamless", True)):
+        backend = NullBackend(fps=60, duration=0.5)
+        frames = []
+        backend.set_frame_sink(lambda image: frames.append((time.perf_counter(), image.pixel(0, 0) & 0xFFFFFF == 0)))
+        backend.set_seamless_loop(seamless)
+        backend.open(ctx.video_path)
+        backend.set_loop(True)
+        backend.play()
+        _process_events(1.8)
+        backend.release()
+
+        # 去掉黑帧后，相邻两个有效帧之间的最大间隔即循环点的画面停顿
+        shown = [timestamp for timestamp, black in frames if not black]
+        gaps = [b - a for a, b in zip(shown, shown[1:])]
+        results[f"loop_gap.{mode}.max_gap"] = _metric(max(gaps) * 1000 if gaps else 0.0, "ms")
+        results[f"loop_gap.{mode}.black_frames"] = _metric(sum(black for _, black in frames), "count")
+        results[f"loop_gap.{mode}.loops"] = _metric(backend.loops_completed, "count", better="higher")
+
+    # 上面的合成帧后端只模拟重新打开的停顿；VLC 后端的无缝循环依赖媒体上的 input-repeat 选项，
+    # 用替身 vlc 模块检查按界面的调用顺序（先设置无缝循环、打开，再开启循环）后当前媒体是否带有该选项
+    with stub_vlc():
+        for mode, seamless in (("reopen", False), ("seamless", True)):
+            backend = VlcBackend()
+            backend.set_seamless_loop(seamless)
+            backend.open(ctx.video_path)
+            backend.set_loop(True)
+            options = backend.instance.media[-1].options
+            repeat = any(option.startswith(":input-repeat=") for option in options)
+            results[f"loop_gap.{mode}.vlc_input_repeat"] = _metric(
+                int(repeat), "count", better="higher" if seamless else "lower")
+    return results
+
+
+def bench_procedural(ctx):
+    """程序化壁纸：各内置着色器在不同内部分辨率下的每帧耗时，以及后端实际输出帧率"""
+    from Utils.Procedural import ProceduralRenderer, load_shader, builtin_shaders
+    from Utils.MediaBackend import ProceduralBackend
+
+    results = OrderedDict()
+    shaders = builtin_shaders()
+    for name, path in shaders.items():
+        shade = load_shader(path)
+        for width, height in ((320, 180), (640, 360), (1280, 720)):
+            renderer = ProceduralRenderer(shade, width, height)
+            frame_time = [0.0]
+
+            def render():
+                frame_time[0] += 1 / 30
+                renderer.render(frame_time[0])
+
+            render()
+            results[f"procedural.{name}.{height}p"] = _metric(_time_ms(render, repeat=5, number=4), "ms")
+
+    backend = ProceduralBackend(fps=30)
+    frames = []
+    backend.set_frame_sink(frames.append)
+    backend.open(shaders["plasma"])
+    backend.play()
+    _process_events(1.0)
+    stats = backend.stats()
+    backend.release()
+    results["procedural.backend_fps"] = _metric(len(frames), "ops/s", better="higher")
+    results["procedural.backend_render"] = _metric(stats['render_ms_per_frame'], "ms")
+    return results
+
+
+def bench_ram_loop(ctx):
+    """内存循环：各保存格式的内存占用，以及第一遍解码采集与之后内存播放的进程CPU占用"""
+    from PyQt5.QtCore import QSize
+    from Utils.MediaBackend import NullBackend, RamLoopBackend
+
+    results = OrderedDict()
+    settings = QSettings("VideoWallpaperBench", "Settings")
+    for store_format in ("rgb32", "rgb16", "zlib"):
+        settings.setValue("ram_loop/format", store_format)
+        backend = RamLoopBackend(decoder=lambda: NullBackend(fps=30, duration=1.5), settings=settings,
+                                 frame_size=QSize(1280, 720))
+        backend.REPORT_SECONDS = 1.5
+        reports = []
+        backend.report_callback = reports.append
+        backend.set_frame_sink(lambda image: None)
+        backend.open(ctx.video_path)
+        backend.set_loop(True)
+        backend.play()
+        # 报告中的CPU占用按整个进程统计，这里不用忙等的 _wait_until
+        deadline = time.perf_counter() + 10.0
+        while not reports and time.perf_counter() < deadline:
+            _process_events(0.1)
+        stats = backend.stats()
+        backend.release()
+        if not reports or reports[0]['mode'] != "ram":
+            continue
+        report = reports[0]
+        results[f"ram_loop.{store_format}.memory"] = _metric(report['memory_mb'], "MB")
+        results[f"ram_loop.{store_format}.decode_cpu"] = _metric(report['decode_cpu_percent'], "%")
+        results[f"ram_loop.{store_format}.ram_cpu"] = _metric(report['ram_cpu_percent'], "%")
+        results[f"ram_loop.{store_format}.playback"] = _metric(stats['playback_ms_per_frame'], "ms")
+    settings.remove("ram_loop")
+    return results
+
+
+def bench_scene(ctx):
+    """场景：读取场景文件、首次显示大量共用少数图片的图层（解码次数），以及只差一个图层的场景切换"""
+    from Utils.AssetCache import AssetCache
+    from Utils.Scene import SceneView, load_scene
+
+    scene_dir = os.path.join(ctx.work_dir, "scene")
+    os.makedirs(scene_dir, exist_ok=True)
+    for index in range(5):
+        image = QImage(256, 256, QImage.Format_ARGB32)
+        image.fill(0x80102030 + index * 0x00101010)
+        image.save(os.path.join(scene_dir, f"sprite_{index}.png"))
+    # 与 sprite_0 内容相同、路径不同的副本：按内容去重，不再解码
+    shutil.copyfile(os.path.join(scene_dir, "sprite_0.png"), os.path.join(scene_dir, "sprite_copy.png"))
+
+    def write_scene(name, extra_source):
+        layers = [{'source': f"sprite_{index % 5}.png", 'x': (index % 10) / 10, 'y': (index // 10) / 10,
+                   'width': 0.05} for index in range(100)]
+        layers.append({'source': extra_source, 'x': 0.5, 'y': 0.5, 'width': 0.2})
+        layers.append({'type': "text", 'text': name, 'x': 0.02, 'y': 0.9, 'size': 48})
+        path = os.path.join(scene_dir, f"{name}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({'name': name, 'background': ctx.video_path, 'layers': layers}, f)
+        return path
+
+    first_path = write_scene("first", "sprite_copy.png")
+    second_path = write_scene("second", "sprite_4.png")
+
+    results = OrderedDict()
+    results["scene.load"] = _metric(_time_ms(lambda: load_scene(first_path), number=10), "ms")
+    canvas = QWidget()
+    canvas.resize(1920, 1080)
+    assets = AssetCache()
+    view = SceneView(canvas, assets)
+    try:
+        before = assets.stats()
+        start = time.perf_counter()
+        view.apply(load_scene(first_path))
+        _wait_until(lambda: assets.stats()['hits'] + assets.stats()['misses'] - before['hits'] - before['misses']
+                    >= 101, timeout=10.0)
+        results["scene.first_apply"] = _metric((time.perf_counter() - start) * 1000, "ms")
+        after = assets.stats()
+        results["scene.first_decodes"] = _metric(after['misses'] - before['misses'], "count")
+        results["scene.assets_memory"] = _metric(after['bytes'] / 1024 ** 2, "MB")
+
+        start = time.perf_counter()
+        view.apply(load_scene(second_path))
+        _process_events(0.2)
+        results["scene.switch"] = _metric((time.perf_counter() - start - 0.2) * 1000, "ms")
+        results["scene.switch_decodes"] = _metric(assets.stats()['misses'] - after['misses'], "count")
+
+        # 背景或插件不同时壁纸重启：旧图层全部释放后新窗口再请求，释放的图片仍应保留
+        view.clear()
+        view = SceneView(canvas, assets)
+        before = assets.stats()
+        view.apply(load_scene(first_path))
+        _process_events(0.2)
+        results["scene.restart_decodes"] = _metric(assets.stats()['misses'] - before['misses'], "count")
+    finally:
+        view.clear()
+        assets.shutdown()
+        canvas.deleteLater()
+    return results
+
+
+def bench_overlay_assets(ctx):
+    """覆盖层共享图片缓存：每次绘制自行加载缩放与缓存取用的耗时对比、多插件共用时的解码次数，以及超出上限时的内存占用"""
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QPixmap
+    from Utils.AssetCache import PixmapCache
+
+    asset_dir = os.path.join(ctx.work_dir, "overlay_assets")
+    os.makedirs(asset_dir, exist_ok=True)
+    paths = []
+    for index in range(40):
+        image = QImage(1024, 1024, QImage.Format_ARGB32)
+        image.fill(0xC0000000 + index * 0x00030507)
+        path = os.path.join(asset_dir, f"icon_{index}.png")
+        image.save(path)
+        paths.append(path)
+
+    results = OrderedDict()
+    results["overlay_assets.load_and_scale"] = _metric(
+        _time_ms(lambda: QPixmap(paths[0]).scaled(256, 256, Qt.KeepAspectRatio, Qt.SmoothTransformation), number=5), "ms")
+
+    cache = PixmapCache(max_bytes=8 * 1024 ** 2)
+    try:
+        # 20 个插件在同一帧里请求同一张图片：只解码一次
+        before = cache.stats()
+        loaded = []
+        for _ in range(20):
+            cache.pixmap(paths[0], (256, 256), 1.0, callback=loaded.append)
+        _wait_until(lambda: len(loaded) >= 20, timeout=10.0)
+        results["overlay_assets.shared_decodes"] = _metric(cache.stats()['misses'] - before['misses'], "count")
+        results["overlay_assets.cached_get"] = _metric(
+            _time_ms(lambda: cache.pixmap(paths[0], (256, 256), 1.0), number=1000) * 1000, "us")
+
+        # 请求的图片总量（40 张 1MB）远超上限（8MB）：按最近使用淘汰，占用不超过上限
+        pending = []
+        for path in paths:
+            cache.pixmap(path, (512, 512), 1.0, callback=pending.append)
+        _wait_until(lambda: len(pending) >= len(paths), timeout=30.0)
+        stats = cache.stats()
+        results["overlay_assets.memory_after_flood"] = _metric(stats['bytes'] / 1024 ** 2, "MB")
+        results["overlay_assets.evictions"] = _metric(stats['evictions'], "count")
+    finally:
+        cache.shutdown()
+    return results
+
+
+RELOAD_PLUGIN = '''from PyQt5.QtWidgets import QApplication, QLabel
+from PyQt5.QtCore import QTimer
+from plugin_base import PluginBase
+
+
+class ReloadPlugin(PluginBase):
+    def __init__(self):
+        super().__init__()
+        self.name = "reload_plugin"
+        self.cache = bytes(range(256)) * 8192  # 插件持有的 2MB 数据
+        self.ticks = 0
+
+    def initialize(self, app_instance):
+        self.connect_signal(QApplication.instance().focusChanged, lambda old, new: self.tick())
+        self.timer = QTimer()
+        self.timer.timeout.connect(lambda: self.tick())
+        self.timer.start(1000)
+
+    def tick(self):
+        self.ticks += 1
+
+    def on_wallpaper_start(self, video_path, loop):
+        pass
+
+    def on_wallpaper_stop(self):
+        pass
+
+    def operate_on_window(self, window):
+        label = QLabel("reload", window)
+        label.setGeometry(10, 10, 120, 30)
+        label.mousePressEvent = lambda event: self.tick()
+        label.show()
+
+
+def create_plugin():
+    return ReloadPlugin()
+'''
+
+
+def bench_plugin_reload(ctx):
+    """反复重新加载插件：每次重载耗时、内存增长，以及卸载后未被回收的插件数"""
+    from Utils.PluginOverlay import PluginOverlay
+    from main import LEAK_CHECK_DELAY_MS
+
+    plugin_dir = os.path.join(ctx.work_dir, "plugins_reload")
+    os.makedirs(plugin_dir, exist_ok=True)
+    with open(os.path.join(plugin_dir, "reload_plugin.py"), "w", encoding="utf-8") as f:
+        f.write(RELOAD_PLUGIN)
+    manager = ctx.make_plugin_manager(plugin_dir)
+    overlay = PluginOverlay(QRect(0, 0, 1920, 1080))
+    overlay.activate()
+    process = psutil.Process(os.getpid())
+
+    def reload():
+        manager.load_plugins()
+        manager.trigger_operate_on_window(overlay.canvas)
+
+    def run_loop(ms):
+        # 延迟删除（deleteLater）只在事件循环中执行，processEvents 不会处理
+        loop = QEventLoop()
+        QTimer.singleShot(ms, loop.quit)
+        loop.exec_()
+
+    for _ in range(5):  # 预热
+        reload()
+        run_loop(0)
+    run_loop(LEAK_CHECK_DELAY_MS + 100)
+    gc.collect()
+    rss_before = process.memory_info().rss
+
+    reloads = 30
+    elapsed = 0.0
+    for _ in range(reloads):
+        start = time.perf_counter()
+        reload()
+        elapsed += time.perf_counter() - start
+        run_loop(0)
+    run_loop(LEAK_CHECK_DELAY_MS + 100)  # 等待泄漏检查
+    gc.collect()
+    rss_growth = (process.memory_info().rss - rss_before) / (1024 * 1024)
+
+    manager.cleanup_plugins()
+    overlay.close()
+    overlay.deleteLater()
+    results = OrderedDict()
+    results["plugin_reload.per_reload"] = _metric(elapsed * 1000 / reloads, "ms")
+    results[f"plugin_reload.rss_growth_{reloads}x"] = _metric(rss_growth, "MB")
+    results["plugin_reload.leaked"] = _metric(len(manager.leaked_plugins), "count")
+    results["plugin_reload.widgets_after_unload"] = _metric(len(overlay.canvas.children()), "count")
+    return results
+
+
+BUSY_PLUGIN = '''import time
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QWidget
+from plugin_base import PluginBase
+
+
+class BusyPlugin(PluginBase):
+    def __init__(self):
+        super().__init__()
+        self.name = "busy_plugin"
+        self.busy_seconds = 0.0
+
+    def initialize(self, app_instance):
+        self.cache = [str(i) * 10 for i in range(20000)]
+        self.timers = [QTimer(), QTimer()]
+        self.timers[0].timeout.connect(self.tick)
+        self.timers[0].start(20)
+
+    def tick(self):
+        start = time.perf_counter()
+        while time.perf_counter() - start < 0.004:
+            pass
+        self.busy_seconds += time.perf_counter() - start
+
+    def on_wallpaper_start(self, video_path, loop):
+        pass
+
+    def on_wallpaper_stop(self):
+        pass
+
+    def operate_on_window(self, window):
+        self.panel = QWidget(window)
+        for _ in range(3):
+            QWidget(self.panel)
+
+
+def create_plugin():
+    return BusyPlugin()
+'''
+
+
+def bench_plugin_resources(ctx):
+    """按插件统计资源：定时器回调CPU时间的计时误差，控件/定时器/内存归属，以及汇总开销"""
+    from Utils.PluginOverlay import PluginOverlay
+
+    plugin_dir = os.path.join(ctx.work_dir, "plugins_busy")
+    os.makedirs(plugin_dir, exist_ok=True)
+    with open(os.path.join(plugin_dir, "busy_plugin.py"), "w", encoding="utf-8") as f:
+        f.write(BUSY_PLUGIN)
+    manager = ctx.make_plugin_manager(plugin_dir)
+    resources = manager.resources
+    resources.set_memory_tracking(True)
+    overlay = PluginOverlay(QRect(0, 0, 1920, 1080))
+    results = OrderedDict()
+    try:
+        manager.load_plugins()
+        manager.trigger_operate_on_window(overlay.canvas)
+        plugin = manager.plugins[0]
+        _process_events(2.0)
+
+        usage = resources.usage()[plugin]
+        actual_ms = plugin.busy_seconds * 1000
+        results["plugin_resources.cpu_attribution_error"] = _metric(
+            abs(usage['event_ms'] - actual_ms) / max(actual_ms, 1e-6) * 100, "%")
+        results["plugin_resources.widgets"] = _metric(usage['widgets'], "count", better="higher")
+        results["plugin_resources.timers"] = _metric(usage['timers'], "count", better="higher")
+        results["plugin_resources.memory"] = _metric(usage['memory_bytes'] / (1024 * 1024), "MB", better="higher")
+        results["plugin_resources.usage_with_tracemalloc"] = _metric(_time_ms(resources.usage, repeat=5), "ms")
+    finally:
+        resources.set_memory_tracking(False)
+        manager.cleanup_plugins()
+        overlay.deleteLater()
+    return results
+
+
+TASK_PLUGIN = '''import threading
+from plugin_base import PluginBase
+
+_lock = threading.Lock()
+active = 0
+peak = 0
+
+
+def crunch(n):
+    """纯Python计算，线程中执行时持有GIL"""
+    global active, peak
+    with _lock:
+        active += 1
+        peak = max(peak, active)
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    with _lock:
+        active -= 1
+    return total
+
+
+class TaskPlugin(PluginBase):
+    def __init__(self):
+        super().__init__()
+        self.name = "task_plugin"
+
+    def initialize(self, app_instance):
+        pass
+
+    def on_wallpaper_start(self, video_path, loop):
+        pass
+
+    def on_wallpaper_stop(self):
+        pass
+
+    def operate_on_window(self, window):
+        pass
+
+
+def create_plugin():
+    return TaskPlugin()
+'''
+
+
+def bench_plugin_tasks(ctx):
+    """插件后台任务：调度往返开销、并发上限、CPU密集任务（线程池/进程池）运行时GUI线程的最长停顿、禁用后的取消"""
+    plugin_dir = os.path.join(ctx.work_dir, "plugins_tasks")
+    os.makedirs(plugin_dir, exist_ok=True)
+    with open(os.path.join(plugin_dir, "task_plugin.py"), "w", encoding="utf-8") as f:
+        f.write(TASK_PLUGIN)
+    manager = ctx.make_plugin_manager(plugin_dir)
+    manager.load_plugins()
+    plugin = manager.plugins[0]
+    crunch = vars(manager.modules[plugin])['crunch']
+    service = manager.task_service
+    results = OrderedDict()
+
+    def run_batch(count, fn, *args, process=False):
+        """提交一批任务并运行事件循环直到全部回调，返回 (总耗时ms, GUI线程最长停顿ms)"""
+        done = []
+        start = time.perf_counter()
+        for _ in range(count):
+            plugin.run_in_background(fn, *args, callback=done.append, process=process)
+        max_gap, last = 0.0, time.perf_counter()
+        while len(done) < count and time.perf_counter() - start < 30:
+            QCoreApplication.processEvents(QEventLoop.AllEvents, 10)
+            now = time.perf_counter()
+            max_gap, last = max(max_gap, now - last), now
+        return (time.perf_counter() - start) * 1000, max_gap * 1000
+
+    try:
+        elapsed, _ = run_batch(service.max_queued, len, ())
+        results["plugin_tasks.roundtrip"] = _metric(elapsed / service.max_queued, "ms")
+
+        _, gap = run_batch(service.max_workers * 2, crunch, 2_000_000)
+        results["plugin_tasks.gui_max_gap_threads"] = _metric(gap, "ms")
+        results["plugin_tasks.peak_over_cap"] = _metric(
+            max(0, vars(manager.modules[plugin])['peak'] - service.max_workers), "count")
+
+        elapsed, _ = run_batch(1, crunch, 10, process=True)
+        results["plugin_tasks.process_first_task"] = _metric(elapsed, "ms")
+        _, gap = run_batch(service.max_workers * 2, crunch, 2_000_000, process=True)
+        results["plugin_tasks.gui_max_gap_processes"] = _metric(gap, "ms")
+
+        # 禁用插件后，排队和执行中的任务都不应再回调
+        delivered = []
+        for _ in range(service.max_queued):
+            plugin.run_in_background(crunch, 200_000, callback=delivered.append)
+        plugin.enabled = False
+        _wait_until(lambda: service.running == 0 and service.queued == 0, timeout=30)
+        results["plugin_tasks.delivered_after_disable"] = _metric(len(delivered), "count")
+    finally:
+        manager.cleanup_plugins()
+    return results
+
+
+PROFILED_PLUGIN = '''from plugin_base import PluginBase
+
+
+def spin(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+
+class ProfiledPlugin(PluginBase):
+    def __init__(self):
+        super().__init__()
+        self.name = "profiled_plugin"
+
+    def initialize(self, app_instance):
+        pass
+
+    def on_wallpaper_start(self, video_path, loop):
+        pass
+
+    def on_wallpaper_stop(self):
+        pass
+
+    def operate_on_window(self, window):
+        pass
+
+    def busy(self, n):
+        return spin(n)
+
+
+def create_plugin():
+    return ProfiledPlugin()
+'''
+
+
+def bench_profiler(ctx):
+    """CPU采样分析：开启时对CPU密集负载的减慢、采样线程自身的CPU占用、插件耗时的归属比例，以及写出结果的耗时"""
+    from Utils.Profiler import SamplingProfiler
+
+    plugin_dir = os.path.join(ctx.work_dir, "plugins_profiled")
+    os.makedirs(plugin_dir, exist_ok=True)
+    with open(os.path.join(plugin_dir, "profiled_plugin.py"), "w", encoding="utf-8") as f:
+        f.write(PROFILED_PLUGIN)
+    manager = ctx.make_plugin_manager(plugin_dir)
+    manager.load_plugins()
+    plugin = manager.plugins[0]
+
+    def workload():
+        for _ in range(20):
+            plugin.busy(20_000)
+            sum(range(20_000))
+
+    results = OrderedDict()
+    try:
+        baseline = _time_ms(workload, repeat=9)
+        profiler = SamplingProfiler(manager, interval_ms=10)
+        profiler.start()
+        try:
+            profiled = _time_ms(workload, repeat=9)
+            deadline = time.perf_counter() + 1.0
+            while time.perf_counter() < deadline:
+                workload()
+        finally:
+            profiler.stop()
+        results["profiler.overhead"] = _metric((profiled / baseline - 1) * 100, "%")
+        results["profiler.samples"] = _metric(profiler.samples, "count", better="higher")
+        results["profiler.sampler_cpu"] = _metric(profiler.sampler_cpu / profiler.duration * 100, "%")
+
+        in_plugin = sum(count for (name, stack), count in profiler.stacks.items()
+                        if any(code.co_filename.startswith(plugin_dir) for code in stack))
+        results["profiler.plugin_share"] = _metric(in_plugin / max(1, profiler.samples) * 100, "%", better="higher")
+        start = time.perf_counter()
+        profiler.write(ctx.work_dir, "profile")
+        results["profiler.write"] = _metric((time.perf_counter() - start) * 1000, "ms")
+    finally:
+        manager.cleanup_plugins()
+    return results
+
+
+def bench_idle(ctx):
+    """运行中程序的空闲CPU与内存占用"""
+    from main import SettingsWindow
+
+    process = psutil.Process(os.getpid())
+    window = SettingsWindow(auto_start_video=ctx.video_path, auto_loop=True, backend_override="null")
+    window.show()
+    _process_events(1.0)  # 等待壁纸启动并稳定
+
+    cpu_before = process.cpu_times()
+    wall_start = time.perf_counter()
+    _process_events(ctx.args.idle_seconds)
+    wall_elapsed = time.perf_counter() - wall_start
+    cpu_after = process.cpu_times()
+    cpu_used = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    rss_mb = process.memory_info().rss / (1024 * 1024)
+
+    if window.wallpaper_window:
+        window.stop_wallpaper()
+    window.system_monitor.stop()
+    window.hide()
+    window.deleteLater()
+    _process_events(0.1)
+    return OrderedDict([
+        ("idle.cpu", _metric(cpu_used / wall_elapsed * 100, "%")),
+        ("idle.rss", _metric(rss_mb, "MB")),
+    ])
+
+
+def bench_http(ctx):
+    """插件共享HTTP服务：请求合并、缓存命中和ETag重新验证（本地替身服务）"""
+    from Utils.HttpService import HttpService
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHttpHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/data"
+    service = HttpService(default_ttl=60)
+    results = []
+
+    def timed_get(count=1, **kwargs):
+        del results[:]
+        start = time.perf_counter()
+        for _ in range(count):
+            service.get(url, callback=results.append, errback=results.append, **kwargs)
+        if not _wait_until(lambda: len(results) >= count):
+            raise RuntimeError("HTTP请求超时")
+        return (time.perf_counter() - start) * 1000
+
+    try:
+        _StubHttpHandler.hits = 0
+        cold_ms = timed_get(count=20)
+        merged_hits = _StubHttpHandler.hits
+        cached_ms = statistics.median(timed_get() for _ in range(20))
+
+        revalidate_samples = []
+        for _ in range(5):
+            service.expire(url)
+            revalidate_samples.append(timed_get())
+        stats = service.stats()
+    finally:
+        service.shutdown()
+        server.shutdown()
+        server.server_close()
+
+    return OrderedDict([
+        ("http.cold_get_x20", _metric(cold_ms, "ms")),
+        ("http.server_requests_x20", _metric(merged_hits, "count")),
+        ("http.cached_get", _metric(cached_ms, "ms")),
+        ("http.revalidate", _metric(statistics.median(revalidate_samples), "ms")),
+        ("http.revalidated", _metric(stats['revalidated'], "count", better="higher")),
+    ])
+
+
+BENCHMARKS = OrderedDict([
+    ("plugin_load", bench_plugin_load),
+    ("dispatch", bench_dispatch),
+    ("overlay_paint", bench_overlay_paint),
+    ("plugin_dialog", bench_plugin_dialog),
+    ("settings", bench_settings),
+    ("wallpaper", bench_wallpaper),
+    ("composite", bench_composite),
+    ("instant_on", bench_instant_on),
+    ("frame_tap", bench_frame_tap),
+    ("logging", bench_logging),
+    ("tracing", bench_tracing),
+    ("loop_monitor", bench_loop_monitor),
+    ("media_cache", bench_media_cache),
+    ("media_library", bench_media_library),
+    ("loop_gap", bench_loop_gap),
+    ("procedural", bench_procedural),
+    ("ram_loop", bench_ram_loop),
+    ("scene", bench_scene),
+    ("overlay_assets", bench_overlay_assets),
+    ("plugin_reload", bench_plugin_reload),
+    ("plugin_resources", bench_plugin_resources),
+    ("plugin_tasks", bench_plugin_tasks),
+    ("profiler", bench_profiler),
+    ("idle", bench_idle),
+    ("http", bench_http),
+])
+
+
+def compare_results(current, baseline, threshold):
+    """
+    与基线对比
+
+    Args:
+        current (dict): 本次结果
+        baseline (dict): 基线结果
+        threshold (float): 允许的相对退化比例，如0.2表示20%
+
+    Returns:
+        list: 退化项描述
+    """
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        metric = current["results"].get(name)
+        if metric is None:
+            continue
+        base_value, value = base["value"], metric["value"]
+        floor = NOISE_FLOOR.get(metric["unit"], 0.0)
+        if metric["better"] == "higher":
+            regressed = value < base_value * (1 - threshold) and base_value - value > floor
+        else:
+            regressed = value > base_value * (1 + threshold) and value - base_value > floor
+        change = (value - base_value) / base_value * 100 if base_value else 0.0
+        line = f"{name}: {base_value} -> {value} {metric['unit']} ({change:+.1f}%)"
+        if regressed:
+            regressions.append(line)
+        print(("退化 " if regressed else "正常 ") + line, file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LiangYuPaper 无界面基准测试")
+    parser.add_argument("--output", help="结果JSON保存路径，默认输出到标准输出")
+    parser.add_argument("--baseline", help="基线JSON路径，用于对比")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的相对退化比例（默认0.25）")
+    parser.add_argument("--only", help="只运行指定的基准，逗号分隔：" + ",".join(BENCHMARKS))
+    parser.add_argument("--idle-seconds", type=float, default=5.0, help="空闲占用采样时长（秒）")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的基准: {', '.join(unknown)}")
+
+    app = QApplication(sys.argv)
+    ctx = BenchContext(args)
+    # 设置写入临时INI文件，不影响用户的真实设置
+    QSettings.setDefaultFormat(QSettings.IniFormat)
+    QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, ctx.work_dir)
+    # QSettings("VideoWallpaper", "Settings") 使用原生格式，Linux/macOS 上同样是文件，一并指向临时目录
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, ctx.work_dir)
+    silence_dialogs()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    output = {
+        'meta': {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': OrderedDict(),
+    }
+    try:
+        # 基准测试中的插件日志输出到标准错误，保持标准输出为纯JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            for name in selected:
+                print(f"运行基准: {name}")
+                output['results'].update(BENCHMARKS[name](ctx))
+    finally:
+        ctx.cleanup()
+
+    text = json.dumps(output, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(output, baseline, args.threshold)
+        if regressions:
+            print(f"\n性能退化 {len(regressions)} 项（阈值 {args.threshold:.0%}）:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,29 +4,132 @@ import ctypes
 from ctypes import wintypes
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton, QFileDialog,
-                             QCheckBox, QMessageBox, QSystemTrayIcon, QMenu, QAction, QDialog, QListWidget,
-                             QListWidgetItem, QScrollArea, QStyle)
-from PyQt5.QtCore import Qt, QSettings, QTimer, QThread, pyqtSignal
+                             QCheckBox, QMessageBox, QSystemTrayIcon, QMenu, QAction, QDialog, QTableView,
+                             QHeaderView, QAbstractItemView, QStyle, QComboBox, QDoubleSpinBox)
+from PyQt5.QtCore import Qt, QSettings, QTimer, QThread, QObject, pyqtSignal
+from PyQt5 import sip
 from PyQt5.QtGui import QIcon, QPixmap, QPainter, QBrush
-import winreg
 import time
+import threading
+import multiprocessing
 import psutil
 import importlib
 import importlib.util
-import traceback
+import gc
+import types
+import weakref
 from abc import ABC, abstractmethod
 
 from Utils.AutoStartUtil import AutoStartUtil
+from Utils.MediaLibrary import MediaLibraryDialog
+from Utils.MediaBackend import (BACKENDS, FrameBufferPool, create_backend, resolve_backend_name,
+                                video_backend_key)
+from Utils.QualityGovernor import QualityGovernor
+from Utils.LoopMonitor import LoopMonitor
+from Utils.MediaCache import MediaCache
+from Utils.ResumeCache import ResumeCache
+from Utils.RamLoop import save_report, load_report, format_report
+from Utils.AssetCache import AssetCache, PixmapCache, DEFAULT_PIXMAP_BUDGET_MB
+from Utils.Scene import SceneView, SceneError, is_scene_file, load_scene
+from Utils import Metrics
+from Utils.EventBus import (EventBus, EVENT_WALLPAPER_START, EVENT_WALLPAPER_STOP, EVENT_SETTINGS_CHANGED,
+                            EVENT_OPERATE_ON_WINDOW, EVENT_QUALITY_CHANGED)
+from Utils.HttpService import HttpService
+from Utils.FrameTap import FrameTap
+from Utils.LogService import get_logger, setup_logging, shutdown_logging, LogViewerDialog
+from Utils import Tracing
+from Utils import Profiler
+from Utils.ControlChannel import ControlServer, send_command
+from Utils.PluginSettings import load_plugin_settings
+from Utils.PluginOverlay import PluginOverlay
+from Utils.PluginListModel import PluginListModel, PluginFilterModel, PluginItemDelegate, COL_NAME, COLUMN_WIDTHS
+from Utils.PluginResources import PluginResourceMonitor
+from Utils.TaskService import TaskService
 from plugin_base import PluginBase
 import Utils.AutoStartUtil
 
+app_log = get_logger("app")
+plugin_log = get_logger("plugin_manager")
+wallpaper_log = get_logger("wallpaper")
+
+# 桌面嵌入和自启动依赖Windows API，其他平台上以普通窗口运行（用于无界面测试和性能分析）
+if sys.platform == "win32":
+    import winreg
+    user32 = ctypes.windll.user32
+else:
+    winreg = None
+    user32 = None
+
+def _noop_reference(self, *args, **kwargs):
+    pass
+
+
+def _noop_reference_with_doc(self, *args, **kwargs):
+    """文档字符串"""
+    pass
+
+
+# 由当前解释器编译的空函数体，不依赖具体版本的字节码指令
+_NOOP_BODIES = {_noop_reference.__code__.co_code, _noop_reference_with_doc.__code__.co_code}
+
+
+def _is_noop(func):
+    """判断函数体是否只有 pass（或仅有文档字符串）：与同一解释器编译的空函数比较"""
+    code = getattr(func, "__code__", None)
+    if code is None:
+        return False
+    # 字节码相同时还要确认返回的常量是 None（排除 return 0 之类）
+    return code.co_code in _NOOP_BODIES and all(const is None or isinstance(const, str) for const in code.co_consts)
+
+
+# 旧式插件钩子与事件类型的对应关系：(钩子名, 事件类型, 适配函数)
+LEGACY_HOOKS = [
+    ("on_wallpaper_start", EVENT_WALLPAPER_START,
+     lambda hook: lambda payload: hook(payload['video_path'], payload['loop'])),
+    ("on_wallpaper_stop", EVENT_WALLPAPER_STOP,
+     lambda hook: lambda payload: hook()),
+    ("on_settings_changed", EVENT_SETTINGS_CHANGED,
+     lambda hook: hook),
+    ("on_quality_changed", EVENT_QUALITY_CHANGED,
+     lambda hook: hook),
+    ("operate_on_window", EVENT_OPERATE_ON_WINDOW,
+     lambda hook: hook),
+]
+
+
+LEAK_CHECK_DELAY_MS = 500
+
+RESUME_POSITION_INTERVAL_MS = 10000  # 保存播放位置的间隔
+RESUME_STILL_INTERVAL = 60.0  # 定期保存画面的间隔（秒），停止壁纸时总会保存
+RESUME_HOLD_SECONDS = 3.0  # 等待恢复位置跳转完成的上限，超时后直接显示视频
+RESUME_HOLD_TOLERANCE = 1.0  # 播放位置与恢复位置相差在此范围内即视为跳转完成（秒）
+
+
 class PluginManager:
     """插件管理器"""
 
-    def __init__(self, app_instance):
+    def __init__(self, app_instance, plugin_dir=None):
         self.app_instance = app_instance
         self.plugins = []
-        self.plugin_dir = os.path.join(os.path.dirname(__file__), "plugins")
+        self.plugin_dir = plugin_dir or os.path.join(os.path.dirname(__file__), "plugins")
+        self.event_bus = EventBus()
+        self.http_service = HttpService()
+        self.frame_tap = FrameTap()
+        self.task_service = TaskService()
+        budget_mb = QSettings("VideoWallpaper", "Settings").value("overlay_assets/max_mb", DEFAULT_PIXMAP_BUDGET_MB,
+                                                                  type=int)
+        self.pixmap_cache = PixmapCache(max_bytes=budget_mb * 1024 ** 2)
+        self.load_times = {}  # plugin -> 导入与初始化耗时（秒）
+        self.modules = {}  # plugin -> 插件模块
+        self.plugin_files = {}  # 插件文件路径 -> plugin
+        self.window_widgets = {}  # plugin -> 插件在 operate_on_window 中添加到画布上的控件
+        self.canvas = None  # 最近一次 operate_on_window 的覆盖层画布
+        self.leaked_plugins = []  # 卸载后未被回收的插件名
+        self.scene_plugins = None  # 当前场景的插件设置（插件名 -> 覆盖的设置），没有场景时为 None
+        self.leak_counter = Metrics.counter("plugins.leaked", "卸载后未被回收的插件实例数")
+        self._leak_checks = []
+        self._leak_check_scheduled = False
+        self.resources = PluginResourceMonitor(self)
         self.ensure_plugin_dir()
 
     def ensure_plugin_dir(self):
@@ -38,8 +141,8 @@ class PluginManager:
 
 
     def load_plugins(self):
-        """加载所有插件"""
-        self.plugins.clear()
+        """加载所有插件（已加载的插件先完整卸载）"""
+        self.unload_plugins()
 
         if not os.path.exists(self.plugin_dir):
             return
@@ -49,88 +152,354 @@ class PluginManager:
                 try:
                     self.load_plugin(filename)
                 except Exception as e:
-                    print(f"加载插件 {filename} 失败: {e}")
-                    traceback.print_exc()
+                    plugin_log.exception(f"加载插件 {filename} 失败: {e}", extra={'event': 'plugin_load_failed'})
+        if self.scene_plugins is not None:
+            # 重新加载时场景仍在显示，新加载的插件同样按场景启用和设置
+            self.apply_scene_plugins(self.scene_plugins)
 
     def load_plugin(self, filename):
         """加载单个插件"""
         plugin_path = os.path.join(self.plugin_dir, filename)
         plugin_name = filename[:-3]  # 去掉.py扩展名
+        load_start = time.perf_counter()
 
         # 动态导入插件模块
-        spec = importlib.util.spec_from_file_location(plugin_name, plugin_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        with Tracing.span("plugin.import", module=plugin_name):
+            spec = importlib.util.spec_from_file_location(plugin_name, plugin_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
 
         # 创建插件实例
         if hasattr(module, 'create_plugin'):
             plugin = module.create_plugin()
             if isinstance(plugin, PluginBase):
-                plugin.initialize(self.app_instance)
+                plugin.event_bus = self.event_bus
+                plugin.http = self.http_service
+                plugin.frame_tap = self.frame_tap
+                plugin.tasks = self.task_service
+                plugin.assets = self.pixmap_cache
+                if plugin.settings_schema:
+                    plugin.settings.update(load_plugin_settings(plugin))
+                with Tracing.span("plugin.initialize", cat="plugin", plugin=plugin.name):
+                    plugin.initialize(self.app_instance)
+                self._subscribe_legacy_hooks(plugin)
                 self.plugins.append(plugin)
+                self.modules[plugin] = module
+                self.plugin_files[module.__file__] = plugin
+                self.resources.watch(plugin)
+                self.load_times[plugin] = time.perf_counter() - load_start
                 # 加载保存的插件状态
                 settings = QSettings("VideoWallpaper", "Settings")
                 enabled = settings.value(f"plugins/{plugin.name}/enabled", True, type=bool)
                 plugin.enabled = enabled
-                print(f"成功加载插件: {plugin.name} v{plugin.version} (启用状态: {plugin.enabled})")
+                plugin_log.info(f"成功加载插件: {plugin.name} v{plugin.version} (启用状态: {plugin.enabled})",
+                                extra={'plugin': plugin.name, 'event': 'plugin_loaded',
+                                       'duration_ms': round(self.load_times[plugin] * 1000, 2)})
             else:
-                print(f"插件 {filename} 不是有效的插件类")
+                plugin_log.warning(f"插件 {filename} 不是有效的插件类")
         else:
-            print(f"插件 {filename} 缺少 create_plugin 函数")
+            plugin_log.warning(f"插件 {filename} 缺少 create_plugin 函数")
+
+    def _subscribe_legacy_hooks(self, plugin):
+        """为插件实际实现了的旧式钩子自动订阅事件，空实现的钩子不参与分发"""
+        for hook_name, event_type, adapt in LEGACY_HOOKS:
+            hook = getattr(type(plugin), hook_name, None)
+            if hook is None or hook is getattr(PluginBase, hook_name) or _is_noop(hook):
+                continue
+            handler = adapt(getattr(plugin, hook_name))
+            if event_type == EVENT_OPERATE_ON_WINDOW:
+                handler = self._track_window_widgets(plugin, handler)
+            self.event_bus.subscribe(event_type, handler, owner=plugin)
+
+    def _track_window_widgets(self, plugin, hook):
+        """记录插件在 operate_on_window 中直接添加到画布上的控件（插件不一定把它们保存为属性），卸载时销毁"""
+        def handler(window):
+            before = set(window.children())
+            try:
+                hook(window)
+            finally:
+                added = [child for child in window.children() if child not in before]
+                # 壁纸重启后旧画布上的控件已随画布销毁，不再保留
+                widgets = [widget for widget in self.window_widgets.get(plugin, ()) if not sip.isdeleted(widget)]
+                self.window_widgets[plugin] = widgets + added
+                self.resources.watch(plugin)
+        return handler
+
+    def unload_plugins(self, check_leaks=True):
+        """卸载所有插件"""
+        for plugin in list(self.plugins):
+            self.unload_plugin(plugin, check_leaks)
+
+    def unload_plugin(self, plugin, check_leaks=True):
+        """
+        卸载插件：调用 cleanup，取消事件和视频帧订阅，断开 connect_signal 建立的连接，
+        销毁插件的控件和定时器，并释放插件模块
+
+        Args:
+            check_leaks (bool): 在下一次事件循环中检查插件实例和插件类是否已被回收
+        """
+        if plugin in self.plugins:
+            self.plugins.remove(plugin)
+        try:
+            plugin.cleanup()
+        except Exception as e:
+            plugin_log.error(f"清理插件 {plugin.name} 时出错: {e}", extra={'plugin': plugin.name})
+        self.event_bus.unsubscribe_owner(plugin)
+        self.frame_tap.unsubscribe_owner(plugin)
+        self.task_service.cancel_owner(plugin)
+        self.http_service.cancel_owner(plugin)
+        self.pixmap_cache.cancel_owner(plugin)
+        for signal, slot in plugin._connections:
+            try:
+                signal.disconnect(slot)
+            except (TypeError, RuntimeError):
+                pass  # 已断开或发送者已销毁
+        plugin._connections.clear()
+        self._destroy_plugin_objects(plugin)
+        self.load_times.pop(plugin, None)
+        self.resources.forget(plugin)
+        module = self.modules.pop(plugin, None)
+        if module is not None:
+            self.plugin_files.pop(module.__file__, None)
+            if sys.modules.get(module.__name__) is module:
+                del sys.modules[module.__name__]
+        plugin_log.info(f"已卸载插件: {plugin.name}", extra={'plugin': plugin.name, 'event': 'plugin_unloaded'})
+
+        if check_leaks:
+            self._leak_checks.append((plugin.name, weakref.ref(plugin), weakref.ref(type(plugin))))
+            if not self._leak_check_scheduled:
+                # 断开的连接和已销毁的发送者通过 deleteLater 释放槽函数（及闭包中的插件），
+                # 需要等事件循环处理完延迟删除后再检查
+                self._leak_check_scheduled = True
+                QTimer.singleShot(LEAK_CHECK_DELAY_MS, self.check_leaks)
+
+    def plugin_objects(self, plugin):
+        """
+        插件拥有的Qt对象：operate_on_window 中添加到画布的控件，以及插件属性
+        （含一层列表、字典）中的控件和定时器。宿主对象（主窗口、共享服务、覆盖层画布及其上级）
+        和挂在宿主控件下的对象不属于插件
+        """
+        host = {id(obj) for obj in (self.app_instance, self.event_bus, self.http_service, self.frame_tap,
+                                    self.task_service, self.pixmap_cache, QApplication.instance())
+                if obj is not None}
+        canvas = self.canvas if self.canvas is not None and not sip.isdeleted(self.canvas) else None
+        if canvas is not None:
+            ancestor = canvas.parent()
+            while ancestor is not None:
+                host.add(id(ancestor))
+                ancestor = ancestor.parent()
+
+        objects = list(self.window_widgets.get(plugin, ()))
+        for value in vars(plugin).values():
+            if isinstance(value, dict):
+                values = value.values()
+            elif isinstance(value, (list, tuple, set)):
+                values = value
+            else:
+                values = (value,)
+            objects.extend(item for item in values if isinstance(item, QObject))
+
+        owned, seen = [], set()
+        for obj in objects:
+            if id(obj) in seen or sip.isdeleted(obj) or obj is canvas:
+                continue
+            seen.add(id(obj))
+            if self._owned_by_plugin(obj, canvas, host):
+                owned.append(obj)
+        return owned
+
+    def _destroy_plugin_objects(self, plugin):
+        """销毁插件拥有的Qt对象（见 plugin_objects）"""
+        objects = self.plugin_objects(plugin)
+        self.window_widgets.pop(plugin, None)
+        for obj in objects:
+            if sip.isdeleted(obj):  # 已随父对象一起销毁
+                continue
+            if isinstance(obj, QTimer):
+                obj.stop()
+            elif isinstance(obj, QWidget):
+                obj.hide()
+            sip.delete(obj)
+
+    @staticmethod
+    def _owned_by_plugin(obj, canvas, host):
+        """沿父对象链判断：位于画布上，或最上层不是宿主对象"""
+        while obj is not None:
+            if obj is canvas:
+                return True
+            if id(obj) in host:
+                return False
+            obj = obj.parent()
+        return True
+
+    def check_leaks(self):
+        """
+        检查已卸载的插件是否已被回收
+
+        仍被引用的插件（未断开的信号、宿主保存的回调等）每次重新加载都会多留下一份实例和模块，
+        记录警告并列出引用者类型，便于定位。
+
+        Returns:
+            list: 本次发现的未回收插件名
+        """
+        self._leak_check_scheduled = False
+        pending, self._leak_checks = self._leak_checks, []
+        if not pending:
+            return []
+        gc.collect()
+        leaked = []
+        for name, *refs in pending:
+            survivors = [ref() for ref in refs if ref() is not None]
+            if not survivors:
+                continue
+            leaked.append(name)
+            self.leak_counter.inc()
+            referrers = self._describe_referrers(survivors[0], survivors)
+            plugin_log.warning(f"插件 {name} 卸载后未被回收，引用者: {referrers}",
+                               extra={'plugin': name, 'event': 'plugin_leaked'})
+        self.leaked_plugins.extend(leaked)
+        return leaked
+
+    @staticmethod
+    def _describe_referrers(obj, survivors):
+        names = set()
+        for referrer in gc.get_referrers(obj):
+            if referrer is survivors or isinstance(referrer, types.FrameType):
+                continue
+            if isinstance(referrer, types.MethodType):
+                names.add(f"方法 {referrer.__func__.__qualname__}")
+            elif isinstance(referrer, types.FunctionType):
+                names.add(f"函数 {referrer.__qualname__}")
+            elif isinstance(referrer, types.CellType):
+                # 闭包变量：找出持有该闭包的函数（通常是连接到信号上的 lambda）
+                closures = [holder for holder in gc.get_referrers(referrer) if isinstance(holder, tuple)]
+                functions = [func for closure in closures for func in gc.get_referrers(closure)
+                             if isinstance(func, types.FunctionType) and func.__closure__ is closure]
+                names.update(f"闭包 {func.__qualname__}" for func in functions)
+            else:
+                names.add(type(referrer).__name__)
+        return ", ".join(sorted(names)) or "未知"
+
+    def apply_scene_plugins(self, scene_plugins):
+        """
+        按场景启用插件：场景列出的插件启用并应用场景中的设置（不保存），其他插件禁用；
+        scene_plugins 为 None 时恢复保存的启用状态和设置。须在触发壁纸启动事件之前调用
+
+        Args:
+            scene_plugins (dict): 插件名 -> 覆盖的设置，见 Utils.Scene.Scene.plugins
+        """
+        if scene_plugins is None and self.scene_plugins is None:
+            return
+        self.scene_plugins = scene_plugins
+        settings = QSettings("VideoWallpaper", "Settings")
+        for plugin in self.plugins:
+            if scene_plugins is None:
+                plugin.enabled = settings.value(f"plugins/{plugin.name}/enabled", True, type=bool)
+            else:
+                plugin.enabled = plugin.name in scene_plugins
+            self._apply_plugin_settings(plugin, (scene_plugins or {}).get(plugin.name, {}))
+        if scene_plugins:
+            missing = set(scene_plugins) - {plugin.name for plugin in self.plugins}
+            if missing:
+                plugin_log.warning(f"场景使用的插件未加载: {', '.join(sorted(missing))}")
+
+    def _apply_plugin_settings(self, plugin, overrides):
+        """以保存的设置为基础覆盖场景中的值，只把变化的键通知插件"""
+        if not plugin.settings_schema:
+            if overrides:
+                plugin_log.warning(f"插件 {plugin.name} 没有声明设置项，忽略场景中的设置", extra={'plugin': plugin.name})
+            return
+        fields = {field.key: field for field in plugin.settings_schema}
+        values = load_plugin_settings(plugin)
+        for key, value in overrides.items():
+            if key in fields:
+                values[key] = fields[key].coerce(value)
+            else:
+                plugin_log.warning(f"插件 {plugin.name} 没有设置项 {key}", extra={'plugin': plugin.name})
+        changed = {key: value for key, value in values.items() if plugin.settings.get(key) != value}
+        if not changed:
+            return
+        plugin.settings.update(changed)
+        try:
+            plugin.apply_settings(changed)
+        except Exception as e:
+            plugin_log.error(f"插件 {plugin.name} 应用设置时出错: {e}", extra={'plugin': plugin.name})
+
+    def save_plugin_states(self, plugins):
+        """批量保存插件启用状态，只同步一次设置存储"""
+        settings = QSettings("VideoWallpaper", "Settings")
+        for plugin in plugins:
+            settings.setValue(f"plugins/{plugin.name}/enabled", plugin.enabled)
+        settings.sync()
 
     def trigger_wallpaper_start(self, video_path, loop):
         """触发壁纸启动事件"""
-        for plugin in self.plugins:
-            if plugin.enabled:
-                try:
-                    plugin.on_wallpaper_start(video_path, loop)
-                except Exception as e:
-                    print(f"插件 {plugin.name} 处理壁纸启动事件时出错: {e}")
+        self.event_bus.publish(EVENT_WALLPAPER_START, {'video_path': video_path, 'loop': loop}, sync=True)
 
     def trigger_wallpaper_stop(self):
-        """触发壁纸停止事件"""
-        for plugin in self.plugins:
-            if plugin.enabled:
-                try:
-                    plugin.on_wallpaper_stop()
-                except Exception as e:
-                    print(f"插件 {plugin.name} 处理壁纸停止事件时出错: {e}")
+        """触发壁纸停止事件（先取消插件的后台任务，停止后不再收到旧结果）"""
+        self.task_service.cancel_all()
+        self.event_bus.publish(EVENT_WALLPAPER_STOP, sync=True)
 
     def trigger_settings_changed(self, settings):
-        """触发设置更改事件"""
+        """触发设置更改事件：只通知变化的键，短时间内的多次修改合并为一次"""
+        self.event_bus.publish_settings(settings)
+
+    def trigger_quality_changed(self, level):
+        """触发画质档位变化事件"""
         for plugin in self.plugins:
-            if plugin.enabled:
-                try:
-                    plugin.on_settings_changed(settings)
-                except Exception as e:
-                    print(f"插件 {plugin.name} 处理设置更改事件时出错: {e}")
+            plugin.quality_level = level
+        self.event_bus.publish(EVENT_QUALITY_CHANGED, level, coalesce=True)
 
     def trigger_operate_on_window(self, window):
         """触发插件操作窗口事件"""
-        for plugin in self.plugins:
-            if plugin.enabled:
-                try:
-                    plugin.operate_on_window(window)
-                except Exception as e:
-                    print(f"插件 {plugin.name} 操作窗口时出错: {e}")
+        self.canvas = window
+        with Tracing.span("trigger_operate_on_window", plugins=len(self.plugins)):
+            self.event_bus.publish(EVENT_OPERATE_ON_WINDOW, window, sync=True)
 
     def cleanup_plugins(self):
-        """清理所有插件"""
-        for plugin in self.plugins:
-            try:
-                plugin.cleanup()
-            except Exception as e:
-                print(f"清理插件 {plugin.name} 时出错: {e}")
+        """卸载所有插件并停止共享服务"""
+        self.unload_plugins(check_leaks=False)
+        self.event_bus.shutdown()
+        self.http_service.shutdown()
+        self.task_service.shutdown()
+        self.pixmap_cache.shutdown()
 
 
 class VideoWallpaper(QWidget):
-    def __init__(self, video_path, loop=True, plugin_manager=None):
+    frame_decoded = pyqtSignal(object)  # 合成模式下解码完成的帧（可能从解码线程发出）
+    _backend_created = pyqtSignal(object, object)  # 后端实例, 创建失败时的异常（可能从后台线程发出）
+    _startup_recorded = False  # 本进程是否已记录过从启动到首次出画的耗时
+
+    def __init__(self, video_path, loop=True, plugin_manager=None, backend_name=None, composite=False,
+                 media_cache=None, seamless_loop=True, resume_cache=None, scene=None, asset_cache=None):
         super().__init__()
+        self.start_time = time.perf_counter()
         self.plugin_manager = plugin_manager
         self.video_path = video_path
+        self.media_cache = media_cache
+        self.resume_cache = resume_cache
+        # 实际播放的文件：慢速存储上的视频命中缓存时为本地副本
+        self.playing_path = media_cache.resolve(video_path) if media_cache else video_path
         self.loop = loop
+        self.seamless_loop = seamless_loop
         self.is_wallpaper_set = False
-        self.original_parent = ctypes.windll.user32.GetParent(int(self.winId()))  # 保存原始父窗口
+        self.backend = None
+        self._frame = None
+        self._still = None
+        self._hold_position = None
+        self._hold_deadline = 0.0
+        self._first_pixel = False
+        self._first_frame = False
+        self._closed = False
+        self._quality_level = None
+        self._still_saved_at = 0.0
+        self.composite = False
+        self.frame_pool = None
+        self.layer_timer = None
+        self.scene = scene
+        self.scene_view = None
+        self.original_parent = user32.GetParent(int(self.winId())) if user32 else 0  # 保存原始父窗口
 
         # 获取屏幕尺寸
         screen = QApplication.primaryScreen()
@@ -146,129 +515,371 @@ class VideoWallpaper(QWidget):
         self.setAttribute(Qt.WA_TransparentForMouseEvents, True)  # 允许鼠标事件
         self.setGeometry(screen_geometry)
 
-        # 创建透明的覆盖窗口用于插件控件
-        self.widget_overlay = QWidget()
-        # 在 VideoWallpaper 类的 __init__ 方法中，修改覆盖层设置
-        self.widget_overlay.setWindowFlags(
-            Qt.FramelessWindowHint |
-            Qt.Tool |
-            Qt.WindowStaysOnTopHint |
-            Qt.WindowDoesNotAcceptFocus  # 添加这行
-        )
+        # 创建透明的覆盖窗口用于插件控件（窗口大小随插件控件区域变化）
+        self.widget_overlay = PluginOverlay(screen_geometry)
 
-        self.widget_overlay.setAttribute(Qt.WA_TranslucentBackground)
-        self.widget_overlay.setAttribute(Qt.WA_TransparentForMouseEvents, False)
-        self.widget_overlay.setGeometry(screen_geometry)
+        # 上次最后显示的画面，在媒体后端就绪之前立即显示
+        if resume_cache:
+            with Tracing.span("resume.load_still"):
+                self._still = resume_cache.load_still(video_path, screen_geometry.size())
 
-        # 初始化VLC
+        self.backend_name = backend_name or resolve_backend_name(QSettings("VideoWallpaper", "Settings"), video_path)
+        backend_cls = BACKENDS.get(self.backend_name)
+        if composite and backend_cls is not None:
+            self._enable_composite(screen_geometry.size(), backend_cls)
+
+        # 定期保存播放位置和画面，程序被强制结束（注销、关机）时也能恢复到最近的位置
+        self.resume_timer = QTimer(self)
+        self.resume_timer.setInterval(RESUME_POSITION_INTERVAL_MS)
+        self.resume_timer.timeout.connect(self.save_resume_state)
+
+        # 将窗口设置为壁纸
+        with Tracing.span("set_as_wallpaper"):
+            self._set_as_wallpaper()
+
+        # 如果设置壁纸成功，则显示控件覆盖层、场景图层并通知插件
+        if self.is_wallpaper_set and (self.plugin_manager or scene):
+            self.widget_overlay.activate()
+            if scene is not None:
+                self.scene_view = SceneView(self.widget_overlay.canvas, asset_cache)
+                self.scene_view.apply(scene)
+            if self.plugin_manager:
+                self.plugin_manager.trigger_operate_on_window(self.widget_overlay.canvas)
+
+        # 媒体后端在窗口显示之后再创建，解码器初始化不会推迟上次画面的显示
+        self._backend_created.connect(self._on_backend_created)
+        QTimer.singleShot(0, self._start_backend)
+
+    def _start_backend(self):
+        if self._closed:
+            return
+        if self._still is not None and self.isVisible():
+            self.repaint()  # 立即画出上次的画面，再开始可能阻塞的后端初始化
+        backend_cls = BACKENDS.get(self.backend_name)
+        if backend_cls is not None and backend_cls.init_off_gui_thread:
+            threading.Thread(target=self._create_backend, name="backend-init", daemon=True).start()
+        else:
+            self._create_backend()
+
+    def _create_backend(self):
+        """创建后端实例（可在后台线程执行），结果经信号交回GUI线程"""
+        backend, error = None, None
         try:
-            import vlc
-            self.instance = vlc.Instance("--no-xlib")
-            self.mlist_player = self.instance.media_list_player_new()
-            media_list = self.instance.media_list_new([self.video_path])
-            self.mlist_player.set_media_list(media_list)
-            self.media_player = self.instance.media_player_new()
-            self.media_player.set_hwnd(int(self.winId()))
-            self.mlist_player.set_media_player(self.media_player)
-            self.mlist_player.set_playback_mode(vlc.PlaybackMode.loop if self.loop else vlc.PlaybackMode.default)
-            self.mlist_player.play()
+            with Tracing.span("backend.create", backend=self.backend_name):
+                backend = create_backend(self.backend_name)
         except Exception as e:
-            QMessageBox.critical(self, "错误", f"无法初始化VLC播放器: {str(e)}")
-            self.close()
+            error = e
+        try:
+            self._backend_created.emit(backend, error)
+        except RuntimeError:
+            # 后端就绪之前壁纸窗口已被销毁
+            if backend is not None:
+                backend.release()
+
+    def _on_backend_created(self, backend, error):
+        if self._closed:
+            if backend is not None:
+                backend.release()
             return
+        try:
+            if error is not None:
+                raise error
+            self.backend = backend
+            backend.report_callback = self._save_backend_report
+            if self.composite:
+                backend.use_frame_buffers(self.frame_pool)
+                backend.set_frame_sink(self.frame_decoded.emit)
+            elif backend.renders_to_window:
+                backend.attach(self)
+            else:
+                backend.set_frame_sink(self._present_frame)
+            backend.set_seamless_loop(self.seamless_loop)
+            with Tracing.span("backend.open"):
+                backend.open(self.playing_path)
+                backend.set_loop(self.loop)
+                position = self.resume_cache.position(self.video_path, backend.duration()) if self.resume_cache else 0.0
+                if position > 0 and self._still is not None:
+                    # 跳转完成之前继续显示保存的画面，不先闪过视频开头
+                    self._hold_position = position
+                    self._hold_deadline = time.perf_counter() + RESUME_HOLD_SECONDS
+                backend.play_from(position)
+            if self._quality_level is not None:
+                self.apply_quality(self._quality_level)
+            if self.media_cache and self.playing_path == self.video_path:
+                self.media_cache.ready.connect(self._switch_to_cached)
+            self.resume_timer.start()
+            wallpaper_log.info(f"媒体后端: {backend.display_name}",
+                               extra={'event': 'backend_started', 'resume_position': round(position, 2),
+                                      'duration_ms': round((time.perf_counter() - self.start_time) * 1000, 1)})
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"无法初始化媒体后端 {self.backend_name}: {str(e)}")
+            self.stop_wallpaper()
 
-        # 将窗口设置为壁纸
-        self._set_as_wallpaper()
+    def set_scene(self, scene):
+        """切换到背景相同的另一个场景：只替换变化的图层，背景继续播放"""
+        self.scene = scene
+        if self.scene_view is not None:
+            self.scene_view.apply(scene)
+
+    def _save_backend_report(self, report):
+        """保存后端报告的内存/CPU取舍（内存循环），设置窗口中按视频显示"""
+        save_report(QSettings("VideoWallpaper", "Settings"), self.video_path, report)
+
+    def _enable_composite(self, frame_size, backend_cls):
+        """
+        合成模式：后端解码到宿主持有的帧缓冲，插件图层直接混合进帧后由本窗口显示，
+        不再需要单独的覆盖层窗口（插件控件在此模式下不接收鼠标事件）
+        """
+        if not backend_cls.supports_frame_buffers:
+            wallpaper_log.warning(f"媒体后端 {backend_cls.display_name} 不支持合成模式，使用独立覆盖层窗口")
+            return
+        self.frame_pool = FrameBufferPool(frame_size)
+        self.composite = True
+        self.widget_overlay.set_composited(True)
+        self.frame_decoded.connect(self._composite_frame)
+
+        # 插件图层按覆盖层帧率重新渲染，视频每一帧只做混合
+        self.layer_timer = QTimer(self)
+        self.layer_timer.timeout.connect(self.widget_overlay.refresh_layers)
+        self.layer_timer.start(1000 // 30)
+
+    def _holding_still(self):
+        """恢复位置的跳转完成（或等待超时）之前丢弃解码出的帧，继续显示保存的画面"""
+        if self._hold_position is None:
+            return False
+        if (self.backend.position() >= self._hold_position - RESUME_HOLD_TOLERANCE
+                or time.perf_counter() > self._hold_deadline):
+            self._hold_position = None
+            return False
+        return True
 
-        # 如果设置壁纸成功，则显示控件覆盖层并通知插件
-        if self.is_wallpaper_set and self.plugin_manager:
-            self.widget_overlay.show()
-            self.plugin_manager.trigger_operate_on_window(self.widget_overlay)
+    def _composite_frame(self, image):
+        """把缓存的插件图层混合进刚解码的帧，显示后归还上一帧的缓冲"""
+        if self.frame_pool is None:
+            return
+        if self._holding_still():
+            self.frame_pool.release(image)
+            return
+        if self.plugin_manager:
+            self.plugin_manager.frame_tap.offer(image)
+        painter = QPainter(image)
+        self.widget_overlay.composite_into(painter)
+        painter.end()
+        previous = self._frame
+        self._frame = image
+        self._on_first_frame()
+        self.update()
+        if previous is not None and previous is not image:
+            self.frame_pool.release(previous)
+
+    def _switch_to_cached(self, source, local_path):
+        """本地副本缓存完成后，从当前位置起改为播放副本，之后循环不再读取源文件"""
+        if source != self.video_path or not self.backend or self.playing_path == local_path:
+            return
+        if not self.backend.needs_media():
+            return  # 画面已全部保存在内存中，不再读取文件
+        try:
+            position = self.backend.position()
+            self.backend.open(local_path)
+            self.backend.set_loop(self.loop)
+            # VLC 在进入播放状态之前不能跳转，由后端的 play_from 处理
+            self.backend.play_from(position)
+            # 重新打开后播放速率等画质设置需要重新应用
+            if self._quality_level is not None:
+                self.apply_quality(self._quality_level)
+            self.playing_path = local_path
+            wallpaper_log.info(f"已切换到本地缓存副本: {local_path}", extra={'event': 'media_cache_switch'})
+        except Exception as e:
+            wallpaper_log.error(f"切换到缓存副本时出错: {e}")
+
+    def apply_quality(self, level):
+        """应用画质档位到媒体后端（后端尚未就绪时在就绪后应用）"""
+        self._quality_level = level
+        # 覆盖层帧率：合成模式下为图层重新渲染的间隔，独立窗口模式下为覆盖层窗口的重绘上限
+        if self.layer_timer:
+            self.layer_timer.setInterval(1000 // max(1, level.overlay_fps))
+        self.widget_overlay.set_max_fps(level.overlay_fps)
+        if not self.backend:
+            return
+        try:
+            self.backend.set_rate(level.playback_rate)
+            self.backend.set_decode_scale(level.decode_scale)
+        except Exception as e:
+            wallpaper_log.error(f"应用画质档位时出错: {e}")
+
+    def _present_frame(self, image):
+        """接收后端输出的帧（不直接渲染到窗口的后端）"""
+        if self._holding_still():
+            return
+        self._frame = image
+        self._on_first_frame()
+        self.update()
+        if self.plugin_manager:
+            self.plugin_manager.frame_tap.offer(image)
+
+    def paintEvent(self, event):
+        image = self._frame if self._frame is not None else self._still
+        if image is None:
+            return
+        painter = QPainter(self)
+        painter.drawImage(self.rect(), image)
+        painter.end()
+        if not self._first_pixel:
+            self._first_pixel = True
+            self._record_startup_time("first_pixel", "保存的画面" if image is self._still else "视频帧")
+
+    def _on_first_frame(self):
+        """第一帧视频到达：之后不再需要保存的画面"""
+        if self._first_frame:
+            return
+        self._first_frame = True
+        self._still = None
+        self._record_startup_time("first_frame", "视频帧")
+
+    def _record_startup_time(self, name, source):
+        """记录从开始启动壁纸到首次出画（first_pixel）或第一帧视频（first_frame）的耗时"""
+        elapsed_ms = (time.perf_counter() - self.start_time) * 1000
+        Metrics.gauge(f"wallpaper.{name}_ms", "从启动壁纸到首次出画/第一帧视频的耗时").set(round(elapsed_ms, 1))
+        recorder = Tracing.recorder()
+        if recorder is not None:
+            recorder.instant(f"wallpaper.{name}", "wallpaper", {'source': source})
+        extra = {'event': f"wallpaper_{name}", 'duration_ms': round(elapsed_ms, 1), 'source': source}
+        if name == "first_pixel" and not VideoWallpaper._startup_recorded:
+            # 自启动时更关心从进程启动（登录）到桌面出画的总耗时
+            VideoWallpaper._startup_recorded = True
+            since_launch_ms = (time.time() - psutil.Process().create_time()) * 1000
+            Metrics.gauge("startup.first_pixel_ms", "从进程启动到壁纸首次出画的耗时").set(round(since_launch_ms, 1))
+            extra['since_launch_ms'] = round(since_launch_ms, 1)
+        wallpaper_log.info(f"壁纸{'首次出画' if name == 'first_pixel' else '第一帧视频'}（{source}）: {elapsed_ms:.0f}ms",
+                           extra=extra)
+
+    def save_resume_state(self):
+        """保存播放位置，并按 RESUME_STILL_INTERVAL 保存当前画面，供下次启动时立即显示并继续播放"""
+        if not self.resume_cache or not self.backend:
+            return
+        try:
+            self.resume_cache.save_position(self.video_path, self.backend.position())
+            now = time.monotonic()
+            if now - self._still_saved_at < RESUME_STILL_INTERVAL and self.resume_timer.isActive():
+                return
+            self._still_saved_at = now
+            size = self.size()
+            if self._frame is not None:
+                # 帧缓冲会被后端复用，复制一份交给后台线程缩放和编码
+                self.resume_cache.save_still(self._frame.copy(), self.video_path, size)
+            elif self.backend.renders_to_window:
+                snapshot_path = self.resume_cache.snapshot_path(self.video_path)
+                if self.backend.snapshot(snapshot_path, size.width(), size.height()):
+                    self.resume_cache.save_still_file(snapshot_path, self.video_path, size)
+        except Exception as e:
+            wallpaper_log.warning(f"保存播放位置时出错: {e}")
 
     def _find_workerw(self):
         """查找 WorkerW 窗口句柄 """
-        progman = ctypes.windll.user32.FindWindowW("Progman", None)
+        progman = user32.FindWindowW("Progman", None)
         result = ctypes.wintypes.DWORD()
-        ctypes.windll.user32.SendMessageTimeoutW(progman, 0x052C, 0, 0, 0x0002, 1000, ctypes.byref(result))
+        user32.SendMessageTimeoutW(progman, 0x052C, 0, 0, 0x0002, 1000, ctypes.byref(result))
 
         workerw = None
 
         def enum_windows_proc(hwnd, lParam):
             nonlocal workerw
-            if ctypes.windll.user32.FindWindowExW(hwnd, None, "SHELLDLL_DefView", None):
-                workerw_candidate = ctypes.windll.user32.FindWindowExW(None, hwnd, "WorkerW", None)
+            if user32.FindWindowExW(hwnd, None, "SHELLDLL_DefView", None):
+                workerw_candidate = user32.FindWindowExW(None, hwnd, "WorkerW", None)
                 if workerw_candidate:
                     workerw = workerw_candidate
                     return False  # Stop enumeration
             return True
 
         enum_func = ctypes.WINFUNCTYPE(ctypes.c_bool, ctypes.c_int, ctypes.c_int)
-        ctypes.windll.user32.EnumWindows(enum_func(enum_windows_proc), 0)
+        user32.EnumWindows(enum_func(enum_windows_proc), 0)
 
         return workerw
 
     def _set_as_wallpaper(self):
         """使用Windows API将窗口设置为壁纸"""
+        if user32 is None:
+            # 非Windows平台没有WorkerW，窗口按普通置底窗口显示
+            self.is_wallpaper_set = True
+            wallpaper_log.info("非Windows平台，壁纸以普通窗口模式运行")
+            return
+
         try:
-            workerw = self._find_workerw()
+            with Tracing.span("find_workerw"):
+                workerw = self._find_workerw()
             if workerw:
                 # 将视频窗口和控件覆盖窗口都设置为 WorkerW 的子窗口
-                ctypes.windll.user32.SetParent(int(self.winId()), workerw)
-                ctypes.windll.user32.SetParent(int(self.widget_overlay.winId()), workerw)
-
-                # 调整窗口Z序，确保覆盖窗口在视频窗口之上
-                ctypes.windll.user32.SetWindowPos(
-                    int(self.widget_overlay.winId()),
-                    -1,  # HWND_TOP
-                    0, 0, 0, 0,
-                    0x0001 | 0x0002  # SWP_NOMOVE | SWP_NOSIZE
-                )
+                with Tracing.span("SetParent", window="video"):
+                    user32.SetParent(int(self.winId()), workerw)
+                if not self.composite:
+                    with Tracing.span("SetParent", window="overlay"):
+                        user32.SetParent(int(self.widget_overlay.winId()), workerw)
+
+                    # 调整窗口Z序，确保覆盖窗口在视频窗口之上
+                    user32.SetWindowPos(
+                        int(self.widget_overlay.winId()),
+                        -1,  # HWND_TOP
+                        0, 0, 0, 0,
+                        0x0001 | 0x0002  # SWP_NOMOVE | SWP_NOSIZE
+                    )
 
                 self.is_wallpaper_set = True
-                print(f"成功设置为壁纸，WorkerW句柄: {workerw}")
+                wallpaper_log.info(f"成功设置为壁纸，WorkerW句柄: {workerw}", extra={'event': 'wallpaper_embedded'})
             else:
-                print("警告：未找到WorkerW窗口，可能无法正确设置壁纸")
+                wallpaper_log.warning("未找到WorkerW窗口，可能无法正确设置壁纸")
                 QMessageBox.warning(self, "错误", "无法将窗口嵌入桌面。")
                 self.close()
         except Exception as e:
-            print(f"设置壁纸时出错: {e}")
+            wallpaper_log.exception(f"设置壁纸时出错: {e}")
             self.close()
 
     def stop_wallpaper(self):
         """停止壁纸播放并关闭所有窗口"""
         try:
-            if hasattr(self, 'mlist_player'):
-                self.mlist_player.stop()
-            if hasattr(self, 'media_player'):
-                self.media_player.stop()
+            self.resume_timer.stop()
+            self.save_resume_state()
+            if self.backend:
+                self.backend.stop()
+            if self.layer_timer:
+                self.layer_timer.stop()
 
             # 关闭控件覆盖窗口
             if hasattr(self, 'widget_overlay'):
                 self.widget_overlay.close()
 
             # 恢复窗口父级关系
-            if self.is_wallpaper_set:
-                ctypes.windll.user32.SetParent(int(self.winId()), self.original_parent or 0)
+            if self.is_wallpaper_set and user32:
+                user32.SetParent(int(self.winId()), self.original_parent or 0)
 
             self.close()  # 关闭视频窗口
-            print("壁纸已停止")
+            wallpaper_log.info("壁纸已停止", extra={'event': 'wallpaper_stopped'})
             return True
         except Exception as e:
-            print(f"停止壁纸时出错: {e}")
+            wallpaper_log.exception(f"停止壁纸时出错: {e}")
             return False
 
     def closeEvent(self, event):
         """处理窗口关闭事件"""
-        # 释放VLC资源
+        self._closed = True
+        self.resume_timer.stop()
+        if self.media_cache:
+            try:
+                self.media_cache.ready.disconnect(self._switch_to_cached)
+            except TypeError:
+                pass
+
+        # 释放媒体后端资源
         try:
-            if hasattr(self, 'mlist_player'):
-                self.mlist_player.release()
-            if hasattr(self, 'media_player'):
-                self.media_player.release()
-            if hasattr(self, 'instance'):
-                self.instance.release()
+            if self.backend:
+                self.backend.release()
+                self.backend = None
         except Exception as e:
-            print(f"释放VLC资源时出错: {e}")
+            wallpaper_log.error(f"释放媒体后端资源时出错: {e}")
+
+        # 释放场景图层持有的图片引用（控件随覆盖层销毁）
+        if self.scene_view is not None:
+            self.scene_view.clear()
+            self.scene_view = None
 
         # 确保控件覆盖层也已关闭
         if hasattr(self, 'widget_overlay'):
@@ -278,96 +889,155 @@ class VideoWallpaper(QWidget):
 
 
 class PluginInfoDialog(QDialog):
+    """插件信息窗口：模型/视图实现，打开耗时与插件数量无关"""
+
     def __init__(self, plugin_manager, parent=None):
         super().__init__(parent)
         self.plugin_manager = plugin_manager
         self.setWindowTitle("插件信息")
-        self.resize(700, 500)
+        self.resize(860, 500)
+        self._pending_states = {}
 
         main_layout = QVBoxLayout(self)
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_content = QWidget()
-        scroll_layout = QVBoxLayout(scroll_content)
-        scroll_area.setWidget(scroll_content)
-
-        self.list_widget = QListWidget()
-        self.list_widget.setResizeMode(QListWidget.Adjust)
-        self.list_widget.setWordWrap(True)
-        self.list_widget.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.list_widget.customContextMenuRequested.connect(self.show_context_menu)
-
-        for plugin in self.plugin_manager.plugins:
-            item_widget = QWidget()
-            item_layout = QVBoxLayout(item_widget)
-            item_layout.setContentsMargins(5, 5, 5, 5)
-
-            checkbox = QCheckBox(f"{plugin.name} v{plugin.version}")
-            checkbox.setStyleSheet("font-weight: bold;")
-            checkbox.setChecked(plugin.enabled)
-            checkbox.stateChanged.connect(lambda state, p=plugin: self.toggle_plugin(p, state))
-
-            author_label = QLabel(f"作者: {plugin.author}")
-            desc_label = QLabel(f"描述: {plugin.description}")
-            desc_label.setWordWrap(True)
-
-            item_layout.addWidget(checkbox)
-            item_layout.addWidget(author_label)
-            item_layout.addWidget(desc_label)
-
-            item = QListWidgetItem(self.list_widget)
-            item.setSizeHint(item_widget.sizeHint())
-            self.list_widget.addItem(item)
-            self.list_widget.setItemWidget(item, item_widget)
-
-            # Store plugin reference in item for context menu
-            item.setData(Qt.UserRole, plugin)
-
-        scroll_layout.addWidget(self.list_widget)
-        main_layout.addWidget(scroll_area)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("搜索名称、作者或描述...")
+        self.search_input.setClearButtonEnabled(True)
+        main_layout.addWidget(self.search_input)
+
+        self.model = PluginListModel(plugin_manager, self)
+        self.model.enabled_changed.connect(self.queue_state_save)
+        self.model.refresh_stats()
+        self.proxy = PluginFilterModel(self)
+        self.proxy.setSourceModel(self.model)
+
+        self.table_view = QTableView()
+        self.table_view.setModel(self.proxy)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.table_view.setWordWrap(False)
+        self.table_view.verticalHeader().hide()
+        self.table_view.setItemDelegateForColumn(COL_NAME, PluginItemDelegate(self.table_view))
+        # 固定行高，视图无需逐行测量
+        self.table_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table_view.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 10)
+        header = self.table_view.horizontalHeader()
+        for column, width in enumerate(COLUMN_WIDTHS):
+            header.resizeSection(column, width)
+        header.setStretchLastSection(True)
+        # 点击表头排序；初始按名称排列，源模型已有序，不经过代理模型排序
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(COL_NAME, Qt.AscendingOrder)
+        header.sortIndicatorChanged.connect(self.apply_sort)
+        self.table_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.table_view.customContextMenuRequested.connect(self.show_context_menu)
+        main_layout.addWidget(self.table_view)
+
+        self.assets_label = QLabel()
+        main_layout.addWidget(self.assets_label)
+        self.update_assets_label()
+
+        # 搜索输入去抖，连续输入时只过滤一次
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(lambda: self.proxy.set_search_text(self.search_input.text()))
+        self.search_input.textChanged.connect(self.search_timer.start)
+
+        # 资源统计随运行变化，打开期间定期刷新
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.model.refresh_stats)
+        self.stats_timer.timeout.connect(self.update_assets_label)
+        self.stats_timer.start(2000)
+
+        # 启用状态在短时间内的多次修改合并为一次写入
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(500)
+        self.save_timer.timeout.connect(self.flush_state_changes)
 
         btn_layout = QHBoxLayout()
-        btn_layout.addStretch()
+        self.count_label = QLabel()
+        enable_btn = QPushButton("启用所选")
+        enable_btn.clicked.connect(lambda: self.set_selected_enabled(True))
+        disable_btn = QPushButton("禁用所选")
+        disable_btn.clicked.connect(lambda: self.set_selected_enabled(False))
         close_btn = QPushButton("关闭")
         close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(self.count_label)
+        btn_layout.addStretch()
+        btn_layout.addWidget(enable_btn)
+        btn_layout.addWidget(disable_btn)
         btn_layout.addWidget(close_btn)
         main_layout.addLayout(btn_layout)
-        # 添加最小化事件处理
-        self.setWindowTitle("LiangYuPaper")
-        self.setFixedSize(550, 450)
 
-        # 新增：设置窗口最小化事件过滤器
-        self.installEventFilter(self)
-
-    # 新增：事件过滤器处理最小化事件
-    def eventFilter(self, obj, event):
-        if obj == self and event.type() == event.WindowStateChange:
-            # 当窗口被最小化且启用了"最小化到托盘"选项时
-            if self.isMinimized() and self.minimize_to_tray_check.isChecked():
-                self.hide()  # 隐藏窗口
-                self.tray_icon.showMessage(
-                    "已最小化",
-                    "程序已最小化到系统托盘",
-                    QSystemTrayIcon.Information,
-                    2000
-                )
-        return super().eventFilter(obj, event)
-
-    def toggle_plugin(self, plugin, state):
-        plugin.enabled = state == Qt.Checked
-        settings = QSettings("VideoWallpaper", "Settings")
-        settings.setValue(f"plugins/{plugin.name}/enabled", plugin.enabled)
+        self.proxy.rowsInserted.connect(self.update_count)
+        self.proxy.rowsRemoved.connect(self.update_count)
+        self.proxy.modelReset.connect(self.update_count)
+        self.proxy.layoutChanged.connect(self.update_count)
+        self.model.dataChanged.connect(self.update_count)
+        self.update_count()
+
+    def apply_sort(self, column, order):
+        if column == COL_NAME and order == Qt.AscendingOrder:
+            self.proxy.sort(-1)  # 恢复源模型的名称顺序
+        else:
+            self.proxy.sort(column, order)
+
+    def update_count(self):
+        enabled = sum(1 for plugin in self.model.plugins if plugin.enabled)
+        self.count_label.setText(f"显示 {self.proxy.rowCount()} / 共 {len(self.model.plugins)} 个插件，已启用 {enabled} 个")
+
+    def update_assets_label(self):
+        stats = self.plugin_manager.pixmap_cache.stats()
+        requests = stats['hits'] + stats['misses']
+        hit_rate = f"{stats['hits'] / requests:.0%}" if requests else "-"
+        self.assets_label.setText(
+            f"共享图片缓存：{stats['entries']} 张，{stats['bytes'] / 1024 ** 2:.1f} / {stats['max_bytes'] / 1024 ** 2:.0f} MB，"
+            f"命中率 {hit_rate}，已淘汰 {stats['evictions']} 张，字体 {stats['fonts']} 个")
+
+    def set_selected_enabled(self, enabled):
+        """批量启用/禁用所选插件；未选择时作用于当前过滤结果中的全部插件"""
+        indexes = self.table_view.selectionModel().selectedRows()
+        if not indexes:
+            indexes = [self.proxy.index(row, 0) for row in range(self.proxy.rowCount())]
+        rows = [self.proxy.mapToSource(index).row() for index in indexes]
+        self.model.set_enabled(rows, enabled)
+
+    def queue_state_save(self, plugins):
+        for plugin in plugins:
+            self._pending_states[plugin.name] = plugin
+        self.save_timer.start()
+
+    def flush_state_changes(self):
+        if self._pending_states:
+            self.plugin_manager.save_plugin_states(list(self._pending_states.values()))
+            self._pending_states.clear()
+
+    def done(self, result):
+        self.stats_timer.stop()
+        self.save_timer.stop()
+        self.flush_state_changes()
+        super().done(result)
+
+    def closeEvent(self, event):
+        self.stats_timer.stop()
+        self.save_timer.stop()
+        self.flush_state_changes()
+        super().closeEvent(event)
 
     def show_context_menu(self, pos):
-        item = self.list_widget.itemAt(pos)
-        if item:
-            plugin = item.data(Qt.UserRole)
-            if plugin and hasattr(plugin, 'show_settings_dialog'):
-                menu = QMenu(self)
-                settings_action = QAction("设置", self)
-                settings_action.triggered.connect(plugin.show_settings_dialog)
-                menu.addAction(settings_action)
-                menu.exec_(self.list_widget.mapToGlobal(pos))
+        index = self.table_view.indexAt(pos)
+        if not index.isValid():
+            return
+        plugin = index.data(PluginListModel.PluginRole)
+        if plugin and hasattr(plugin, 'show_settings_dialog'):
+            menu = QMenu(self)
+            settings_action = QAction("设置", self)
+            settings_action.triggered.connect(plugin.show_settings_dialog)
+            menu.addAction(settings_action)
+            menu.exec_(self.table_view.viewport().mapToGlobal(pos))
 
 
 class ProcessMonitor(QThread):
@@ -381,6 +1051,7 @@ class ProcessMonitor(QThread):
 
     def run(self):
         """线程运行函数"""
+        threading.current_thread().name = "process-monitor"  # QThread 在采样分析结果中显示的线程名
         while self._is_running:
             try:
                 cpu_percent = self.current_process.cpu_percent(interval=1.0)
@@ -390,7 +1061,7 @@ class ProcessMonitor(QThread):
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 self._is_running = False
             except Exception as e:
-                print(f"监控进程资源时出错: {e}")
+                app_log.error(f"监控进程资源时出错: {e}")
             self.msleep(2000)
 
     def stop(self):
@@ -401,26 +1072,59 @@ class ProcessMonitor(QThread):
 
 
 class SettingsWindow(QWidget):
-    def __init__(self, auto_start_video=None, auto_loop=True):
+    def __init__(self, auto_start_video=None, auto_loop=True, backend_override=None):
         super().__init__()
         self.setWindowTitle("LiangYuPaper")
         self.setFixedSize(550, 450)
 
         self.settings = QSettings("VideoWallpaper", "Settings")
         self.wallpaper_window = None
+        self.media_library_dialog = None
+        self.log_viewer = None
+        self.backend_override = backend_override
+        self._services_shut_down = False
 
         self.plugin_manager = PluginManager(self)
+        # 内存统计只包含开启之后的分配，需要在加载插件之前开启
+        self.plugin_manager.resources.set_memory_tracking(
+            self.settings.value("plugins/track_memory", False, type=bool))
         self.plugin_manager.load_plugins()
 
+        max_mb = self.settings.value("media_cache/max_mb", 4096, type=int)
+        self.media_cache = MediaCache(max_bytes=max_mb * 1024 ** 2, parent=self)
+        self.resume_cache = ResumeCache(settings=self.settings)
+        self.asset_cache = AssetCache(parent=self)
+        self.current_scene = None
+
         self.init_ui()
         self.init_tray_icon()
 
         self.load_settings()
 
+        self.governor = QualityGovernor(
+            cpu_budget=self.settings.value("governor/cpu_budget", 5.0, type=float),
+            enabled=self.settings.value("governor/enabled", False, type=bool),
+            parent=self
+        )
+        self.governor.level_changed.connect(self.apply_quality_level)
+
         self.system_monitor = ProcessMonitor()
         self.system_monitor.update_signal.connect(self.update_system_status)
+        self.system_monitor.update_signal.connect(self.governor.on_sample)
         self.system_monitor.start()
 
+        # 事件循环卡顿时把GUI线程调用栈写入日志
+        self.loop_monitor = LoopMonitor(self.plugin_manager, parent=self)
+        self.loop_monitor.start()
+
+        # 本机控制通道：python main.py --profile start|stop|status
+        self.control_server = ControlServer(parent=self)
+        self.control_server.register("profile", self.handle_profile_command)
+        self.control_server.start()
+
+        # 两个退出入口之外的退出（例如注销时系统结束会话）也要停止后台线程和插件
+        QApplication.instance().aboutToQuit.connect(self._shutdown_services)
+
         self.status_timer = QTimer(self)
         self.status_timer.timeout.connect(self.update_autostart_status)
         self.status_timer.start(2000)
@@ -459,12 +1163,7 @@ class SettingsWindow(QWidget):
         )
 
         if reply == QMessageBox.Yes:
-            # 停止壁纸并清理资源
-            if self.wallpaper_window:
-                self.stop_wallpaper()
-
-            # 停止系统监控线程
-            self.system_monitor.stop()
+            self._shutdown_services()
 
             # 隐藏托盘图标
             self.tray_icon.hide()
@@ -481,21 +1180,70 @@ class SettingsWindow(QWidget):
         self.path_input = QLineEdit()
         self.browse_btn = QPushButton("浏览...")
         self.browse_btn.clicked.connect(self.browse_video)
+        self.library_btn = QPushButton("媒体库...")
+        self.library_btn.clicked.connect(self.show_media_library)
         path_layout.addWidget(self.path_input)
         path_layout.addWidget(self.browse_btn)
+        path_layout.addWidget(self.library_btn)
         main_layout.addLayout(path_layout)
 
         # Options
         options_layout = QHBoxLayout()
         self.loop_check = QCheckBox("循环播放")
         self.loop_check.setChecked(True)
+        self.seamless_loop_check = QCheckBox("无缝循环")
+        self.seamless_loop_check.setToolTip("循环点不重新打开视频，避免短视频每次循环时的卡顿和黑帧")
+        self.media_cache_check = QCheckBox("缓存网络/移动存储上的视频")
+        self.media_cache_check.setToolTip("把NAS共享或U盘上的视频复制到本地缓存，循环播放时不再反复读取源文件")
+        self.resume_check = QCheckBox("恢复上次画面")
+        self.resume_check.setToolTip("启动时立即显示上次最后的画面，并从上次的播放位置继续")
         self.minimize_to_tray_check = QCheckBox("X键最小化到托盘")
         self.minimize_to_tray_check.setChecked(True)
         options_layout.addWidget(self.loop_check)
+        options_layout.addWidget(self.seamless_loop_check)
+        options_layout.addWidget(self.resume_check)
         options_layout.addWidget(self.minimize_to_tray_check)
+        options_layout.addWidget(self.media_cache_check)
         options_layout.addStretch()
         main_layout.addLayout(options_layout)
 
+        # Media backend
+        backend_layout = QHBoxLayout()
+        backend_layout.addWidget(QLabel("解码后端:"))
+        self.backend_combo = QComboBox()
+        for name, backend_cls in BACKENDS.items():
+            # 程序化壁纸和图片按扩展名确定后端，不作为视频解码后端提供
+            if backend_cls.decodes_video:
+                self.backend_combo.addItem(backend_cls.display_name, name)
+        self.per_video_backend_check = QCheckBox("仅用于当前视频")
+        self.composite_check = QCheckBox("合成模式")
+        self.composite_check.setToolTip("插件图层直接混合进视频帧，只使用一个窗口（插件控件不响应点击）")
+        backend_layout.addWidget(self.backend_combo)
+        backend_layout.addWidget(self.per_video_backend_check)
+        backend_layout.addWidget(self.composite_check)
+        backend_layout.addStretch()
+        main_layout.addLayout(backend_layout)
+        # 当前视频上次使用内存循环时的内存占用和CPU占用，供选择是否对该视频使用
+        self.backend_report_label = QLabel()
+        self.backend_report_label.setWordWrap(True)
+        self.backend_report_label.setStyleSheet("color: gray;")
+        self.backend_report_label.hide()
+        main_layout.addWidget(self.backend_report_label)
+
+        # Quality governor
+        governor_layout = QHBoxLayout()
+        self.governor_check = QCheckBox("自适应画质")
+        self.cpu_budget_spin = QDoubleSpinBox()
+        self.cpu_budget_spin.setRange(0.5, 400.0)
+        self.cpu_budget_spin.setSingleStep(0.5)
+        self.cpu_budget_spin.setSuffix(" %")
+        governor_layout.addWidget(self.governor_check)
+        governor_layout.addWidget(QLabel("CPU预算(单核):"))
+        governor_layout.addWidget(self.cpu_budget_spin)
+        governor_layout.addStretch()
+        main_layout.addLayout(governor_layout)
+        self.path_input.textChanged.connect(self.refresh_backend_selection)
+
         # Autostart
         autostart_group = QWidget()
         autostart_layout_main = QVBoxLayout(autostart_group)
@@ -539,9 +1287,13 @@ class SettingsWindow(QWidget):
         self.reload_plugins_btn = QPushButton("重新加载插件")
         self.reload_plugins_btn.clicked.connect(self.reload_plugins)
         self.open_plugin_dir_btn = QPushButton("打开插件目录")
+        self.track_memory_check = QCheckBox("统计插件内存")
+        self.track_memory_check.setToolTip("用 tracemalloc 按插件统计内存分配（略增开销，只统计开启之后的分配）")
+        self.track_memory_check.toggled.connect(self.plugin_manager.resources.set_memory_tracking)
         plugin_btn_layout.addWidget(self.plugin_info_btn)
         plugin_btn_layout.addWidget(self.reload_plugins_btn)
         plugin_btn_layout.addWidget(self.open_plugin_dir_btn)
+        plugin_btn_layout.addWidget(self.track_memory_check)
         plugin_layout.addLayout(plugin_btn_layout)
 
         main_layout.addWidget(plugin_group)
@@ -565,11 +1317,37 @@ class SettingsWindow(QWidget):
     def browse_video(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "选择视频文件", "",
-            "视频文件 (*.mp4 *.avi *.mkv *.mov *.wmv);;所有文件 (*.*)"
+            "视频文件 (*.mp4 *.avi *.mkv *.mov *.wmv);;场景 (*.json *.toml);;"
+            "图片 (*.png *.jpg *.jpeg *.bmp *.webp);;程序化壁纸 (*.py);;所有文件 (*.*)"
         )
         if file_path:
             self.path_input.setText(file_path)
 
+    def refresh_backend_selection(self):
+        """根据当前视频显示生效的解码后端"""
+        video_path = self.path_input.text().strip()
+        name = resolve_backend_name(self.settings, video_path, self.backend_override)
+        index = self.backend_combo.findData(name)
+        # 按扩展名确定的后端不可更改
+        self.backend_combo.setEnabled(index >= 0)
+        self.per_video_backend_check.setEnabled(index >= 0)
+        if index >= 0:
+            self.backend_combo.setCurrentIndex(index)
+        has_override = bool(video_path) and self.settings.contains(video_backend_key(video_path))
+        self.per_video_backend_check.setChecked(has_override)
+        report = load_report(self.settings, video_path) if video_path else None
+        self.backend_report_label.setText(format_report(report) if report else "")
+        self.backend_report_label.setVisible(report is not None)
+
+    def show_media_library(self):
+        # 复用同一个窗口，保留已加载的缩略图
+        if self.media_library_dialog is None:
+            self.media_library_dialog = MediaLibraryDialog(self)
+            self.media_library_dialog.video_selected.connect(self.path_input.setText)
+        self.media_library_dialog.show()
+        self.media_library_dialog.raise_()
+        self.media_library_dialog.activateWindow()
+
     def browse_bat_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "选择BAT文件", "",
@@ -588,6 +1366,14 @@ class SettingsWindow(QWidget):
         self.loop_check.setChecked(loop)
         self.bat_input.setText(bat_path)
         self.minimize_to_tray_check.setChecked(minimize_to_tray)
+        self.refresh_backend_selection()
+        self.composite_check.setChecked(self.settings.value("composite_mode", False, type=bool))
+        self.media_cache_check.setChecked(self.settings.value("media_cache/enabled", True, type=bool))
+        self.seamless_loop_check.setChecked(self.settings.value("seamless_loop", True, type=bool))
+        self.resume_check.setChecked(self.settings.value("resume_playback", True, type=bool))
+        self.track_memory_check.setChecked(self.plugin_manager.resources.memory_tracking)
+        self.governor_check.setChecked(self.settings.value("governor/enabled", False, type=bool))
+        self.cpu_budget_spin.setValue(self.settings.value("governor/cpu_budget", 5.0, type=float))
 
     def save_settings(self):
         video_path = self.path_input.text().strip()
@@ -611,13 +1397,45 @@ class SettingsWindow(QWidget):
         self.settings.setValue("loop", loop)
         self.settings.setValue("bat_path", bat_path)
         self.settings.setValue("minimize_to_tray", minimize_to_tray)
+
+        # 解码后端可按本机或按视频单独保存（按扩展名确定后端时不修改）
+        backend_name = resolve_backend_name(self.settings, video_path, self.backend_override)
+        if self.backend_combo.isEnabled():
+            backend_name = self.backend_combo.currentData()
+            if self.per_video_backend_check.isChecked():
+                self.settings.setValue(video_backend_key(video_path), backend_name)
+            else:
+                self.settings.setValue("media_backend", backend_name)
+                self.settings.remove(video_backend_key(video_path))
+        composite_mode = self.composite_check.isChecked()
+        self.settings.setValue("composite_mode", composite_mode)
+        media_cache_enabled = self.media_cache_check.isChecked()
+        self.settings.setValue("media_cache/enabled", media_cache_enabled)
+        seamless_loop = self.seamless_loop_check.isChecked()
+        self.settings.setValue("seamless_loop", seamless_loop)
+        resume_playback = self.resume_check.isChecked()
+        self.settings.setValue("resume_playback", resume_playback)
+        self.settings.setValue("plugins/track_memory", self.track_memory_check.isChecked())
+
+        governor_enabled = self.governor_check.isChecked()
+        cpu_budget = self.cpu_budget_spin.value()
+        self.settings.setValue("governor/enabled", governor_enabled)
+        self.settings.setValue("governor/cpu_budget", cpu_budget)
+        self.governor.configure(cpu_budget=cpu_budget, enabled=governor_enabled)
         self.settings.sync()
 
         settings_dict = {
             'video_path': video_path,
             'loop': loop,
             'bat_path': bat_path,
-            'minimize_to_tray': minimize_to_tray
+            'minimize_to_tray': minimize_to_tray,
+            'media_backend': backend_name,
+            'composite_mode': composite_mode,
+            'media_cache': media_cache_enabled,
+            'seamless_loop': seamless_loop,
+            'resume_playback': resume_playback,
+            'governor_enabled': governor_enabled,
+            'cpu_budget': cpu_budget
         }
         self.plugin_manager.trigger_settings_changed(settings_dict)
 
@@ -633,14 +1451,52 @@ class SettingsWindow(QWidget):
             QMessageBox.warning(self, "警告", "视频文件不存在，请重新选择！")
             return
 
+        scene = None
+        if is_scene_file(video_path):
+            try:
+                scene = load_scene(video_path)
+            except SceneError as e:
+                QMessageBox.warning(self, "警告", f"无法加载场景:\n{e}")
+                return
+            current = self.current_scene
+            if (self.wallpaper_window and current is not None and current.background == scene.background
+                    and current.plugins == scene.plugins):
+                # 背景和插件相同：原地切换图层，不重启壁纸
+                self.wallpaper_window.set_scene(scene)
+                self.current_scene = scene
+                return
+
         if self.wallpaper_window:
             self.stop_wallpaper()
 
         try:
             loop = self.loop_check.isChecked()
-            self.plugin_manager.trigger_wallpaper_start(video_path, loop)
-            self.wallpaper_window = VideoWallpaper(video_path, loop, self.plugin_manager)
-            self.wallpaper_window.show()
+            if scene is not None:
+                video_path = scene.background['source']
+                if scene.background['loop'] is not None:
+                    loop = scene.background['loop']
+            with Tracing.span("wallpaper.start", video=os.path.basename(video_path)):
+                self.plugin_manager.apply_scene_plugins(scene.plugins if scene else None)
+                self.plugin_manager.trigger_wallpaper_start(video_path, loop)
+                if scene is not None:
+                    backend_name = resolve_backend_name(self.settings, video_path,
+                                                        self.backend_override or scene.background['backend'])
+                elif self.backend_override or not self.backend_combo.isEnabled():
+                    # 程序化壁纸、图片按扩展名确定后端
+                    backend_name = resolve_backend_name(self.settings, video_path, self.backend_override)
+                else:
+                    backend_name = self.backend_combo.currentData()
+                media_cache = self.media_cache if self.media_cache_check.isChecked() else None
+                resume_cache = self.resume_cache if self.resume_check.isChecked() else None
+                self.wallpaper_window = VideoWallpaper(video_path, loop, self.plugin_manager, backend_name,
+                                                       composite=self.composite_check.isChecked(),
+                                                       media_cache=media_cache,
+                                                       seamless_loop=self.seamless_loop_check.isChecked(),
+                                                       resume_cache=resume_cache,
+                                                       scene=scene, asset_cache=self.asset_cache)
+                self.current_scene = scene
+                self.wallpaper_window.apply_quality(self.governor.level)
+                self.wallpaper_window.show()
 
             self.start_btn.setEnabled(False)
             self.stop_btn.setEnabled(True)
@@ -658,6 +1514,9 @@ class SettingsWindow(QWidget):
                     self.wallpaper_window.deleteLater()
                     self.wallpaper_window = None
                     self.plugin_manager.trigger_wallpaper_stop()
+                    # 恢复场景之前的插件启用状态和设置
+                    self.plugin_manager.apply_scene_plugins(None)
+                    self.current_scene = None
                     self.start_btn.setEnabled(True)
                     self.stop_btn.setEnabled(False)
 
@@ -751,6 +1610,9 @@ pause
             QMessageBox.critical(self, "错误", f"取消自启动时发生错误:\n{str(e)}")
 
     def update_autostart_status(self):
+        if winreg is None:
+            self.autostart_status_label.setText("自启动状态: 当前平台不支持")
+            return
         try:
             key = winreg.OpenKey(winreg.HKEY_CURRENT_USER,
                                  r"Software\Microsoft\Windows\CurrentVersion\Run")
@@ -764,7 +1626,7 @@ pause
                 self.autostart_status_label.setStyleSheet("color: red;")
             winreg.CloseKey(key)
         except Exception as e:
-            print(f"检查自启动状态时出错: {e}")
+            app_log.error(f"检查自启动状态时出错: {e}")
 
     def show_normal(self):
         """显示窗口并确保它不在最小化状态"""
@@ -806,6 +1668,21 @@ pause
 
         tray_menu.addSeparator()
 
+        log_action = QAction("查看日志", self)
+        log_action.triggered.connect(self.show_logs)
+        tray_menu.addAction(log_action)
+
+        self.trace_action = QAction("性能追踪", self)
+        self.trace_action.setCheckable(True)
+        self.trace_action.setChecked(Tracing.is_tracing())
+        self.trace_action.toggled.connect(self.toggle_tracing)
+        tray_menu.addAction(self.trace_action)
+
+        self.profile_action = QAction("CPU采样分析", self)
+        self.profile_action.setCheckable(True)
+        self.profile_action.toggled.connect(self.toggle_profiling)
+        tray_menu.addAction(self.profile_action)
+
         quit_action = QAction("退出程序", self)
         quit_action.triggered.connect(self.quit_application)
         tray_menu.addAction(quit_action)
@@ -838,12 +1715,7 @@ pause
         )
 
         if reply == QMessageBox.Yes:
-            # 停止壁纸并清理资源
-            if self.wallpaper_window:
-                self.stop_wallpaper()
-
-            # 停止系统监控线程
-            self.system_monitor.stop()
+            self._shutdown_services()
 
             # 隐藏托盘图标
             self.tray_icon.hide()
@@ -854,6 +1726,98 @@ pause
 
 
 
+    def _shutdown_services(self):
+        """停止壁纸、后台线程和插件（两个退出入口和 aboutToQuit 共用，只执行一次）"""
+        if self._services_shut_down:
+            return
+        self._services_shut_down = True
+        # 停止壁纸并清理资源
+        if self.wallpaper_window:
+            self.stop_wallpaper()
+
+        # 停止系统监控线程
+        self.system_monitor.stop()
+        self.loop_monitor.stop()
+        self.media_cache.shutdown()
+        self.resume_cache.shutdown()
+        self.asset_cache.shutdown()
+        self.control_server.close()
+        if Profiler.is_profiling():
+            Profiler.stop_profiling()
+        self._export_metrics()
+
+        # 停止媒体库的后台线程
+        if self.media_library_dialog:
+            self.media_library_dialog.shutdown()
+
+        # 卸载插件（调用 cleanup()），取消插件后台任务和HTTP请求，否则解释器退出时要等它们结束
+        self.plugin_manager.cleanup_plugins()
+
+    def _export_metrics(self):
+        self.plugin_manager.resources.publish_metrics()
+        try:
+            path = Metrics.export_metrics()
+            app_log.info(f"运行指标已保存: {path}", extra={'event': 'metrics_exported', 'fields': Metrics.snapshot()})
+        except OSError as e:
+            app_log.warning(f"保存运行指标失败: {e}")
+
+    def show_logs(self):
+        if self.log_viewer is None:
+            self.log_viewer = LogViewerDialog()
+        self.log_viewer.show()
+        self.log_viewer.raise_()
+        self.log_viewer.activateWindow()
+
+    def toggle_tracing(self, enabled):
+        """开始性能追踪，或停止并保存 Chrome Trace 文件"""
+        if enabled:
+            Tracing.start_tracing()
+            return
+        try:
+            path = Tracing.stop_tracing()
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"保存性能追踪失败:\n{str(e)}")
+            return
+        if path:
+            self.tray_icon.showMessage("性能追踪", f"已保存到 {path}\n可在 Perfetto 或 chrome://tracing 中打开")
+
+    def toggle_profiling(self, enabled):
+        """开始CPU采样分析，或停止并保存折叠栈和汇总报告"""
+        if enabled:
+            Profiler.start_profiling(self.plugin_manager,
+                                     interval_ms=self.settings.value("profiler/interval_ms",
+                                                                     Profiler.DEFAULT_INTERVAL_MS, type=int),
+                                     cpu_only=self.settings.value("profiler/cpu_only", True, type=bool))
+            return None
+        try:
+            paths = Profiler.stop_profiling()
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"保存CPU采样分析失败:\n{str(e)}")
+            return None
+        if paths and hasattr(self, 'tray_icon'):
+            self.tray_icon.showMessage("CPU采样分析", f"已保存到 {paths[1]}\n折叠栈文件可在 speedscope 中查看火焰图")
+        return paths
+
+    def handle_profile_command(self, args):
+        """控制通道命令：profile start | stop | status"""
+        action = args[0] if args else "status"
+        if action == "status":
+            return "采样中" if Profiler.is_profiling() else "未在采样"
+        if action not in ("start", "stop"):
+            return "error: 用法 profile start|stop|status"
+        enabled = action == "start"
+        if enabled == Profiler.is_profiling():
+            return "已在采样" if enabled else "未在采样"
+        if hasattr(self, 'profile_action'):
+            # 同步托盘菜单项的勾选状态
+            self.profile_action.blockSignals(True)
+            self.profile_action.setChecked(enabled)
+            self.profile_action.blockSignals(False)
+        paths = self.toggle_profiling(enabled)
+        if enabled:
+            return "已开始采样"
+        return f"已保存: {paths[0]} {paths[1]}" if paths else "error: 保存失败"
+
     def show_plugin_info(self):
         dialog = PluginInfoDialog(self.plugin_manager, self)
         dialog.exec_()
@@ -861,6 +1825,11 @@ pause
     def reload_plugins(self):
         try:
             self.plugin_manager.load_plugins()
+            window = self.wallpaper_window
+            if window is not None and window.is_wallpaper_set:
+                # 旧插件的控件已随卸载销毁，让新加载的插件重新接入正在运行的壁纸
+                self.plugin_manager.trigger_wallpaper_start(window.video_path, window.loop)
+                self.plugin_manager.trigger_operate_on_window(window.widget_overlay.canvas)
             plugin_count = len(self.plugin_manager.plugins)
             QMessageBox.information(self, "插件重载", f"成功加载 {plugin_count} 个插件")
         except Exception as e:
@@ -878,15 +1847,49 @@ pause
 
     def update_system_status(self, cpu_percent, memory_mb):
         title = f"LiangYuPaper - CPU: {cpu_percent:.1f}% | 内存: {memory_mb:.1f}MB"
+        if self.governor.enabled:
+            title += f" | 画质: {self.governor.level.name}"
         self.setWindowTitle(title)
 
+    def apply_quality_level(self, level):
+        """画质调节器切换档位后，同步到壁纸和插件"""
+        if self.wallpaper_window:
+            self.wallpaper_window.apply_quality(level)
+        self.plugin_manager.trigger_quality_changed(level)
+
 
 def main():
     app = QApplication(sys.argv)
+    setup_logging()
+
+    # 可选参数 --trace：从启动开始记录性能追踪，退出时保存到数据目录 traces/
+    if "--trace" in sys.argv:
+        sys.argv.remove("--trace")
+        Tracing.start_tracing()
+    # 先保存追踪再关闭日志，保存结果仍会写入日志
+    app.aboutToQuit.connect(Tracing.stop_tracing)
+    app.aboutToQuit.connect(shutdown_logging)
+
+    # 可选参数 --backend <名称>：本次运行强制使用指定的解码后端
+    backend_override = None
+    if "--backend" in sys.argv:
+        index = sys.argv.index("--backend")
+        if index + 1 < len(sys.argv):
+            backend_override = sys.argv[index + 1]
+            if backend_override not in BACKENDS:
+                app_log.warning(f"未知的媒体后端: {backend_override}，可选: {', '.join(BACKENDS)}")
+                backend_override = None
+        del sys.argv[index:index + 2]
+
+    # 可选参数 --profile start|stop|status：控制正在运行的实例的CPU采样分析，不启动新实例
+    if len(sys.argv) > 1 and sys.argv[1] == "--profile":
+        reply = send_command("profile " + (sys.argv[2] if len(sys.argv) > 2 else "status"))
+        print(reply if reply is not None else "没有正在运行的实例")
+        sys.exit(0 if reply is not None and not reply.startswith("error") else 1)
 
     # 检查命令行参数
     if len(sys.argv) > 2 and sys.argv[1] == "--gui-with-video":
-        # 命令行指定视频文件，但显示GUI界面
+        # 命令行指定视频文件（也可以是图片或场景文件），但显示GUI界面
         video_path = sys.argv[2]
         loop = True
 
@@ -895,7 +1898,7 @@ def main():
             loop = False
 
         # 创建设置窗口并自动启动视频
-        window = SettingsWindow(auto_start_video=video_path, auto_loop=loop)
+        window = SettingsWindow(auto_start_video=video_path, auto_loop=loop, backend_override=backend_override)
         window.show()
         sys.exit(app.exec_())
     elif len(sys.argv) > 1 and sys.argv[1] == "--autostart":
@@ -906,12 +1909,12 @@ def main():
 
         if video_path and os.path.exists(video_path):
             # 创建设置窗口并自动启动视频
-            window = SettingsWindow(auto_start_video=video_path, auto_loop=loop)
+            window = SettingsWindow(auto_start_video=video_path, auto_loop=loop, backend_override=backend_override)
             window.show()
             sys.exit(app.exec_())
         else:
             # 如果没有设置或文件不存在，仍然显示GUI
-            window = SettingsWindow()
+            window = SettingsWindow(backend_override=backend_override)
             window.show()
             QMessageBox.warning(window, "警告", "自动启动失败：未找到有效的视频文件设置。")
             sys.exit(app.exec_())
@@ -924,15 +1927,16 @@ def main():
             loop = False
 
         # 创建设置窗口并自动启动视频
-        window = SettingsWindow(auto_start_video=video_path, auto_loop=loop)
+        window = SettingsWindow(auto_start_video=video_path, auto_loop=loop, backend_override=backend_override)
         window.show()
         sys.exit(app.exec_())
     else:
         # 显示设置窗口
-        window = SettingsWindow()
+        window = SettingsWindow(backend_override=backend_override)
         window.show()
         sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # 打包后插件后台任务的进程池需要
     main()
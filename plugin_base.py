@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
 from PyQt5.QtWidgets import QWidget
 
+from Utils.LogService import get_plugin_logger
+from Utils import Tracing
+
 class PluginBase(ABC):
     """插件基类，所有插件必须继承此类"""
 
@@ -10,6 +13,24 @@ class PluginBase(ABC):
         self.description = "No description"
         self.author = "Unknown"
         self.enabled = True
+        self.quality_level = None  # 当前画质档位，由插件管理器在画质调整时更新
+        self.event_bus = None  # 事件总线，由插件管理器在 initialize 之前注入
+        self.http = None  # 共享HTTP服务（Utils.HttpService），由插件管理器在 initialize 之前注入
+        self.frame_tap = None  # 视频帧分发（Utils.FrameTap），由插件管理器在 initialize 之前注入
+        self.tasks = None  # 后台任务服务（Utils.TaskService），由插件管理器在 initialize 之前注入
+        self.assets = None  # 共享图片和字体缓存（Utils.AssetCache.PixmapCache），由插件管理器在 initialize 之前注入
+        self.settings_schema = []  # 设置项声明（Utils.PluginSettings.SettingField 列表）
+        self.settings = {}  # 声明了设置项时，由插件管理器在 initialize 之前按声明读取已保存的值
+        self._settings_dialog = None
+        self._logger = None
+        self._connections = []  # connect_signal 建立的连接，卸载时断开
+
+    @property
+    def logger(self):
+        """插件专用日志记录器（Utils.LogService），记录自动带上插件名，替代 print"""
+        if self._logger is None:
+            self._logger = get_plugin_logger(self.name)
+        return self._logger
 
     @abstractmethod
     def initialize(self, app_instance):
@@ -30,22 +51,140 @@ class PluginBase(ABC):
         pass
 
     def on_settings_changed(self, settings):
-        """设置更改时触发（可选实现）"""
+        """
+        设置更改时触发（可选实现）
+        :param settings: 仅包含本次发生变化的键值；短时间内的多次修改会合并为一次通知
+        """
+        pass
+
+    def subscribe(self, event_type, handler, keys=None, priority=0, thread="gui"):
+        """
+        订阅事件总线上的事件，通常在 initialize 中调用
+        :param event_type: 事件类型，见 Utils.EventBus 中的 EVENT_* 常量
+        :param handler: handler(payload)，可以是 async def 协程函数
+        :param keys: 只关心的设置键，例如 ["video_path"]
+        :param priority: 优先级，数值越大越先执行
+        :param thread: "gui" 在GUI线程执行，"worker" 在后台线程执行（不可操作控件）
+        """
+        return self.event_bus.subscribe(event_type, handler, keys=keys, priority=priority,
+                                        thread=thread, owner=self)
+
+    def tap_frames(self, callback, fps=2.0):
+        """
+        订阅正在显示的视频帧，通常在 initialize 中调用
+        :param callback: callback(frame)，frame 为缩小后的只读RGB数组 (高, 宽, 3)，可用 Utils.FrameTap 中的工具分析
+        :param fps: 最高接收频率
+        仅在画面经由程序输出时可用（合成模式或 null 等帧输出后端），VLC直接渲染窗口时不会收到帧
+        """
+        return self.frame_tap.subscribe(callback, fps=fps, owner=self)
+
+    def run_in_background(self, fn, *args, callback=None, errback=None, process=False, **kwargs):
+        """
+        在宿主管理的后台线程中执行耗时操作（解析、图像处理、扫描文件等），避免阻塞覆盖层和托盘
+        :param fn: fn(*args, **kwargs)，在后台执行，不可操作控件
+        :param callback: callback(result)，在GUI线程执行
+        :param errback: errback(exception)，在GUI线程执行；未提供时记录错误日志
+        :param process: 为True时在进程池中执行，适合长时间的纯CPU计算；
+                        fn 须为插件模块（或其他模块）的顶层函数，参数和返回值须可序列化
+        :return: Task，可调用 cancel()
+        插件被禁用、卸载或壁纸停止时，未开始的任务被取消，已开始的任务结果被丢弃；
+        线程中的长任务可检查 Utils.TaskService.current_task().cancelled 提前结束。
+        排队的任务过多时抛出 Utils.TaskService.TaskQueueFull
+        """
+        return self.tasks.submit(fn, *args, callback=callback, errback=errback, owner=self,
+                                 process=process, **kwargs)
+
+    def http_get(self, url, callback=None, errback=None, **kwargs):
+        """
+        通过共享HTTP服务发起非阻塞GET请求（参数见 Utils.HttpService.HttpService.get）
+        :param callback: callback(HttpResponse)，在GUI线程执行
+        :param errback: errback(exception)，在GUI线程执行
+        插件被禁用时不回调，卸载时未完成请求的回调被丢弃
+        """
+        return self.http.get(url, callback=callback, errback=errback, owner=self, **kwargs)
+
+    def load_pixmap(self, path, size=None, dpr=1.0, callback=None):
+        """
+        从共享缓存取得缩放好的图片，在 paintEvent 中每次调用即可，不要自己保存 QPixmap
+        :param size: 显示大小（逻辑像素，QSize 或 (宽, 高)），保持宽高比缩放到此大小之内；None 为原始大小
+        :param dpr: 设备像素比，通常传入 widget.devicePixelRatioF()
+        :param callback: callback(pixmap)，图片尚未解码时在后台解码完成后于GUI线程调用（解码失败时 pixmap 为 None），
+                         通常用来触发重绘，例如 lambda pixmap: self.widget.update()
+        :return: QPixmap，尚未解码完成时为 None
+        所有插件共用同一份缓存和内存上限，相同的 (路径, 大小, 设备像素比) 只解码一次
+        """
+        return self.assets.pixmap(path, size, dpr, callback=callback, owner=self)
+
+    def load_font(self, path, pixel_size=None):
+        """从字体文件创建 QFont，同一字体文件在所有插件间只注册一次"""
+        return self.assets.font(path, pixel_size)
+
+    def on_quality_changed(self, level):
+        """
+        画质档位变化时触发（可选实现）
+        :param level: QualityLevel，包含 overlay_fps（覆盖层帧率上限）和 plugin_tick_scale（定时器间隔倍数）
+        """
         pass
 
+    def tick_interval(self, base_ms):
+        """按当前画质档位换算插件定时器间隔（毫秒），CPU紧张时自动放慢"""
+        if self.quality_level is None:
+            return base_ms
+        return int(base_ms * self.quality_level.plugin_tick_scale)
+
+    def trace_span(self, name, **args):
+        """
+        性能追踪区间，未开启追踪时几乎没有开销
+        用法: with self.trace_span("fetch_weather", city=city): ...
+        """
+        return Tracing.span(name, cat="plugin", plugin=self.name, **args)
+
+    def connect_signal(self, signal, slot):
+        """
+        连接宿主或其他对象的Qt信号，插件卸载时自动断开
+        插件自己创建的控件和定时器的信号无需经过这里，卸载时控件被销毁，连接随之断开
+        """
+        signal.connect(slot)
+        self._connections.append((signal, slot))
+
     def cleanup(self):
-        """清理资源（可选实现）"""
+        """
+        插件卸载（重新加载插件或退出程序）时调用，释放插件自己持有的资源（可选实现）
+        之后插件管理器会取消订阅、断开 connect_signal 的连接，并销毁插件保存为属性的控件和定时器
+        """
         pass
 
-    @abstractmethod
     def show_settings_dialog(self):
-        """显示插件的设置对话框"""
+        """
+        显示插件的设置对话框
+        默认根据 settings_schema 生成非模态的Qt表单，需要完全自定义界面时再重写
+        """
+        if not self.settings_schema:
+            return
+        if self._settings_dialog is not None:
+            self._settings_dialog.raise_()
+            self._settings_dialog.activateWindow()
+            return
+        from Utils.PluginSettings import PluginSettingsDialog
+        self._settings_dialog = PluginSettingsDialog(self)
+        self._settings_dialog.destroyed.connect(self._on_settings_dialog_closed)
+        self._settings_dialog.show()
+
+    def _on_settings_dialog_closed(self):
+        self._settings_dialog = None
+
+    def apply_settings(self, changed):
+        """
+        设置表单保存后触发（可选实现），此时 self.settings 已更新
+        :param changed: 仅包含发生变化的设置项
+        """
         pass
 
     @abstractmethod
     def operate_on_window(self, window: QWidget):
         """
         在窗口上进行操作
-        :param window: VideoWallpaper窗口实例，可以添加自定义控件
+        :param window: 覆盖层画布（与屏幕等大，坐标即屏幕坐标），可以添加自定义控件
+                       覆盖层只显示插件控件所占的区域，控件之外的点击会落到桌面
         """
         pass
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""模拟时钟：表盘、时针、分针和秒针都由距离场计算，只在表盘所在的方形区域内计算"""
+import time
+
+import numpy as np
+
+BACKGROUND = np.array([0.08, 0.09, 0.11], dtype=np.float32)
+HANDS = np.array([0.92, 0.92, 0.88], dtype=np.float32)
+SECOND = np.array([0.9, 0.3, 0.25], dtype=np.float32)
+SCALE = 0.4  # 表盘半径占画面高度的比例（不含刻度圈外沿）
+
+
+def _hand_mask(x, y, angle, length, width):
+    """从中心指向 angle 的线段的覆盖率（标量转为 Python float，保持 float32 运算）"""
+    dx, dy = float(np.sin(angle)), -float(np.cos(angle))
+    along = np.clip(x * dx + y * dy, 0.0, length)
+    distance = np.sqrt((x - along * dx) ** 2 + (y - along * dy) ** 2)
+    return np.clip((width - distance) * 250.0 + 0.5, 0.0, 1.0)
+
+
+def shade(t, grid):
+    now = time.time()
+    local = time.localtime(now)
+    seconds = local.tm_sec + now % 1.0
+    minutes = local.tm_min + seconds / 60.0
+    hours = local.tm_hour % 12 + minutes / 60.0
+
+    image = np.empty((grid.height, grid.width, 3), dtype=np.float32)
+    image[...] = BACKGROUND
+
+    # 表盘外接正方形
+    half = int(grid.height * SCALE * 1.05) + 1
+    cx, cy = grid.width // 2, grid.height // 2
+    x0, x1 = max(0, cx - half), min(grid.width, cx + half)
+    y0, y1 = max(0, cy - half), min(grid.height, cy + half)
+    x = (grid.x[y0:y1, x0:x1] - 0.5) * (grid.aspect / SCALE)
+    y = (grid.y[y0:y1, x0:x1] - 0.5) * (1.0 / SCALE)
+
+    ring = np.clip((0.012 - np.abs(np.sqrt(x * x + y * y) - 0.95)) * 166.0 + 0.5, 0.0, 1.0)
+    second = _hand_mask(x, y, seconds / 60.0 * 2 * np.pi, 0.88, 0.006)
+    hands = np.maximum(np.maximum(ring, _hand_mask(x, y, hours / 12.0 * 2 * np.pi, 0.5, 0.025)),
+                       _hand_mask(x, y, minutes / 60.0 * 2 * np.pi, 0.8, 0.015))
+    hands *= 1.0 - second  # 秒针画在最上层
+
+    image[y0:y1, x0:x1] += hands[..., None] * (HANDS - BACKGROUND) + second[..., None] * (SECOND - BACKGROUND)
+    return image
@@ -0,0 +1,14 @@
+"""缓慢旋转的双色渐变"""
+import numpy as np
+
+COLOR_A = np.array([0.09, 0.12, 0.35], dtype=np.float32)
+COLOR_B = np.array([0.85, 0.35, 0.45], dtype=np.float32)
+
+
+def shade(t, grid):
+    # 标量先转为 Python float，避免 float64 标量把整张网格提升为 float64
+    angle = t * 0.1
+    cos, sin = float(np.cos(angle)) * grid.aspect, float(np.sin(angle))
+    u = (grid.x - 0.5) * cos + (grid.y - 0.5) * sin
+    mix = (np.clip(u + 0.5, 0.0, 1.0))[..., None]
+    return COLOR_A + (COLOR_B - COLOR_A) * mix
@@ -0,0 +1,35 @@
+"""漂浮的光点：粒子位置保存在 grid.state 中，每个粒子只在自己光晕覆盖的小窗口内累加"""
+import numpy as np
+
+COUNT = 48
+BACKGROUND = np.array([0.02, 0.03, 0.08], dtype=np.float32)
+GLOW = np.array([0.55, 0.8, 1.0], dtype=np.float32)
+
+
+def shade(t, grid):
+    state = grid.state
+    if "position" not in state:
+        rng = np.random.default_rng(7)
+        state["position"] = rng.random((COUNT, 2), dtype=np.float32)
+        state["velocity"] = (rng.random((COUNT, 2), dtype=np.float32) - 0.5) * 0.05
+        state["size"] = rng.uniform(0.004, 0.012, COUNT).astype(np.float32)
+        state["time"] = t
+    dt = min(0.1, max(0.0, t - state["time"]))
+    state["time"] = t
+    position = (state["position"] + state["velocity"] * dt) % 1.0
+    state["position"] = position
+
+    width, height = grid.width, grid.height
+    intensity = np.zeros((height, width), dtype=np.float32)
+    for (px, py), size in zip(position.tolist(), state["size"].tolist()):
+        # 高斯光晕在 3 倍半径之外可以忽略
+        radius = size * 3.0
+        x0, x1 = int((px - radius / grid.aspect) * width), int((px + radius / grid.aspect) * width) + 1
+        y0, y1 = int((py - radius) * height), int((py + radius) * height) + 1
+        x0, y0, x1, y1 = max(0, x0), max(0, y0), min(width, x1), min(height, y1)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        dx2 = ((grid.x[0, x0:x1] - px) * grid.aspect) ** 2
+        dy2 = (grid.y[y0:y1, 0] - py) ** 2
+        intensity[y0:y1, x0:x1] += np.exp((dy2[:, None] + dx2[None, :]) * (-1.0 / (size * size)))
+    return BACKGROUND + GLOW * np.minimum(intensity, 1.0)[..., None]
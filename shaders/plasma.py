@@ -0,0 +1,14 @@
+"""经典等离子效果：几个正弦场叠加后映射为彩色"""
+import numpy as np
+
+PHASE = np.array([0.0, 2.094, 4.189], dtype=np.float32)
+
+
+def shade(t, grid):
+    x = grid.x * grid.aspect * 6.0
+    y = grid.y * 6.0
+    value = (np.sin(x + t)
+             + np.sin(y * 0.8 - t * 0.7)
+             + np.sin((x + y) * 0.6 + t * 0.5)
+             + np.sin(np.hypot(x - 3.0 * grid.aspect, y - 3.0) - t * 1.3))
+    return 0.5 + 0.5 * np.sin(value[..., None] * 1.2 + PHASE)